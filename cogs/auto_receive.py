@@ -10,24 +10,6 @@ from lib.bot import TMWBot
 
 AUTO_RECEIVE_LOCK = asyncio.Lock()
 
-CREATE_AUTO_RECEIVE_TABLE_SQL = """
-        CREATE TABLE IF NOT EXISTS auto_receive_roles (
-        guild_id INTEGER NOT NULL,
-        role_id_to_have INTEGER NOT NULL,
-        role_name_to_have TEXT,
-        role_id_to_get INTEGER NOT NULL,
-        role_name_to_get TEXT,
-        PRIMARY KEY (guild_id, role_id_to_have, role_id_to_get))"""
-
-CREATE_FORBIDDEN_USERS_TABLE_SQL = """
-        CREATE TABLE IF NOT EXISTS auto_receive_roles_banned (
-        guild_id INTEGER NOT NULL,
-        user_id INTEGER NOT NULL,
-        user_name TEXT,
-        role_id INTEGER NOT NULL,
-        role_name TEXT,
-        PRIMARY KEY (guild_id, user_id, role_id))"""
-
 GET_AUTO_RECEIVE_ROLES_SQL = "SELECT * FROM auto_receive_roles WHERE guild_id = ?"
 
 SET_AUTO_RECEIVE_ROLE_SQL = """INSERT INTO auto_receive_roles (guild_id, role_id_to_have, role_name_to_have,
@@ -48,8 +30,6 @@ class AutoReceive(commands.Cog):
         self.bot = bot
 
     async def cog_load(self):
-        await self.bot.RUN(CREATE_AUTO_RECEIVE_TABLE_SQL)
-        await self.bot.RUN(CREATE_FORBIDDEN_USERS_TABLE_SQL)
         self.give_auto_roles.start()
 
     async def get_auto_receive_roles(self, guild_id):
@@ -2,27 +2,7 @@ import asyncio
 from lib.bot import TMWBot
 import discord
 from discord.ext import commands
-from .username_fetcher import get_username_db
-
-CREATE_USER_BOOKMARKS_TABLE = """
-CREATE TABLE IF NOT EXISTS user_bookmarks (
-    guild_id INTEGER NOT NULL,
-    channel_id INTEGER NOT NULL,
-    user_id INTEGER NOT NULL,
-    message_id INTEGER NOT NULL,
-    message_link TEXT NOT NULL,
-    dm_message_id INTEGER NOT NULL,
-    PRIMARY KEY (user_id, message_id));"""
-
-CREATE_BOOKMARKED_MESSAGES_TABLE = """
-CREATE TABLE IF NOT EXISTS bookmarked_messages (
-    guild_id INTEGER NOT NULL,
-    channel_id INTEGER NOT NULL,
-    message_id INTEGER NOT NULL,
-    message_author_id INTEGER NOT NULL,
-    message_link TEXT NOT NULL,
-    bookmark_count INTEGER NOT NULL DEFAULT 0,
-    PRIMARY KEY (guild_id, message_id));"""
+from .username_fetcher import get_usernames
 
 UPDATE_BOOKMARK_COUNT_QUERY = """
 INSERT INTO bookmarked_messages (guild_id, channel_id, message_id, message_author_id, message_link, bookmark_count)
@@ -61,10 +41,6 @@ class Bookmarks(commands.Cog):
         self.bookmark_emoji = "🔖"
         self.remove_emoji = "❌"
 
-    async def cog_load(self):
-        await self.bot.RUN(CREATE_USER_BOOKMARKS_TABLE)
-        await self.bot.RUN(CREATE_BOOKMARKED_MESSAGES_TABLE)
-
     async def _get_message(self, channel_id: int, message_id: int) -> discord.Message:
         channel = self.bot.get_channel(channel_id)
         if not channel:
@@ -191,8 +167,9 @@ class Bookmarks(commands.Cog):
             color=discord.Color.blue()
         )
 
+        author_names = await get_usernames(self.bot, [row[2] for row in leaderboard_data])
         for index, (channel_id, message_id, author_id, message_link, bookmark_count) in enumerate(leaderboard_data, 1):
-            author_name = await get_username_db(self.bot, author_id)
+            author_name = author_names[author_id]
             leaderboard_embed.add_field(
                 name=f"{index}. By {author_name} ({bookmark_count} bookmarks)",
                 value=f"[Jump to message]({message_link})",
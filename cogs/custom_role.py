@@ -5,14 +5,6 @@ from discord.ext import tasks
 
 import re
 
-CREATE_CUSTOM_ROLE_TABLE_SQL = """
-        CREATE TABLE IF NOT EXISTS custom_roles (
-        guild_id INTEGER NOT NULL,
-        user_id INTEGER NOT NULL,
-        role_id INTEGER NOT NULL,
-        role_name TEXT,
-        PRIMARY KEY (guild_id, user_id))"""
-
 GET_CUSTOM_ROLES_SQL = "SELECT * FROM custom_roles WHERE guild_id = ?"
 
 SET_CUSTOM_ROLE_SQL = """INSERT INTO custom_roles (guild_id, user_id, role_id, role_name)
@@ -20,14 +12,6 @@ SET_CUSTOM_ROLE_SQL = """INSERT INTO custom_roles (guild_id, user_id, role_id, r
 
 DELETE_CUSTOM_ROLE_SQL = "DELETE FROM custom_roles WHERE guild_id = ? AND user_id = ?"
 
-CREATE_CUSTOM_ROLE_SETTINGS_TABLE_SQL = """
-        CREATE TABLE IF NOT EXISTS custom_role_settings (
-        guild_id INTEGER NOT NULL,
-        allowed_roles TEXT,
-        reference_role_id INTEGER,
-        reference_role_name TEXT,
-        PRIMARY KEY (guild_id))"""
-
 GET_CUSTOM_ROLE_SETTINGS_SQL = "SELECT * FROM custom_role_settings WHERE guild_id = ?"
 
 SET_CUSTOM_ROLE_SETTINGS_SQL = """INSERT INTO custom_role_settings (guild_id, allowed_roles, reference_role_id, reference_role_name)
@@ -41,8 +25,6 @@ class CustomRole(commands.Cog):
         self.bot = bot
 
     async def cog_load(self):
-        await self.bot.RUN(CREATE_CUSTOM_ROLE_TABLE_SQL)
-        await self.bot.RUN(CREATE_CUSTOM_ROLE_SETTINGS_TABLE_SQL)
         self.strip_roles.start()
 
     async def get_custom_roles(self, guild_id):
@@ -6,16 +6,6 @@ from lib.bot import TMWBot
 from discord.utils import utcnow
 import aiohttp
 
-DAILY_QUESTIONS_CREATE_TABLE = """
-CREATE TABLE IF NOT EXISTS daily_questions (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    guild_id INTEGER NOT NULL,
-    channel_id INTEGER NOT NULL,
-    question TEXT NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-"""
-
 GET_RECENT_QUESTIONS = """
 SELECT question FROM daily_questions 
 WHERE guild_id = ? AND channel_id = ?
@@ -42,7 +32,6 @@ Here are the last questions that were asked (avoid similar topics):
 
 Provide only the question text in Japanese, nothing else."""
 
-
 DAILY_QUESTIONS_SETTINGS_PATH = os.getenv("DAILY_QUESTIONS_SETTINGS_PATH") or "config/daily_questions_settings.yml"
 with open(DAILY_QUESTIONS_SETTINGS_PATH, "r", encoding="utf-8") as f:
     daily_questions_settings = yaml.safe_load(f)
@@ -54,7 +43,6 @@ class DailyQuestion(commands.Cog):
         self.api_key = os.getenv("OPENAI_KEY")
 
     async def cog_load(self):
-        await self.bot.RUN(DAILY_QUESTIONS_CREATE_TABLE)
         if not self.api_key:
             return
         self.check_daily_questions.start()
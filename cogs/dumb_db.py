@@ -26,6 +26,8 @@ class DatabasePoster(commands.Cog):
     async def post_db(self, interaction: discord.Interaction):
         await interaction.response.defer()
         try:
+            # Fold the WAL back into the main database file so the copy is complete.
+            await self.bot.db.checkpoint()
             temp_file_path = await asyncio.to_thread(create_temporary_gzip_file)
             await interaction.followup.send(file=discord.File(temp_file_path, filename="db.sqlite3.gz"))
         except Exception as e:
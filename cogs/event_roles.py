@@ -3,14 +3,6 @@ from lib.bot import TMWBot
 import discord
 from discord.ext import commands, tasks
 
-CREATE_EVENT_ROLES_TABLE = """
-CREATE TABLE IF NOT EXISTS event_roles (
-    guild_id INTEGER NOT NULL,
-    event_id INTEGER NOT NULL,
-    role_id INTEGER NOT NULL,
-    PRIMARY KEY (guild_id, event_id)
-);"""
-
 INSERT_EVENT_ROLE = """
 INSERT OR REPLACE INTO event_roles (guild_id, event_id, role_id)
 VALUES (?, ?, ?);"""
@@ -30,7 +22,6 @@ class EventRoles(commands.Cog):
         self.sync_event_roles.cancel()
 
     async def cog_load(self):
-        await self.bot.RUN(CREATE_EVENT_ROLES_TABLE)
         self.sync_event_roles.start()
 
     async def create_event_role(self, event: discord.ScheduledEvent) -> discord.Role:
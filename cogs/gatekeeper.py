@@ -17,28 +17,6 @@ GATEKEEPER_SETTINGS_PATH = os.getenv("ALT_GATEKEEPER_SETTINGS_PATH") or "config/
 with open(GATEKEEPER_SETTINGS_PATH, "r", encoding="utf-8") as f:
     gatekeeper_settings = yaml.safe_load(f)
 
-CREATE_QUIZ_ATTEMPTS_TABLE = """
-    CREATE TABLE IF NOT EXISTS quiz_attempts (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    guild_id INTEGER NOT NULL,
-    user_id INTEGER NOT NULL,
-    quiz_name TEXT NOT NULL,
-    created_at TIMESTAMP);"""
-
-CREATE_PASSED_QUIZZES_TABLE = """
-    CREATE TABLE IF NOT EXISTS passed_quizzes (
-    guild_id INTEGER NOT NULL,
-    user_id INTEGER NOT NULL,
-    quiz_name TEXT NOT NULL,
-    PRIMARY KEY (guild_id, user_id, quiz_name));"""
-
-CREATE_USER_THREADS_TABLE = """
-    CREATE TABLE IF NOT EXISTS user_threads (
-    user_id INTEGER NOT NULL,
-    thread_id INTEGER NOT NULL,
-    PRIMARY KEY (user_id)
-);"""
-
 ADD_QUIZ_ATTEMPT = """INSERT INTO quiz_attempts (guild_id, user_id, quiz_name, created_at) VALUES (?,?,?,?);"""
 
 GET_LAST_QUIZ_ATTEMPT = """SELECT quiz_name, created_at FROM quiz_attempts
@@ -296,10 +274,6 @@ class LevelUp(commands.Cog):
         self.bot = bot
 
     async def cog_load(self):
-        await self.bot.RUN(CREATE_QUIZ_ATTEMPTS_TABLE)
-        await self.bot.RUN(CREATE_PASSED_QUIZZES_TABLE)
-        await self.bot.RUN(CREATE_USER_THREADS_TABLE)
-
         self.bot.add_dynamic_items(DynamicQuizMenu)
         self.inactive_quiz_thread_deleter.start()
 
@@ -1,30 +1,78 @@
-import io
+import os
 import asyncio
-import pandas as pd
-import bar_chart_race as bcr
 import discord
 from discord.ext import commands
-import warnings
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
-import tempfile
-import os
-import matplotlib.font_manager as fm
-import matplotlib.pyplot as plt
 
 from lib.bot import TMWBot
+from lib.bar_race import generate_bar_race, race_extension
 from lib.media_types import LOG_CHOICES, MEDIA_TYPES
 from lib.immersion_helpers import is_valid_channel
-from .username_fetcher import get_username_db
-
-GET_LOGS_FOR_RACE_QUERY = """
-    SELECT user_id, media_type, amount_logged, points_received, log_date
-    FROM logs
-    WHERE log_date BETWEEN ? AND ?
-    AND (? IS NULL OR media_type = ?)
-    ORDER BY log_date;
+from lib.race_cache import RaceVideoCache, get_race_data_version, is_closed_period
+from lib.race_data import RACE_BAR_COUNT, plan_race, race_origin, race_standings, race_step_days
+from lib.race_jobs import RaceJob, RaceJobError, RaceQueueFullError, QUEUED
+from .username_fetcher import get_usernames
+
+# Cumulative total of every user at the end of every period of step days, counted from the origin day.
+# Every user gets a row for every period up to the last logged one, so the rows fill the race matrix directly.
+# Ranks are only taken at period ends and interpolated in between, so a user that never places within the
+# bars shown in any period never appears and is dropped here.
+GET_RACE_STANDINGS_QUERY = """
+    WITH RECURSIVE period_totals AS (
+        SELECT user_id, CAST(julianday(day) - julianday(?) AS INTEGER) / ? AS bucket, SUM({value_column}) AS total
+        FROM daily_rollup
+        WHERE day BETWEEN ? AND ? AND (? IS NULL OR media_type = ?)
+        GROUP BY user_id, bucket
+    ),
+    buckets (bucket) AS (
+        SELECT 0
+        UNION ALL
+        SELECT bucket + 1 FROM buckets WHERE bucket < (SELECT MAX(bucket) FROM period_totals)
+    ),
+    standings AS (
+        SELECT users.user_id, buckets.bucket,
+               SUM(IFNULL(period_totals.total, 0)) OVER (PARTITION BY users.user_id ORDER BY buckets.bucket) AS cumulative
+        FROM (SELECT DISTINCT user_id FROM period_totals) AS users
+        CROSS JOIN buckets
+        LEFT JOIN period_totals ON period_totals.user_id = users.user_id AND period_totals.bucket = buckets.bucket
+    ),
+    contenders AS (
+        SELECT DISTINCT user_id
+        FROM (SELECT user_id, cumulative, RANK() OVER (PARTITION BY bucket ORDER BY cumulative DESC) AS place FROM standings)
+        WHERE place <= ? AND cumulative > 0
+    )
+    SELECT user_id, bucket, cumulative
+    FROM standings
+    WHERE user_id IN contenders
+    ORDER BY user_id, bucket;
 """
 
+RACE_VALUE_COLUMNS = {'points': 'points', 'amount': 'amount'}
+
+# Videos of periods that are not over yet, videos of closed periods are kept regardless.
+RACE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Ranges this long still get about the usual number of periods, only each period covers more days.
+MAX_RACE_DAYS = 3 * 366
+
+# Seconds between edits of the queue position and render progress into the /log_race response.
+PROGRESS_UPDATE_INTERVAL = 5
+
+
+def race_filename(video_path: str) -> str:
+    return "race" + os.path.splitext(video_path)[1]
+
+
+async def send_video(send, content: str, video, filename: str):
+    """Uploads the open video from its start, the file stays open for another attempt."""
+    video.seek(0)
+    file = discord.File(video, filename=filename)
+    try:
+        await send(content, file=file)
+    finally:
+        file.close()
+
 
 def admin_cooldown(interaction: discord.Interaction) -> Optional[discord.app_commands.Cooldown]:
     if interaction.channel.permissions_for(interaction.user).administrator:
@@ -35,121 +83,22 @@ def admin_cooldown(interaction: discord.Interaction) -> Optional[discord.app_com
 class ImmersionBarRaces(commands.Cog):
     def __init__(self, bot: TMWBot):
         self.bot = bot
-        self.set_fonts()
-
-    def set_fonts(self):
-        font_list = []
-        japanese_fonts = ['Noto Sans CJK JP', 'Noto Sans JP', 'Yu Gothic', 'MS Gothic', 'Hiragino Sans']
-        emoji_fonts = ['Noto Emoji']
-
-        for font_name in japanese_fonts:
-            try:
-                font_path = fm.findfont(fm.FontProperties(family=font_name), fallback_to_default=False, rebuild_if_missing=True)
-                if font_path:
-                    font_list.append(font_name)
-                    break
-            except:
-                continue
-
-        for font_name in emoji_fonts:
-            try:
-                font_path = fm.findfont(fm.FontProperties(family=font_name), fallback_to_default=False, rebuild_if_missing=True)
-                if font_path:
-                    font_list.append(font_name)
-                    break
-            except:
-                continue
-
-        font_list.append('sans-serif')
-        plt.rcParams['font.family'] = font_list
-
-    def generate_bar_race(self, logs_data, start_date, end_date, media_type=None, race_type='points'):
-        df = pd.DataFrame(logs_data, columns=['username', 'media_type', 'amount_logged', 'points_received', 'log_date'])
-
-        df['log_date'] = pd.to_datetime(df['log_date'], utc=True)
-
-        value_col = 'points_received' if race_type == 'points' else 'amount_logged'
-
-        # Calculate cumulative sum for each user over time
-        # groupby('username') groups all entries by user
-        # cumsum() calculates running total for each user
-        df['cumsum'] = df.groupby('username')[value_col].cumsum()
-
-        # Create a pivot table for the bar chart race
-        # index='log_date': dates become row indices
-        # columns='username': each user gets their own column
-        # values='cumsum': the values shown in the chart
-        # aggfunc='max': if multiple entries exist for same date, take the maximum
-        pivot_df = df.pivot_table(index='log_date', columns='username', values='cumsum', aggfunc='max').ffill()
-
-        # Determine appropriate sampling frequency based on date range
-        # This reduces the number of frames for longer time periods
-        if (pd.to_datetime(end_date) - pd.to_datetime(start_date)).days > 210:
-            freq = '7D'
-        elif (pd.to_datetime(end_date) - pd.to_datetime(start_date)).days > 150:
-            freq = '6D'
-        elif (pd.to_datetime(end_date) - pd.to_datetime(start_date)).days > 120:
-            freq = '5D'
-        elif (pd.to_datetime(end_date) - pd.to_datetime(start_date)).days > 90:
-            freq = '4D'
-        elif (pd.to_datetime(end_date) - pd.to_datetime(start_date)).days > 60:
-            freq = '3D'
-        elif (pd.to_datetime(end_date) - pd.to_datetime(start_date)).days > 31:
-            freq = '2D'
-        else:
-            freq = 'D'
-
-        # Resample data according to chosen frequency
-        # max() keeps the highest value in each period
-        # fillna methods handle missing values
-        pivot_df = pivot_df.resample(freq).max().ffill().fillna(0)
-
-        # Generate chart title
-        title = f"{'Points' if race_type == 'points' else 'Amount'} Race"
-        if media_type and race_type == 'points':
-            title += f" - {media_type}"
-        elif media_type and race_type == 'amount':
-            title += f" - {MEDIA_TYPES[media_type]['log_name']}"
-        title += f"\n{start_date.split()[0]} to {end_date.split()[0]}"
-
-        # Create temporary file for video output
-        # delete=False allows us to read the file after closing it
-        temp_file = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
-        temp_file.close()
-
-        # Generate the bar chart race animation
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            bcr.bar_chart_race(
-                df=pivot_df,
-                filename=temp_file.name,
-                title=title,
-                n_bars=15,
-                filter_column_colors=True,
-                period_length=500,
-                steps_per_period=20,
-                period_fmt='%b %#d, %Y')
-
-        with open(temp_file.name, 'rb') as f:
-            buffer = io.BytesIO(f.read())
-            buffer.seek(0)
-
-        os.unlink(temp_file.name)
-
-        return buffer
+        self.race_cache = RaceVideoCache(os.path.join(os.path.dirname(bot.path_to_db), 'race_cache'), RACE_CACHE_MAX_BYTES)
 
     @discord.app_commands.command(name='log_race',
                                   description='Generate a bar chart race visualization of immersion progress!')
     @discord.app_commands.describe(from_date='Start date (YYYY-MM-DD)',
                                    to_date='End date (YYYY-MM-DD)',
                                    media_type='Optional: Filter by media type',
-                                   race_type='Optional: Race by points or amount')
+                                   race_type='Optional: Race by points or amount',
+                                   preview='Optional: Quickly render a small, choppy GIF instead of the full video')
     @discord.app_commands.choices(media_type=LOG_CHOICES,
                                   race_type=[discord.app_commands.Choice(name='Points', value='points'),
                                              discord.app_commands.Choice(name='Amount', value='amount')])
     @discord.app_commands.guild_only()
     @discord.app_commands.checks.dynamic_cooldown(admin_cooldown)
-    async def log_race(self, interaction: discord.Interaction, from_date: str, to_date: str, media_type: Optional[str] = None, race_type: Optional[str] = 'points'):
+    async def log_race(self, interaction: discord.Interaction, from_date: str, to_date: str, media_type: Optional[str] = None, race_type: Optional[str] = 'points',
+                       preview: Optional[bool] = False):
         # if not await is_valid_channel(interaction):
         # return await interaction.response.send_message("You can only use this command in DM or in the log channels.", ephemeral=True)
 
@@ -162,50 +111,143 @@ class ImmersionBarRaces(commands.Cog):
         if end_date < start_date:
             return await interaction.response.send_message("End date must be after start date.", ephemeral=True)
 
-        if (end_date - start_date).days > 210:
-            return await interaction.response.send_message("Date range must be 210 days or less (subject to change...)", ephemeral=True)
+        if (end_date - start_date).days > MAX_RACE_DAYS:
+            return await interaction.response.send_message(f"Date range must be {MAX_RACE_DAYS} days or less.", ephemeral=True)
+
+        active_race = self.bot.race_jobs.active_job_of(interaction.user.id)
+        if active_race:
+            return await interaction.response.send_message(f"Your race #{active_race.job_id} is still being rendered. "
+                                                           "Use `/log_race_cancel` to cancel it.", ephemeral=True)
 
         await interaction.response.defer()
 
-        logs_data = await self.bot.GET(GET_LOGS_FOR_RACE_QUERY, (start_date.strftime('%Y-%m-%d 00:00:00'), end_date.strftime('%Y-%m-%d 23:59:59'), media_type, media_type))
+        message = f"{'Preview of the bar' if preview else 'Bar'} chart for {from_date} to {to_date}"
+        if media_type and race_type == 'points':
+            message += f" - {media_type}"
+        elif media_type and race_type == 'amount':
+            message += f" - {MEDIA_TYPES[media_type]['log_name']}"
+
+        from_day, to_day = start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+        # Read before the rows, a change in between leaves the video under the older version.
+        data_version = await get_race_data_version(self.bot, from_day, to_day)
+        closed = is_closed_period(end_date, discord.utils.utcnow().replace(tzinfo=None))
+        video_path = self.race_cache.path_for((from_day, to_day, media_type, race_type, preview), data_version, closed,
+                                              race_extension(preview))
+        if self.race_cache.get(video_path):
+            return await self.send_result(interaction, message, video_path)
+
+        # The same race requested while it renders waits for that render instead of queueing another.
+        race = self.bot.race_jobs.job_for(video_path)
+        if race is None:
+            step_days = race_step_days(start_date, end_date, preview)
+            origin = race_origin(start_date)
+            query = GET_RACE_STANDINGS_QUERY.format(value_column=RACE_VALUE_COLUMNS[race_type])
+            rows = await self.bot.GET(query, (origin.strftime('%Y-%m-%d'), step_days, from_day, to_day,
+                                              media_type, media_type, RACE_BAR_COUNT))
+
+            if not rows:
+                return await interaction.followup.send("No logs found for the specified period.", ephemeral=True)
+
+            standings = race_standings(rows, origin, step_days)
+            user_names = await get_usernames(self.bot, standings.user_ids)
+            usernames = []
+            for user_id in standings.user_ids:
+                username = user_names[user_id]
+                # Every user keeps their own bar, even when display names collide.
+                if username in usernames:
+                    username = f"{username} ({user_id})"
+                usernames.append(username)
+
+            plan = plan_race(standings, self.bot.race_jobs.budget, preview)
+            race = RaceJob(interaction.user.id, interaction.guild.id, interaction.channel.id, from_date, to_date, media_type,
+                           race_type, video_path, estimated_seconds=plan.estimated_seconds)
+            try:
+                await self.bot.race_jobs.submit(race, generate_bar_race, standings.values, standings.periods, usernames,
+                                                from_date, to_date, media_type, race_type, plan.steps_per_period, preview)
+            except RaceQueueFullError as error:
+                return await interaction.followup.send(str(error), ephemeral=True)
+
+        shown_status = None
+        while not race.finished:
+            status = self.race_status(race)
+            if status != shown_status:
+                shown_status = status
+                try:
+                    await interaction.edit_original_response(content=status)
+                except discord.HTTPException:
+                    # The interaction expired, the result is posted to the channel instead.
+                    pass
+            await asyncio.wait({race.result}, timeout=PROGRESS_UPDATE_INTERVAL)
 
-        if not logs_data:
-            return await interaction.followup.send("No logs found for the specified period.", ephemeral=True)
+        try:
+            video_path = race.result.result()
+        except RaceJobError as error:
+            return await self.send_result(interaction, f"Race #{race.job_id}: {error}")
+
+        self.race_cache.add(video_path)
+        await self.send_result(interaction, message, video_path)
+
+    def race_progress(self, race: RaceJob) -> str:
+        if race.status == QUEUED:
+            minutes = max(1, round(self.bot.race_jobs.estimated_wait(race) / 60))
+            return f"position {self.bot.race_jobs.position(race)} in the queue, starts in about {minutes} min"
+        if not race.frame_count:
+            return "preparing"
+        return f"{race.frame * 100 // race.frame_count}% ({race.frame}/{race.frame_count} frames)"
+
+    def race_status(self, race: RaceJob) -> str:
+        if race.status == QUEUED:
+            return f"Race #{race.job_id} is waiting to be rendered, {self.race_progress(race)}. Use `/log_race_cancel` to cancel it."
+        return f"Rendering race #{race.job_id}: {self.race_progress(race)}. Use `/log_race_cancel` to cancel it."
+
+    async def send_result(self, interaction: discord.Interaction, content: str, video_path: Optional[str] = None):
+        """Sends the video (uploaded straight from the cache file) or an error in place of the progress message."""
+        if not video_path:
+            try:
+                await interaction.edit_original_response(content=content)
+            except discord.HTTPException:
+                # The interaction token expires after 15 minutes, long queues can outlast it.
+                await interaction.channel.send(f"{interaction.user.mention} {content}")
+            return
+
+        # Opened once for both attempts, so an eviction while the messages are sent does not take the file away.
+        with open(video_path, 'rb') as video:
+            try:
+                await interaction.edit_original_response(content="Done!")
+                await send_video(interaction.followup.send, content, video, race_filename(video_path))
+            except discord.HTTPException:
+                await send_video(interaction.channel.send, f"{interaction.user.mention} {content}", video, race_filename(video_path))
 
-        unique_user_ids = set(log[0] for log in logs_data)
-        user_names = {}
-        for user_id in unique_user_ids:
-            user_names[user_id] = await get_username_db(self.bot, user_id)
+    @discord.app_commands.command(name='log_race_cancel', description='Cancel your queued or running bar chart race.')
+    @discord.app_commands.describe(job_id='Optional: Number of the race to cancel. Admins can cancel the races of other users.')
+    @discord.app_commands.guild_only()
+    async def log_race_cancel(self, interaction: discord.Interaction, job_id: Optional[int] = None):
+        if job_id is None:
+            race = self.bot.race_jobs.active_job_of(interaction.user.id)
+        else:
+            race = self.bot.race_jobs.get(job_id)
 
-        logs_with_names = []
-        for log in logs_data:
-            log_list = list(log)
-            log_list[0] = user_names[log[0]]
-            logs_with_names.append(log_list)
+        if not race:
+            return await interaction.response.send_message("There is no queued or running race to cancel.", ephemeral=True)
 
-        initial_logs = []
-        start_datetime = (start_date - timedelta(days=1)).strftime('%Y-%m-%d 00:00:00')
-        for username in user_names.values():
-            initial_logs.append([
-                username,
-                media_type or 'ALL',
-                0,
-                0,
-                start_datetime
-            ])
+        is_admin = interaction.channel.permissions_for(interaction.user).administrator
+        if race.user_id != interaction.user.id and not is_admin:
+            return await interaction.response.send_message("You can only cancel your own races.", ephemeral=True)
 
-        logs_with_names = initial_logs + logs_with_names
+        if not await self.bot.race_jobs.cancel(race, interaction.user.id):
+            return await interaction.response.send_message(f"Race #{race.job_id} is already finished.", ephemeral=True)
 
-        buffer = await asyncio.to_thread(self.generate_bar_race, logs_with_names, from_date, to_date, media_type, race_type)
+        await interaction.response.send_message(f"Cancelled race #{race.job_id} of <@{race.user_id}>.", ephemeral=True)
 
-        message = f"Bar chart for {from_date} to {to_date}"
-        if media_type and race_type == 'points':
-            message += f" - {media_type}"
-        elif media_type and race_type == 'amount':
-            message += f" - {MEDIA_TYPES[media_type]['log_name']}"
+    @discord.app_commands.command(name='log_race_queue', description='Show the bar chart races that are being rendered.')
+    @discord.app_commands.guild_only()
+    async def log_race_queue(self, interaction: discord.Interaction):
+        races = self.bot.race_jobs.jobs
+        if not races:
+            return await interaction.response.send_message("No races are being rendered right now.", ephemeral=True)
 
-        file = discord.File(buffer, filename="race.mp4")
-        await interaction.followup.send(message, file=file)
+        lines = [f"#{race.job_id} <@{race.user_id}> {race.from_date} to {race.to_date}: {self.race_progress(race)}" for race in races]
+        await interaction.response.send_message("\n".join(lines), ephemeral=True, allowed_mentions=discord.AllowedMentions.none())
 
 
 async def setup(bot):
@@ -3,22 +3,12 @@ import discord
 from discord.ext import commands
 
 from lib.bot import TMWBot
+from lib.database import Session
 from lib.media_types import LOG_CHOICES, MEDIA_TYPES
 
 from lib.immersion_helpers import is_valid_channel
 
-from typing import Optional
-
-CREATE_USER_GOALS_TABLE = """
-    CREATE TABLE IF NOT EXISTS user_goals (
-    goal_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    media_type TEXT NOT NULL,
-    goal_type TEXT NOT NULL CHECK(goal_type IN ('points', 'amount')),
-    goal_value INTEGER NOT NULL,
-    end_date TIMESTAMP NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
-"""
+from typing import Optional, Union
 
 CREATE_GOAL_QUERY = """
     INSERT INTO user_goals (user_id, media_type, goal_type, goal_value, end_date, created_at)
@@ -91,8 +81,8 @@ async def goal_undo_autocomplete(interaction: discord.Interaction, current_input
     return choices[:10]
 
 
-async def check_goal_status(bot: TMWBot, user_id: int, media_type: str):
-    result = await bot.GET(GET_GOAL_STATUS_QUERY, (user_id, media_type, user_id, media_type, user_id, media_type))
+async def check_goal_status(db: Union[TMWBot, Session], user_id: int, media_type: str):
+    result = await db.GET(GET_GOAL_STATUS_QUERY, (user_id, media_type, user_id, media_type, user_id, media_type))
     goal_statuses = []
 
     for goal_id, goal_type, goal_value, end_date, created_at, progress in result:
@@ -130,9 +120,6 @@ class GoalsCog(commands.Cog):
     def __init__(self, bot: TMWBot):
         self.bot = bot
 
-    async def cog_load(self):
-        await self.bot.RUN(CREATE_USER_GOALS_TABLE)
-
     @discord.app_commands.command(name='log_set_goal', description='Set an immersion goal for yourself!')
     @discord.app_commands.describe(
         media_type='The type of media for which you want to set a goal.',
@@ -1,61 +1,43 @@
 from lib.bot import TMWBot
-from lib.anilist_autocomplete import CACHED_ANILIST_RESULTS_CREATE_TABLE_QUERY, CACHED_ANILIST_THUMBNAIL_QUERY, CACHED_ANILIST_TITLE_QUERY, CREATE_ANILIST_FTS5_TABLE_QUERY, CREATE_ANILIST_TRIGGER_DELETE, CREATE_ANILIST_TRIGGER_INSERT, CREATE_ANILIST_TRIGGER_UPDATE
-from lib.vndb_autocomplete import CACHED_VNDB_RESULTS_CREATE_TABLE_QUERY, CACHED_VNDB_THUMBNAIL_QUERY, CACHED_VNDB_TITLE_QUERY, CREATE_VNDB_FTS5_TABLE_QUERY, CREATE_VNDB_TRIGGER_DELETE, CREATE_VNDB_TRIGGER_INSERT, CREATE_VNDB_TRIGGER_UPDATE
-from lib.tmdb_autocomplete import CACHED_TMDB_RESULTS_CREATE_TABLE_QUERY, CACHED_TMDB_THUMBNAIL_QUERY, CACHED_TMDB_TITLE_QUERY, CREATE_TMDB_FTS5_TABLE_QUERY, CREATE_TMDB_TRIGGER_DELETE, CREATE_TMDB_TRIGGER_INSERT, CREATE_TMDB_TRIGGER_UPDATE, CACHED_TMDB_GET_MEDIA_TYPE_QUERY
 from lib.media_types import MEDIA_TYPES, LOG_CHOICES
-from lib.immersion_helpers import is_valid_channel, get_achievement_reached_info, get_current_and_next_achievement
+from lib.recent_logs import RecentLogs
+from lib.media_metadata import MediaMetadataResolver
+from lib.leaderboard import LeaderboardService, ALL_TIME, CLEAR_MONTHLY_STANDINGS_QUERY, REBUILD_MONTHLY_STANDINGS_QUERY
+from lib.log_import import parse_log_import, ImportFormatError, IMPORT_EXTENSIONS
+from lib.log_export import EXPORT_COLUMNS, EXPORT_FORMATS, TextPartWriter, ParquetPartWriter, csv_encoder, ndjson_encoder, parquet_available, stream_export, close_parts
+from lib.immersion_streaks import record_log_day, recompute_streak, streak_for_today
+from lib.user_timezones import SET_USER_TIMEZONE_QUERY, parse_timezone, get_timezone, local_now, to_local, to_utc, user_zone, utc_offset_at
+from lib.immersion_helpers import is_valid_channel, get_achievement_reached_info, get_current_and_next_achievement, immersion_log_settings
 from .immersion_goals import check_goal_status
-from .username_fetcher import get_username_db
+from .username_fetcher import get_usernames
 
+import asyncio
 import discord
-import os
 import random
-import csv
 import humanize
 
 from typing import Optional
-from datetime import timedelta, datetime, timezone
+from datetime import datetime, timezone
+from zoneinfo import available_timezones
 from discord.ext import commands
 from discord.ext import tasks
 
-CREATE_LOGS_TABLE = """
-    CREATE TABLE IF NOT EXISTS logs (
-    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    media_type TEXT NOT NULL,
-    media_name TEXT,
-    comment TEXT,
-    amount_logged INTEGER NOT NULL,
-    points_received REAL NOT NULL,
-    log_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    achievement_group TEXT);
-"""
+TIMEZONE_NAMES = available_timezones()
 
-CREATE_LOG_QUERY = """
-    INSERT INTO logs (user_id, media_type, media_name, comment, amount_logged, points_received, log_date, achievement_group)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?);
-"""
+MAX_IMPORT_FILE_SIZE = 10 * 1024 * 1024
+MAX_IMPORT_ROWS = 50000
 
-GET_CONSECUTIVE_DAYS_QUERY = """
-    SELECT DISTINCT(DATE(log_date)) AS log_date
-    FROM logs
-    WHERE user_id = ?
-    GROUP BY DATE(log_date)
-    ORDER BY log_date DESC;
-"""
-
-GET_POINTS_FOR_CURRENT_MONTH_QUERY = """
-    SELECT SUM(points_received) AS total_points
-    FROM logs
-    WHERE user_id = ? AND strftime('%Y-%m', log_date) = strftime('%Y-%m', 'now');
+# utc_offset_minutes is the offset of the user's timezone at log_date, it puts the log on its local day (log_day).
+CREATE_LOG_QUERY = """
+    INSERT INTO logs (user_id, media_type, media_name, comment, amount_logged, points_received, log_date, achievement_group, utc_offset_minutes)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
 """
 
-GET_USER_LOGS_QUERY = """
-    SELECT log_id, media_type, media_name, amount_logged, log_date
-    FROM logs
-    WHERE user_id = ?
-    ORDER BY log_date DESC;
+# The achievement group total and the current month total of a user, read by /log in the same transaction as its insert.
+GET_POINTS_BEFORE_LOG_QUERY = """
+    SELECT
+        (SELECT IFNULL(SUM(points), 0) FROM user_aggregates WHERE user_id = ? AND achievement_group = ?),
+        (SELECT IFNULL(ROUND(SUM(points), 2), 0) FROM user_aggregates WHERE user_id = ? AND month = strftime('%Y-%m', 'now'));
 """
 
 GET_TO_BE_DELETED_LOG_QUERY = """
@@ -69,10 +51,40 @@ DELETE_LOG_QUERY = """
     WHERE log_id = ? AND user_id = ?;
 """
 
-GET_TOTAL_POINTS_FOR_ACHIEVEMENT_GROUP_QUERY = """
-    SELECT SUM(points_received) AS total_points
+GET_TOTAL_POINTS_PER_ACHIEVEMENT_GROUP_QUERY = """
+    SELECT achievement_group, SUM(points) AS total_points
+    FROM user_aggregates
+    WHERE user_id = ?
+    GROUP BY achievement_group;
+"""
+
+CLEAR_USER_AGGREGATES_QUERY = """
+    DELETE FROM user_aggregates;
+"""
+
+REBUILD_USER_AGGREGATES_QUERY = """
+    INSERT INTO user_aggregates (user_id, achievement_group, month, points, amount, log_count)
+    SELECT user_id, IFNULL(achievement_group, ''), log_month, SUM(points_received), SUM(amount_logged), COUNT(*)
+    FROM logs
+    GROUP BY user_id, IFNULL(achievement_group, ''), log_month;
+"""
+
+CLEAR_DAILY_ROLLUP_QUERY = """
+    DELETE FROM daily_rollup;
+"""
+
+# Days are the local days the logs were written on, like the daily_rollup triggers use.
+REBUILD_DAILY_ROLLUP_QUERY = """
+    INSERT INTO daily_rollup (user_id, day, media_type, amount, points, log_count)
+    SELECT user_id, log_day, media_type, SUM(amount_logged), SUM(points_received), COUNT(*)
+    FROM logs
+    GROUP BY user_id, log_day, media_type;
+"""
+
+GET_USER_LOG_KEYS_QUERY = """
+    SELECT media_type, media_name, amount_logged, log_date
     FROM logs
-    WHERE user_id = ? AND achievement_group = ?;
+    WHERE user_id = ?;
 """
 
 GET_USER_LOGS_FOR_EXPORT_QUERY = """
@@ -82,41 +94,37 @@ GET_USER_LOGS_FOR_EXPORT_QUERY = """
     ORDER BY log_date DESC;
 """
 
-GET_MONTHLY_LEADERBOARD_QUERY = """
-    SELECT user_id, SUM(points_received) AS total_points, SUM(amount_logged)
+GET_ALL_LOGS_FOR_EXPORT_QUERY = """
+    SELECT user_id, log_id, media_type, media_name, comment, amount_logged, points_received, log_date
     FROM logs
-    WHERE (? = 'ALL' OR strftime('%Y-%m', log_date) = ?)
-    AND (? IS NULL OR media_type = ?)
-    GROUP BY user_id
-    ORDER BY total_points DESC
-    LIMIT 20
+    ORDER BY log_id;
 """
 
-GET_USER_MONTHLY_POINTS_QUERY = """
-    SELECT SUM(points_received) AS total_points, SUM(amount_logged)
-    FROM logs
-    WHERE user_id = ? AND (? = 'ALL' OR strftime('%Y-%m', log_date) = ?)
-    AND (? IS NULL OR media_type = ?);
-"""
+def format_log_line(log: tuple) -> str:
+    # log_id, media_type, media_name, comment, amount_logged, points_received, log_date
+    log_date = log[6][:10]
+    media_type = log[1]
+    media_name = log[2] or 'N/A'
+    amount_logged = log[4]
+    unit_name = MEDIA_TYPES[media_type]['unit_name'] + 's' if amount_logged > 1 else MEDIA_TYPES[media_type]['unit_name']
+    comment = log[3] or 'No comment'
+    return f"{log_date}: {media_type} ({media_name}) -> {amount_logged} {unit_name} | {comment}\n"
 
 
 async def log_undo_autocomplete(interaction: discord.Interaction, current_input: str):
     current_input = current_input.strip()
 
-    tmw_bot = interaction.client
-    tmw_bot: TMWBot
+    immersion_log = interaction.client.get_cog("ImmersionLog")
+    user_logs = await immersion_log.recent_logs.search(interaction.user.id, current_input, limit=10)
+    return [discord.app_commands.Choice(name=log_name, value=str(log_id)) for log_id, log_name in user_logs]
 
-    user_logs = await tmw_bot.GET(GET_USER_LOGS_QUERY, (interaction.user.id,))
-    choices = []
 
-    for log_id, media_type, media_name, amount_logged, log_date in user_logs:
-        unit_name = MEDIA_TYPES[media_type]['unit_name']
-        log_date_str = datetime.strptime(log_date, '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d')
-        log_name = f"{media_type}: {media_name or 'N/A'} ({amount_logged} {unit_name}) on {log_date_str}"[:100]
-        if current_input.lower() in log_name.lower():
-            choices.append(discord.app_commands.Choice(name=log_name, value=str(log_id)))
-
-    return choices[:10]
+async def log_timezone_autocomplete(interaction: discord.Interaction, current_input: str):
+    current_input = current_input.strip().lower()
+    if not current_input:
+        return []
+    zones = sorted(zone for zone in TIMEZONE_NAMES if current_input in zone.lower())
+    return [discord.app_commands.Choice(name=zone, value=zone) for zone in zones[:25]]
 
 
 async def log_name_autocomplete(interaction: discord.Interaction, current_input: str):
@@ -135,24 +143,9 @@ async def log_name_autocomplete(interaction: discord.Interaction, current_input:
 class ImmersionLog(commands.Cog):
     def __init__(self, bot: TMWBot):
         self.bot = bot
-
-    async def cog_load(self):
-        await self.bot.RUN(CREATE_LOGS_TABLE)
-        await self.bot.RUN(CACHED_ANILIST_RESULTS_CREATE_TABLE_QUERY)
-        await self.bot.RUN(CREATE_ANILIST_FTS5_TABLE_QUERY)
-        await self.bot.RUN(CREATE_ANILIST_TRIGGER_DELETE)
-        await self.bot.RUN(CREATE_ANILIST_TRIGGER_INSERT)
-        await self.bot.RUN(CREATE_ANILIST_TRIGGER_UPDATE)
-        await self.bot.RUN(CACHED_VNDB_RESULTS_CREATE_TABLE_QUERY)
-        await self.bot.RUN(CREATE_VNDB_FTS5_TABLE_QUERY)
-        await self.bot.RUN(CREATE_VNDB_TRIGGER_DELETE)
-        await self.bot.RUN(CREATE_VNDB_TRIGGER_INSERT)
-        await self.bot.RUN(CREATE_VNDB_TRIGGER_UPDATE)
-        await self.bot.RUN(CACHED_TMDB_RESULTS_CREATE_TABLE_QUERY)
-        await self.bot.RUN(CREATE_TMDB_FTS5_TABLE_QUERY)
-        await self.bot.RUN(CREATE_TMDB_TRIGGER_DELETE)
-        await self.bot.RUN(CREATE_TMDB_TRIGGER_INSERT)
-        await self.bot.RUN(CREATE_TMDB_TRIGGER_UPDATE)
+        self.leaderboards = LeaderboardService(bot)
+        self.recent_logs = RecentLogs(bot)
+        self.media_metadata = MediaMetadataResolver(bot)
 
     @discord.app_commands.command(name='log', description='Log your immersion!')
     @discord.app_commands.describe(
@@ -160,7 +153,7 @@ class ImmersionLog(commands.Cog):
         amount='Amount. For time-based logs, use the number of minutes.',
         name='You can use VNDB ID/Title for VNs, AniList ID/Titlefor Anime/Manga, TMDB titles for Listening or provide free text.',
         comment='Short comment about your log.',
-        backfill_date='The date for the log, in YYYY-MM-DD or YYYY-MM-DD HH:MM format. You can log no more than 7 days into the past.'
+        backfill_date='The date for the log in your timezone, in YYYY-MM-DD or YYYY-MM-DD HH:MM format. You can log no more than 7 days into the past.'
     )
     @discord.app_commands.choices(media_type=LOG_CHOICES)
     @discord.app_commands.autocomplete(name=log_name_autocomplete)
@@ -187,6 +180,8 @@ class ImmersionLog(commands.Cog):
         elif comment:
             comment = comment.strip()
 
+        # Logs are stored in UTC, dates given by the user are in their own timezone.
+        zone = await get_timezone(self.bot, interaction.user.id)
         if backfill_date is None:
             log_date = discord.utils.utcnow().strftime('%Y-%m-%d %H:%M:%S')
         else:
@@ -195,33 +190,43 @@ class ImmersionLog(commands.Cog):
                     log_date = datetime.strptime(backfill_date, '%Y-%m-%d %H:%M')
                 except ValueError:
                     log_date = datetime.strptime(backfill_date, '%Y-%m-%d')
-                today = discord.utils.utcnow().date()
+                today = local_now(zone).date()
                 if log_date.date() > today:
                     return await interaction.response.send_message("You cannot backfill a date in the future.", ephemeral=True)
                 if (today - log_date.date()).days > 7:
                     return await interaction.response.send_message("You cannot log a date more than 7 days in the past.", ephemeral=True)
-                log_date = log_date.strftime('%Y-%m-%d %H:%M:%S')
+                log_date = to_utc(log_date, zone).strftime('%Y-%m-%d %H:%M:%S')
             except ValueError:
                 return await interaction.response.send_message("Invalid date format. Please use YYYY-MM-DD.", ephemeral=True)
 
         await interaction.response.defer()
+        utc_log_date = datetime.strptime(log_date, '%Y-%m-%d %H:%M:%S')
+        local_log_date = to_local(utc_log_date, zone)
 
         points_received = round(amount * MEDIA_TYPES[media_type]['points_multiplier'], 2)
         achievement_group = MEDIA_TYPES[media_type]['Achievement_Group']
-        total_achievement_points_before = await self.get_total_points_for_achievement_group(interaction.user.id, achievement_group)
-
-        current_month_points_before = await self.get_points_for_current_month(interaction.user.id)
-
-        await self.bot.RUN(
-            CREATE_LOG_QUERY,
-            (interaction.user.id, media_type, name, comment, amount,
-             points_received, log_date, MEDIA_TYPES[media_type]['Achievement_Group'])
-        )
-
-        current_month_points_after = await self.get_points_for_current_month(interaction.user.id)
 
+        # Only what has to be consistent with the insert runs under the write lock: the totals it adds to and the streak it extends.
+        async with self.bot.transaction() as tx:
+            total_achievement_points_before, current_month_points_before = await tx.GET_ONE(
+                GET_POINTS_BEFORE_LOG_QUERY, (interaction.user.id, achievement_group, interaction.user.id))
+            await tx.RUN(
+                CREATE_LOG_QUERY,
+                (interaction.user.id, media_type, name, comment, amount, points_received,
+                 log_date, MEDIA_TYPES[media_type]['Achievement_Group'], utc_offset_at(zone, utc_log_date))
+            )
+            streak = await record_log_day(tx, interaction.user.id, local_log_date.date())
+        self.recent_logs.invalidate(interaction.user.id)
+        await self.leaderboards.refresh_user(interaction.user.id, log_date[:7], media_type)
+        consecutive_days, longest_streak = streak_for_today(streak, zone)
         goal_statuses = await check_goal_status(self.bot, interaction.user.id, media_type)
+        media_metadata = await self.media_metadata.resolve(media_type, name)
 
+        # user_aggregates months are UTC months, like log_date.
+        if log_date[:7] == discord.utils.utcnow().strftime('%Y-%m'):
+            current_month_points_after = round(current_month_points_before + points_received, 2)
+        else:
+            current_month_points_after = current_month_points_before
         total_achievement_points_after = total_achievement_points_before + points_received
         achievement_reached, current_achievement, next_achievement = await get_achievement_reached_info(achievement_group, total_achievement_points_before, total_achievement_points_after)
 
@@ -230,11 +235,6 @@ class ImmersionLog(commands.Cog):
         else:
             random_guild_emoji = ""
 
-        consecutive_days = await self.get_consecutive_days_logged(interaction.user.id)
-        actual_title = await self.get_title(media_type, name)
-        thumbnail_url = await self.get_thumbnail_url(media_type, name)
-        source_url = await self.get_source_url(media_type, name)
-
         # This is to diplay how the points received were calculated without directly using the multiplier....
         # could be improved on as this is pretty crazy... could set it for each group at this point.
         # TODO: Probably change this.
@@ -262,12 +262,12 @@ class ImmersionLog(commands.Cog):
         )
 
         log_embed = discord.Embed(title=embed_title, color=discord.Color.random())
-        log_embed.description = f"[{actual_title}]({source_url})" if source_url else actual_title
+        log_embed.description = f"[{media_metadata.title}]({media_metadata.source_url})" if media_metadata.source_url else media_metadata.title
         log_embed.add_field(name="Comment", value=comment or "No comment", inline=False)
         log_embed.add_field(name="Points Received", value=points_received_str)
         log_embed.add_field(name="Total Points/Month",
                             value=f"`{current_month_points_before}` → `{current_month_points_after}`")
-        log_embed.add_field(name="Streak", value=f"{consecutive_days} day{'s' if consecutive_days > 1 else ''}")
+        log_embed.add_field(name="Streak", value=f"{consecutive_days} day{'s' if consecutive_days > 1 else ''} (longest: {longest_streak})")
         if achievement_reached and current_achievement:
             log_embed.add_field(name="Achievement Reached! 🎉", value=current_achievement["title"], inline=False)
         if next_achievement:
@@ -280,9 +280,9 @@ class ImmersionLog(commands.Cog):
                 break
             log_embed.add_field(name=f"Goal {i}", value=goal_status, inline=False)
 
-        if thumbnail_url:
-            log_embed.set_thumbnail(url=thumbnail_url)
-        log_embed.set_footer(text=f"Logged by {interaction.user.display_name} for {log_date.split(' ')[0]}", icon_url=interaction.user.display_avatar.url)
+        if media_metadata.thumbnail_url and not media_metadata.nsfw:
+            log_embed.set_thumbnail(url=media_metadata.thumbnail_url)
+        log_embed.set_footer(text=f"Logged by {interaction.user.display_name} for {local_log_date.strftime('%Y-%m-%d')}", icon_url=interaction.user.display_avatar.url)
 
         logged_message = await interaction.followup.send(embed=log_embed)
 
@@ -294,54 +294,9 @@ class ImmersionLog(commands.Cog):
         if achievement_reached:
             await logged_message.reply(f"🎉 **Achievement Reached!** 🎉\n\n**{current_achievement['title']}**\n\n{current_achievement['description']}")
 
-    async def get_consecutive_days_logged(self, user_id: int) -> int:
-        result = await self.bot.GET(GET_CONSECUTIVE_DAYS_QUERY, (user_id,))
-        if not result:
-            return 0
-
-        consecutive_days = 0
-        today = discord.utils.utcnow().date()
-
-        for row in result:
-            log_date = datetime.strptime(row[0], '%Y-%m-%d').date()
-            if log_date == today - timedelta(days=consecutive_days):
-                consecutive_days += 1
-            else:
-                break
-
-        return consecutive_days
-
-    async def get_points_for_current_month(self, user_id: int) -> float:
-        result = await self.bot.GET(GET_POINTS_FOR_CURRENT_MONTH_QUERY, (user_id,))
-        if result and result[0] and result[0][0]:
-            return round(result[0][0], 2)
-        return 0.0
-
-    async def get_thumbnail_url(self, media_type: str, name: str) -> Optional[str]:
-        if MEDIA_TYPES[media_type]['thumbnail_query']:
-            result = await self.bot.GET(MEDIA_TYPES[media_type]['thumbnail_query'], (name,))
-            if result:
-                return result[0][0]
-        return None
-
-    async def get_title(self, media_type: str, name: str) -> str:
-        if MEDIA_TYPES[media_type]['title_query']:
-            result = await self.bot.GET(MEDIA_TYPES[media_type]['title_query'], (name,))
-            if result:
-                return result[0][0]
-        return name
-
-    async def get_source_url(self, media_type: str, name: str) -> Optional[str]:
-        if not MEDIA_TYPES[media_type]['source_url']:
-            return None
-        exists_in_db = await self.bot.GET(MEDIA_TYPES[media_type]['title_query'], (name,))
-        if not exists_in_db:
-            return None
-        if media_type == "Listening Time":
-            tmdb_media_type = await self.bot.GET(CACHED_TMDB_GET_MEDIA_TYPE_QUERY, (name,))
-            tmdb_media_type = tmdb_media_type[0][0]
-            return MEDIA_TYPES[media_type]['source_url'].format(tmdb_media_type=tmdb_media_type) + name
-        return MEDIA_TYPES[media_type]['source_url'] + name
+    @commands.Cog.listener()
+    async def on_media_metadata_update(self, metadata_query: str, media_id: str):
+        self.media_metadata.invalidate(metadata_query, media_id)
 
     @discord.app_commands.command(name='log_undo', description='Undo a previous immersion log!')
     @discord.app_commands.describe(log_entry='Select the log entry you want to undo.')
@@ -354,27 +309,22 @@ class ImmersionLog(commands.Cog):
             return await interaction.response.send_message("Invalid log entry selected.", ephemeral=True)
 
         log_id = int(log_entry)
-        user_logs = await self.bot.GET(GET_USER_LOGS_QUERY, (interaction.user.id,))
-        log_ids = [log[0] for log in user_logs]
-
-        if log_id not in log_ids:
+        deleted_log_info = await self.bot.GET_ONE(GET_TO_BE_DELETED_LOG_QUERY, (interaction.user.id, log_id))
+        if not deleted_log_info:
             return await interaction.response.send_message("The selected log entry does not exist or does not belong to you.", ephemeral=True)
 
-        deleted_log_info = await self.bot.GET(GET_TO_BE_DELETED_LOG_QUERY, (interaction.user.id, log_id))
-        log_id, media_type, media_name, amount_logged, log_date = deleted_log_info[0]
+        log_id, media_type, media_name, amount_logged, log_date = deleted_log_info
         log_date = datetime.strptime(log_date, '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d')
-        await self.bot.RUN(DELETE_LOG_QUERY, (log_id, interaction.user.id))
+        async with self.bot.transaction() as tx:
+            await tx.RUN(DELETE_LOG_QUERY, (log_id, interaction.user.id))
+            await recompute_streak(tx, interaction.user.id)
+        self.recent_logs.invalidate(interaction.user.id)
+        await self.leaderboards.refresh_user(interaction.user.id, log_date[:7], media_type)
         await interaction.response.send_message(
             f"> {interaction.user.mention} Your log for `{amount_logged} {MEDIA_TYPES[media_type]['unit_name']}` "
             f"of `{media_type}` (`{media_name or 'No Name'}`) on `{log_date}` has been deleted."
         )
 
-    async def get_total_points_for_achievement_group(self, user_id: int, achievement_group: str) -> float:
-        result = await self.bot.GET(GET_TOTAL_POINTS_FOR_ACHIEVEMENT_GROUP_QUERY, (user_id, achievement_group))
-        if result and result[0] and result[0][0] is not None:
-            return result[0][0]
-        return 0.0
-
     @discord.app_commands.command(name='log_achievements', description='Display all your achievements!')
     async def log_achievements(self, interaction: discord.Interaction):
         if not await is_valid_channel(interaction):
@@ -383,8 +333,9 @@ class ImmersionLog(commands.Cog):
         user_id = interaction.user.id
         achievements_list = []
 
+        group_totals = dict(await self.bot.GET(GET_TOTAL_POINTS_PER_ACHIEVEMENT_GROUP_QUERY, (user_id,)))
         for achievement_group in set(settings_group['Achievement_Group'] for settings_group in MEDIA_TYPES.values()):
-            total_points = await self.get_total_points_for_achievement_group(user_id, achievement_group)
+            total_points = group_totals.get(achievement_group, 0)
             if total_points == 0:
                 continue
             achievements_list.append(f"\n**-----{achievement_group.upper()}-----**\n")
@@ -408,39 +359,176 @@ class ImmersionLog(commands.Cog):
                               description=achievements_str, color=discord.Color.gold())
         await interaction.response.send_message(embed=embed)
 
-    @discord.app_commands.command(name='log_export', description='Export immersion logs as a CSV file! Optionally, specify a user ID to export their logs.')
-    @discord.app_commands.describe(user='The user to export logs for (optional)')
-    async def log_export(self, interaction: discord.Interaction, user: Optional[discord.User] = None):
+    @discord.app_commands.command(name='log_timezone', description='Set your timezone for streaks, daily stats and backfilled dates.')
+    @discord.app_commands.describe(timezone='A timezone like Asia/Tokyo or America/New_York, or a UTC offset like UTC+9.')
+    @discord.app_commands.autocomplete(timezone=log_timezone_autocomplete)
+    async def log_timezone(self, interaction: discord.Interaction, timezone: str):
+        try:
+            timezone_name, utc_offset_minutes = parse_timezone(timezone)
+        except ValueError as error:
+            return await interaction.response.send_message(str(error), ephemeral=True)
+
+        # Only new logs use it, older logs stay on the local days they were logged on.
+        await self.bot.RUN(SET_USER_TIMEZONE_QUERY, (interaction.user.id, timezone_name, utc_offset_minutes))
+
+        local_time = local_now(user_zone(timezone_name, utc_offset_minutes)).strftime('%Y-%m-%d %H:%M')
+        await interaction.response.send_message(
+            f"Your timezone is now `{timezone_name}`. Your local time is `{local_time}`. Logs you made before keep their days.", ephemeral=True)
+
+    @discord.app_commands.command(name='_rebuild_log_aggregates', description='Recompute the cached point totals, daily totals and leaderboards from the logs.')
+    @discord.app_commands.default_permissions(administrator=True)
+    async def rebuild_log_aggregates(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        async with self.bot.transaction() as tx:
+            await tx.RUN(CLEAR_USER_AGGREGATES_QUERY)
+            await tx.RUN(REBUILD_USER_AGGREGATES_QUERY)
+            await tx.RUN(CLEAR_MONTHLY_STANDINGS_QUERY)
+            await tx.RUN(REBUILD_MONTHLY_STANDINGS_QUERY)
+            await tx.RUN(CLEAR_DAILY_ROLLUP_QUERY)
+            await tx.RUN(REBUILD_DAILY_ROLLUP_QUERY)
+        await self.leaderboards.invalidate()
+        await interaction.followup.send("Rebuilt the cached point totals, daily totals and leaderboards from the logs.", ephemeral=True)
+
+    @discord.app_commands.command(name='log_import', description='Import immersion logs from a file in the /log_export format!')
+    @discord.app_commands.describe(file='CSV, JSON or NDJSON file (optionally gzipped) with the columns of /log_export. Points are recalculated.')
+    async def log_import(self, interaction: discord.Interaction, file: discord.Attachment):
         if not await is_valid_channel(interaction):
             return await interaction.response.send_message("You can only use this command in DM or in the log channels.", ephemeral=True)
 
-        user_id = user.id if user else interaction.user.id
-        user_logs = await self.bot.GET(GET_USER_LOGS_FOR_EXPORT_QUERY, (user_id,))
+        if not file.filename.lower().endswith(IMPORT_EXTENSIONS):
+            return await interaction.response.send_message("Please attach a `.csv`, `.json` or `.ndjson` file, optionally gzipped.", ephemeral=True)
+        if file.size > MAX_IMPORT_FILE_SIZE:
+            return await interaction.response.send_message(f"The file must be smaller than {MAX_IMPORT_FILE_SIZE // (1024 * 1024)} MB.", ephemeral=True)
+
+        await interaction.response.defer()
 
-        if not user_logs:
-            return await interaction.response.send_message("No logs to export for the specified user.", ephemeral=True)
+        user_id = interaction.user.id
+        data = await file.read()
+        try:
+            rows, errors = await asyncio.to_thread(parse_log_import, data, file.filename, discord.utils.utcnow().replace(tzinfo=None))
+        except ImportFormatError as error:
+            return await interaction.followup.send(f"Could not read the file: {error}", ephemeral=True)
+
+        if len(rows) > MAX_IMPORT_ROWS:
+            return await interaction.followup.send(f"You can import at most {MAX_IMPORT_ROWS} logs at once.", ephemeral=True)
+
+        # Imported dates are UTC like the export, each log is put on its local day in the user's current timezone.
+        zone = await get_timezone(self.bot, user_id)
+        # Skip logs that already exist, so importing the same file twice does not double count.
+        existing_logs = set(await self.bot.GET(GET_USER_LOG_KEYS_QUERY, (user_id,)))
+        new_rows = []
+        duplicate_count = 0
+        for media_type, name, comment, amount, points_received, log_date, achievement_group in rows:
+            log_key = (media_type, name, amount, log_date)
+            if log_key in existing_logs:
+                duplicate_count += 1
+                continue
+            existing_logs.add(log_key)
+            utc_offset_minutes = utc_offset_at(zone, datetime.strptime(log_date, '%Y-%m-%d %H:%M:%S'))
+            new_rows.append((user_id, media_type, name, comment, amount, points_received, log_date, achievement_group, utc_offset_minutes))
+
+        if not new_rows:
+            return await interaction.followup.send(
+                f"Nothing to import. {duplicate_count} duplicate and {len(errors)} invalid rows were skipped.", ephemeral=True)
+
+        async with self.bot.transaction() as tx:
+            group_points_before = dict(await tx.GET(GET_TOTAL_POINTS_PER_ACHIEVEMENT_GROUP_QUERY, (user_id,)))
+            await tx.RUN_MANY(CREATE_LOG_QUERY, new_rows)
+            await recompute_streak(tx, user_id)
+            group_points_after = dict(await tx.GET(GET_TOTAL_POINTS_PER_ACHIEVEMENT_GROUP_QUERY, (user_id,)))
+        self.recent_logs.invalidate(user_id)
+        await self.leaderboards.invalidate()
+
+        reached_achievements = []
+        for achievement_group, points_after in group_points_after.items():
+            if achievement_group not in immersion_log_settings['achievements']:
+                continue
+            achievement_reached, current_achievement, _ = await get_achievement_reached_info(
+                achievement_group, group_points_before.get(achievement_group, 0), points_after)
+            if achievement_reached and current_achievement:
+                reached_achievements.append(f"{current_achievement['title']} ({achievement_group})")
+
+        log_dates = [row[6] for row in new_rows]
+        embed = discord.Embed(title="Immersion Log Import", color=discord.Color.green())
+        embed.add_field(name="Imported", value=f"{len(new_rows)} logs")
+        embed.add_field(name="Points", value=f"{round(sum(row[5] for row in new_rows), 2)}")
+        embed.add_field(name="Timeframe", value=f"{min(log_dates)[:10]} to {max(log_dates)[:10]}")
+        if duplicate_count:
+            embed.add_field(name="Duplicates Skipped", value=str(duplicate_count))
+        if errors:
+            shown_errors = "\n".join(errors[:10])
+            if len(errors) > 10:
+                shown_errors += f"\n... and {len(errors) - 10} more"
+            embed.add_field(name=f"Invalid Rows Skipped ({len(errors)})", value=shown_errors[:1024], inline=False)
+        if reached_achievements:
+            embed.add_field(name="Achievements Reached! 🎉", value="\n".join(reached_achievements)[:1024], inline=False)
+        embed.set_footer(text=f"Imported by {interaction.user.display_name}", icon_url=interaction.user.display_avatar.url)
 
-        csv_filename = f"immersion_logs_{user_id}.csv"
-        csv_filepath = os.path.join("/tmp", csv_filename)
+        await interaction.followup.send(embed=embed)
 
-        with open(csv_filepath, mode='w', newline='', encoding='utf-8') as csv_file:
-            fieldnames = ['Log ID', 'Media Type', 'Media Name', 'Comment', 'Amount Logged', 'Points Received', 'Log Date']
-            writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-            writer.writeheader()
+    def make_export_writer(self, export_format: str, base_name: str, part_size: int, columns: list[str]):
+        if export_format == 'parquet':
+            return ParquetPartWriter(base_name, part_size, columns)
+        if export_format == 'ndjson':
+            return TextPartWriter(base_name, '.ndjson', part_size, ndjson_encoder(columns))
+
+        name_index, comment_index = columns.index('Media Name'), columns.index('Comment')
+
+        def with_placeholders(row):
+            # Same placeholders as the CSV export always had, /log_import understands them.
+            row = list(row)
+            row[name_index] = row[name_index] or 'N/A'
+            row[comment_index] = row[comment_index] or 'No comment'
+            return row
+
+        header, encode_rows = csv_encoder(columns, with_placeholders)
+        return TextPartWriter(base_name, '.csv', part_size, encode_rows, header=header)
+
+    async def send_export_parts(self, interaction: discord.Interaction, parts: list, content: str):
+        """Upload the parts of an export, up to 10 attachments per message."""
+        try:
+            for first_part in range(0, len(parts), 10):
+                files = [discord.File(part.file, filename=part.filename) for part in parts[first_part:first_part + 10]]
+                await interaction.followup.send(content if first_part == 0 else None, files=files)
+        finally:
+            close_parts(parts)
+
+    def upload_limit(self, interaction: discord.Interaction) -> int:
+        return interaction.guild.filesize_limit if interaction.guild else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+
+    @discord.app_commands.command(name='log_export', description='Export immersion logs as a compressed file! Optionally, specify a user ID to export their logs.')
+    @discord.app_commands.describe(user='The user to export logs for (optional)', export_format='File format, CSV by default.')
+    @discord.app_commands.choices(export_format=[discord.app_commands.Choice(name=export_format.upper(), value=export_format) for export_format in EXPORT_FORMATS])
+    async def log_export(self, interaction: discord.Interaction, user: Optional[discord.User] = None, export_format: str = 'csv'):
+        if not await is_valid_channel(interaction):
+            return await interaction.response.send_message("You can only use this command in DM or in the log channels.", ephemeral=True)
+        if export_format == 'parquet' and not parquet_available():
+            return await interaction.response.send_message("Parquet export is not available on this bot.", ephemeral=True)
 
-            for log in user_logs:
-                writer.writerow({
-                    'Log ID': log[0],
-                    'Media Type': log[1],
-                    'Media Name': log[2] or 'N/A',
-                    'Comment': log[3] or 'No comment',
-                    'Amount Logged': log[4],
-                    'Points Received': log[5],
-                    'Log Date': log[6]
-                })
+        await interaction.response.defer()
+        user_id = user.id if user else interaction.user.id
+        writer = self.make_export_writer(export_format, f"immersion_logs_{user_id}", self.upload_limit(interaction), EXPORT_COLUMNS)
+        parts = await stream_export(self.bot, GET_USER_LOGS_FOR_EXPORT_QUERY, (user_id,), writer)
 
-        await interaction.response.send_message("Here are the immersion logs:", file=discord.File(csv_filepath))
-        os.remove(csv_filepath)
+        if not parts:
+            return await interaction.followup.send("No logs to export for the specified user.", ephemeral=True)
+        await self.send_export_parts(interaction, parts, "Here are the immersion logs:")
+
+    @discord.app_commands.command(name='_log_export_all', description='Export the immersion logs of every user as compressed files.')
+    @discord.app_commands.describe(export_format='File format, CSV by default.')
+    @discord.app_commands.choices(export_format=[discord.app_commands.Choice(name=export_format.upper(), value=export_format) for export_format in EXPORT_FORMATS])
+    @discord.app_commands.default_permissions(administrator=True)
+    async def log_export_all(self, interaction: discord.Interaction, export_format: str = 'csv'):
+        if export_format == 'parquet' and not parquet_available():
+            return await interaction.response.send_message("Parquet export is not available on this bot.", ephemeral=True)
+
+        await interaction.response.defer()
+        writer = self.make_export_writer(export_format, "immersion_logs_all", self.upload_limit(interaction), ['User ID'] + EXPORT_COLUMNS)
+        parts = await stream_export(self.bot, GET_ALL_LOGS_FOR_EXPORT_QUERY, (), writer)
+
+        if not parts:
+            return await interaction.followup.send("There are no logs to export.", ephemeral=True)
+        await self.send_export_parts(interaction, parts, f"Here are the immersion logs of all users ({len(parts)} file{'s' if len(parts) > 1 else ''}):")
 
     @discord.app_commands.command(name='logs', description='Output your immersion logs as a text file!')
     @discord.app_commands.describe(user='The user to export logs for (optional)')
@@ -450,28 +538,13 @@ class ImmersionLog(commands.Cog):
 
         await interaction.response.defer()
         user_id = user.id if user else interaction.user.id
-        user_logs = await self.bot.GET(GET_USER_LOGS_FOR_EXPORT_QUERY, (user_id,))
+        writer = TextPartWriter(f"immersion_logs_{user_id}", '.txt', self.upload_limit(interaction),
+                                lambda rows: "".join(format_log_line(row) for row in rows), compress=False)
+        parts = await stream_export(self.bot, GET_USER_LOGS_FOR_EXPORT_QUERY, (user_id,), writer)
 
-        if not user_logs:
+        if not parts:
             return await interaction.followup.send("No logs to export for the specified user.", ephemeral=True)
-
-        log_filename = f"immersion_logs_{user_id}.txt"
-        log_filepath = os.path.join("/tmp", log_filename)
-        # log_id, media_type, media_name, comment, amount_logged, points_received, log_date
-        with open(log_filepath, mode='w', encoding='utf-8') as log_file:
-            for log in user_logs:
-                log_date = datetime.strptime(log[6], '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d')
-                media_type = log[1]
-                media_name = log[2] or 'N/A'
-                amount_logged = log[4]
-                unit_name = MEDIA_TYPES[media_type]['unit_name'] + 's' if amount_logged > 1 else MEDIA_TYPES[media_type]['unit_name']
-                comment = log[3] or 'No comment'
-
-                log_entry = f"{log_date}: {media_type} ({media_name}) -> {amount_logged} {unit_name} | {comment}\n"
-                log_file.write(log_entry)
-
-        await interaction.followup.send("Here are your immersion logs:", file=discord.File(log_filepath))
-        os.remove(log_filepath)
+        await self.send_export_parts(interaction, parts, "Here are your immersion logs:")
 
     @discord.app_commands.command(name='log_leaderboard', description='Display the leaderboard for the current month!')
     @discord.app_commands.describe(media_type='Optionally specify the media type for leaderboard filtering.',
@@ -485,14 +558,15 @@ class ImmersionLog(commands.Cog):
 
         if not month:
             month = discord.utils.utcnow().strftime('%Y-%m')
-        elif month != 'ALL':
+        elif month != ALL_TIME:
             try:
-                datetime.strptime(month, '%Y-%m').strftime('%Y-%m')
+                month = datetime.strptime(month, '%Y-%m').strftime('%Y-%m')
             except ValueError:
                 return await interaction.followup.send("Invalid month format. Please use YYYY-MM.", ephemeral=True)
 
-        leaderboard_data = await self.bot.GET(GET_MONTHLY_LEADERBOARD_QUERY, (month, month, media_type, media_type))
-        user_data = await self.bot.GET(GET_USER_MONTHLY_POINTS_QUERY, (interaction.user.id, month, month, media_type, media_type))
+        board = await self.leaderboards.get_board(month, media_type)
+        leaderboard_data = board.top(20)
+        user_data = board.get(interaction.user.id)
 
         def human_readable_number(value):
             value = int(value)
@@ -505,7 +579,7 @@ class ImmersionLog(commands.Cog):
             return f"{value:.1f}P"
 
         embed = discord.Embed(
-            title=f"Immersion Leaderboard - {(datetime.strptime(month, '%Y-%m').strftime('%B %Y') if month != 'ALL' else 'All Time')}",
+            title=f"Immersion Leaderboard - {(datetime.strptime(month, '%Y-%m').strftime('%B %Y') if month != ALL_TIME else 'All Time')}",
             color=discord.Color.blue()
         )
         if media_type:
@@ -516,8 +590,9 @@ class ImmersionLog(commands.Cog):
         description = ""
 
         if leaderboard_data:
+            user_names = await get_usernames(self.bot, [user_id for user_id, _, _ in leaderboard_data])
             for rank, (user_id, total_points, total_logged) in enumerate(leaderboard_data, start=1):
-                user_name = await get_username_db(self.bot, user_id)
+                user_name = user_names[user_id]
                 total_points_humanized = human_readable_number(total_points)
                 total_logged_humanized = human_readable_number(total_logged)
 
@@ -535,11 +610,11 @@ class ImmersionLog(commands.Cog):
         else:
             description = "No logs available for this month. Start immersing to be on the leaderboard!"
 
-        if not user_in_top_20 and user_data and user_data[0] and user_data[0][0]:
-            user_points = human_readable_number(user_data[0][0])
-            user_logged = human_readable_number(user_data[0][1])
-            user_name = await get_username_db(self.bot, interaction.user.id)
-            description += f"\n**You**: **{user_points} pts**"
+        if not user_in_top_20 and user_data and user_data[0]:
+            user_points = human_readable_number(user_data[0])
+            user_logged = human_readable_number(user_data[1])
+            user_rank = board.rank(interaction.user.id)
+            description += f"\n**You ({humanize.ordinal(user_rank)})**: **{user_points} pts**"
             if unit_name:
                 description += f" | **{user_logged} {unit_name}s**"
         elif not user_in_top_20:
@@ -6,15 +6,6 @@ import discord
 from discord.ext import commands
 from discord.ext import tasks
 
-CREATE_KNEELS_TABLE = """
-CREATE TABLE IF NOT EXISTS kneels (
-guild_id INTEGER NOT NULL,
-message_id INTEGER NOT NULL,
-discord_user_id INTEGER NOT NULL,
-kneel_score INTEGER NOT NULL,
-user_name TEXT,
-PRIMARY KEY (guild_id, message_id));"""
-
 GET_USER_KNEELS_QUERY = """
 SELECT SUM(kneel_score) AS total_kneel_score
 FROM kneels
@@ -73,9 +64,6 @@ class Kneels(commands.Cog):
     def __init__(self, bot: TMWBot):
         self.bot = bot
 
-    async def cog_load(self):
-        await self.bot.RUN(CREATE_KNEELS_TABLE)
-
     async def update_kneel_score(self, payload: discord.RawReactionActionEvent):
         async with FETCH_LOCK:
             await asyncio.sleep(1)
@@ -3,7 +3,6 @@ import discord
 import os
 import yaml
 import time
-import aiosqlite
 from discord.ext import commands, tasks
 
 from lib.bot import TMWBot
@@ -12,14 +11,6 @@ RANKSAVER_SETTINGS_PATH = os.getenv("ALT_RANKSAVER_SETTINGS_PATH") or "config/ra
 with open(RANKSAVER_SETTINGS_PATH, "r", encoding="utf-8") as f:
     ranksaver_settings = yaml.safe_load(f)
 
-CREATE_USER_RANKS_TABLE = """
-CREATE TABLE IF NOT EXISTS user_ranks (
-    guild_id INTEGER NOT NULL,
-    discord_user_id INTEGER NOT NULL,
-    role_ids TEXT NOT NULL,
-    PRIMARY KEY (guild_id, discord_user_id)
-);"""
-
 GET_USER_ROLES_QUERY = """
 SELECT role_ids FROM user_ranks
 WHERE guild_id = ? AND discord_user_id = ?;"""
@@ -34,24 +25,23 @@ class RankSaver(commands.Cog):
         self.bot = bot
 
     async def cog_load(self):
-        await self.bot.RUN(CREATE_USER_RANKS_TABLE)
         self.rank_saver.start()
 
     @tasks.loop(minutes=10.0)
     async def rank_saver(self):
         await asyncio.sleep(10)
         print("RANK SAVER: Saving ranks...")
-        async with aiosqlite.connect(self.bot.path_to_db) as db:
-            for guild in self.bot.guilds:
-                all_members = [member for member in guild.members if not member.bot]
-                all_role_ids_to_ignore = ranksaver_settings['role_ids_to_ignore']
-                for member in all_members:
-                    member_role_ids = [
-                        str(role.id) for role in member.roles if role.is_assignable() and role.id not in all_role_ids_to_ignore
-                    ]
-                    role_ids_str = ','.join(member_role_ids)
-                    await db.execute(SAVE_USER_ROLE_QUERY, (guild.id, member.id, role_ids_str))
-            await db.commit()
+        user_roles = []
+        for guild in self.bot.guilds:
+            all_members = [member for member in guild.members if not member.bot]
+            all_role_ids_to_ignore = ranksaver_settings['role_ids_to_ignore']
+            for member in all_members:
+                member_role_ids = [
+                    str(role.id) for role in member.roles if role.is_assignable() and role.id not in all_role_ids_to_ignore
+                ]
+                role_ids_str = ','.join(member_role_ids)
+                user_roles.append((guild.id, member.id, role_ids_str))
+        await self.bot.RUN_MANY(SAVE_USER_ROLE_QUERY, user_roles)
         print("RANK SAVER: Ranks saved.")
 
     @commands.Cog.listener(name="on_member_join")
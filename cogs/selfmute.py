@@ -13,15 +13,6 @@ SELFMUTE_SETTINGS_PATH = os.getenv("ALT_SELFMUTE_SETTINGS_PATH") or "config/self
 with open(SELFMUTE_SETTINGS_PATH, 'r', encoding="utf-8") as settings_file:
     selfmute_settings = yaml.safe_load(settings_file)
 
-CREATE_ACTIVE_MUTES_TABLE = """
-CREATE TABLE IF NOT EXISTS active_mutes (
-    guild_id INTEGER NOT NULL,
-    user_id INTEGER NOT NULL,
-    mute_role_id INTEGER NOT NULL,
-    roles_to_restore TEXT NOT NULL,
-    end_time INTEGER NOT NULL,
-    PRIMARY KEY (guild_id, user_id));
-"""
 STORE_MUTE_QUERY = """INSERT INTO active_mutes (guild_id, user_id, mute_role_id, roles_to_restore, end_time)
                     VALUES (?,?,?,?,?)
                     ON CONFLICT (guild_id, user_id) DO UPDATE SET
@@ -43,7 +34,6 @@ class Selfmute(commands.Cog):
         self.bot = bot
 
     async def cog_load(self):
-        await self.bot.RUN(CREATE_ACTIVE_MUTES_TABLE)
         self.clear_mutes.start()
 
     async def perform_mute(self, member: discord.Member, mute_role: discord.Role, unmute_time: datetime):
@@ -3,14 +3,6 @@ import discord
 from discord.ext import commands
 import asyncio
 
-CREATE_STICKY_MESSAGES_TABLE = """
-CREATE TABLE IF NOT EXISTS sticky_messages (
-    guild_id INTEGER NOT NULL,
-    channel_id INTEGER NOT NULL,
-    original_message_id INTEGER NOT NULL,
-    stickied_message_id INTEGER,
-    PRIMARY KEY (guild_id, channel_id));"""
-
 GET_STICKY_MESSAGE = """
 SELECT original_message_id, stickied_message_id 
 FROM sticky_messages 
@@ -34,9 +26,6 @@ class StickyMessages(commands.Cog):
     def __init__(self, bot: TMWBot):
         self.bot = bot
 
-    async def cog_load(self):
-        await self.bot.RUN(CREATE_STICKY_MESSAGES_TABLE)
-
     async def _get_message(self, channel_id: int, message_id: int) -> discord.Message:
         channel = self.bot.get_channel(channel_id)
         if not channel:
@@ -1,14 +1,10 @@
 import asyncio
+from collections import deque
+from typing import Iterable
 from lib.bot import TMWBot
 import discord
 from discord.ext import commands
 
-CREATE_USERS_TABLE = """
-CREATE TABLE IF NOT EXISTS users (
-    discord_user_id INTEGER PRIMARY KEY,
-    user_name TEXT
-);"""
-
 UPDATE_USERNAME_QUERY = """
 UPDATE users
 SET user_name = ?
@@ -18,37 +14,90 @@ INSERT_USER_QUERY = """
 INSERT INTO users (discord_user_id, user_name)
 VALUES (?, ?) ON CONFLICT(discord_user_id) DO UPDATE SET user_name = excluded.user_name;"""
 
-FETCH_USER_QUERY = """
-SELECT user_name FROM users WHERE discord_user_id = ?;"""
+FETCH_USERS_QUERY = """
+SELECT discord_user_id, user_name FROM users WHERE discord_user_id IN ({placeholders});"""
 
-FETCH_LOCK = asyncio.Lock()
+# Stays well below SQLite's limit of bound parameters per statement.
+FETCH_USERS_CHUNK_SIZE = 500
 
+UNKNOWN_USER = 'Unknown User'
 
-async def get_username_db(bot: TMWBot, user_id: int) -> str:
-    user = bot.get_user(user_id)
-    if user:
-        await bot.RUN(INSERT_USER_QUERY, (user.id, user.display_name))
-        return user.display_name
-    user_name = await bot.GET_ONE(FETCH_USER_QUERY, (user_id,))
-    if user_name:
-        return user_name[0]
-    async with FETCH_LOCK:
-        await asyncio.sleep(1)
+
+class RateLimiter:
+    """Lets at most `calls` callers through per `period` seconds, shared by everyone using it."""
+
+    def __init__(self, calls: int, period: float):
+        self.calls = calls
+        self.period = period
+        self._started = deque()
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while len(self._started) >= self.calls:
+                delay = self._started[0] + self.period - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._started.popleft()
+            self._started.append(loop.time())
+
+
+# fetch_user is only needed for users the bot shares no guild with anymore.
+FETCH_RATE_LIMITER = RateLimiter(calls=5, period=1.0)
+
+
+async def fetch_username(bot: TMWBot, user_id: int) -> str:
+    """The display name from the API, UNKNOWN_USER for deleted users and failed requests."""
+    await FETCH_RATE_LIMITER.wait()
+    try:
         user = await bot.fetch_user(user_id)
+    except discord.HTTPException:
+        return UNKNOWN_USER
+    return user.display_name
+
+
+async def get_usernames(bot: TMWBot, user_ids: Iterable[int]) -> dict[int, str]:
+    """Display names by user id, from the gateway cache, then the users table, then the API.
+
+    Names that are new or changed are stored with a single executemany.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    stored_names = {}
+    for start in range(0, len(user_ids), FETCH_USERS_CHUNK_SIZE):
+        chunk = user_ids[start:start + FETCH_USERS_CHUNK_SIZE]
+        query = FETCH_USERS_QUERY.format(placeholders=', '.join('?' * len(chunk)))
+        stored_names.update(await bot.GET(query, tuple(chunk)))
+
+    user_names = {}
+    for user_id in user_ids:
+        user = bot.get_user(user_id)
         if user:
-            await bot.RUN(INSERT_USER_QUERY, (user.id, user.display_name))
-            return user.display_name
-        else:
-            return 'Unknown User'
+            user_names[user_id] = user.display_name
+        elif stored_names.get(user_id):
+            # Rows without a name (NULL) are fetched like users that were never stored.
+            user_names[user_id] = stored_names[user_id]
+
+    missing_ids = [user_id for user_id in user_ids if user_id not in user_names]
+    fetched_names = await asyncio.gather(*(fetch_username(bot, user_id) for user_id in missing_ids))
+    user_names.update(zip(missing_ids, fetched_names))
+
+    changed_names = [(user_id, user_name) for user_id, user_name in user_names.items()
+                     if user_name != UNKNOWN_USER and stored_names.get(user_id) != user_name]
+    if changed_names:
+        await bot.RUN_MANY(INSERT_USER_QUERY, changed_names)
+    return user_names
+
+
+async def get_username_db(bot: TMWBot, user_id: int) -> str:
+    user_names = await get_usernames(bot, [user_id])
+    return user_names[user_id]
 
 
 class UsernameFetcher(commands.Cog):
     def __init__(self, bot: TMWBot):
         self.bot = bot
 
-    async def cog_load(self):
-        await self.bot.RUN(CREATE_USERS_TABLE)
-
 
 async def setup(bot):
     await bot.add_cog(UsernameFetcher(bot))
@@ -37,56 +37,6 @@ query ($id: Int) {
   }
 }"""
 
-CACHED_ANILIST_RESULTS_CREATE_TABLE_QUERY = """
-CREATE TABLE IF NOT EXISTS cached_anilist_results (
-    primary_key INTEGER PRIMARY KEY AUTOINCREMENT,
-    anilist_id INTEGER UNIQUE,
-    title_english TEXT,
-    title_native TEXT,
-    cover_image_url TEXT,
-    media_type TEXT NOT NULL,
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-);
-"""
-
-CREATE_ANILIST_FTS5_TABLE_QUERY = """
-CREATE VIRTUAL TABLE IF NOT EXISTS anilist_fts USING fts5(
-    anilist_id UNINDEXED,
-    title_english,
-    title_native,
-    cover_image_url UNINDEXED,
-    media_type UNINDEXED,
-    content='cached_anilist_results',
-    tokenize = 'porter'
-);
-"""
-
-CREATE_ANILIST_TRIGGER_INSERT = """
-CREATE TRIGGER IF NOT EXISTS anilist_fts_insert AFTER INSERT ON cached_anilist_results
-BEGIN
-  INSERT INTO anilist_fts(rowid, anilist_id, title_english, title_native, media_type)
-  VALUES (new.rowid, new.anilist_id, new.title_english, new.title_native, new.media_type);
-END;
-"""
-
-CREATE_ANILIST_TRIGGER_UPDATE = """
-CREATE TRIGGER IF NOT EXISTS anilist_fts_update AFTER UPDATE ON cached_anilist_results
-BEGIN
-  UPDATE anilist_fts SET 
-    title_english = new.title_english,
-    title_native = new.title_native,
-    media_type = new.media_type
-  WHERE rowid = old.rowid;
-END;
-"""
-
-CREATE_ANILIST_TRIGGER_DELETE = """
-CREATE TRIGGER IF NOT EXISTS anilist_fts_delete AFTER DELETE ON cached_anilist_results
-BEGIN
-  DELETE FROM anilist_fts WHERE rowid = old.rowid;
-END;
-"""
-
 CACHED_ANILIST_RESULTS_INSERT_QUERY = """
 INSERT INTO cached_anilist_results (anilist_id, title_english, title_native, cover_image_url, media_type) 
 VALUES (?, ?, ?, ?, ?)
@@ -111,14 +61,9 @@ SELECT anilist_id, title_english, title_native, cover_image_url FROM cached_anil
 WHERE anilist_id = ? AND media_type = ?;
 """
 
-CACHED_ANILIST_THUMBNAIL_QUERY = """
-SELECT cover_image_url FROM cached_anilist_results
-WHERE anilist_id = ?;
-"""
-
-CACHED_ANILIST_TITLE_QUERY = """
-SELECT COALESCE(title_english, title_native) AS title 
-FROM cached_anilist_results 
+CACHED_ANILIST_METADATA_QUERY = """
+SELECT COALESCE(title_english, title_native) AS title, cover_image_url, 0 AS nsfw, NULL AS tmdb_media_type
+FROM cached_anilist_results
 WHERE anilist_id = ?;
 """
 
@@ -163,6 +108,7 @@ async def query_anilist(interaction: discord.Interaction, current_input: str, bo
                         choices.append(discord.app_commands.Choice(name=choice_name, value=str(media_id)))
 
                     await bot.RUN(CACHED_ANILIST_RESULTS_INSERT_QUERY, (media_id, title_english, title_native, cover_image_url, media_type))
+                    bot.dispatch("media_metadata_update", CACHED_ANILIST_METADATA_QUERY, str(media_id))
 
                 return choices[:10]
             elif response.status == 429:
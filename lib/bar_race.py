@@ -0,0 +1,101 @@
+"""Bar chart race rendering for /log_race, run in the race worker processes of lib.race_jobs."""
+import pandas as pd
+import bar_chart_race as bcr
+import warnings
+import matplotlib.font_manager as fm
+import matplotlib.pyplot as plt
+
+from contextlib import contextmanager
+from matplotlib.animation import Animation
+
+from lib.media_types import MEDIA_TYPES
+from lib.race_data import RACE_BAR_COUNT
+
+# Previews need no ffmpeg and are small enough to post anywhere.
+PREVIEW_OPTIONS = {'writer': 'pillow', 'dpi': 72, 'figsize': (5, 3)}
+
+
+def race_extension(preview: bool) -> str:
+    return 'gif' if preview else 'mp4'
+
+
+def set_fonts():
+    font_list = []
+    japanese_fonts = ['Noto Sans CJK JP', 'Noto Sans JP', 'Yu Gothic', 'MS Gothic', 'Hiragino Sans']
+    emoji_fonts = ['Noto Emoji']
+
+    for font_name in japanese_fonts:
+        try:
+            font_path = fm.findfont(fm.FontProperties(family=font_name), fallback_to_default=False, rebuild_if_missing=True)
+            if font_path:
+                font_list.append(font_name)
+                break
+        except:
+            continue
+
+    for font_name in emoji_fonts:
+        try:
+            font_path = fm.findfont(fm.FontProperties(family=font_name), fallback_to_default=False, rebuild_if_missing=True)
+            if font_path:
+                font_list.append(font_name)
+                break
+        except:
+            continue
+
+    font_list.append('sans-serif')
+    plt.rcParams['font.family'] = font_list
+
+
+def generate_bar_race(values, periods, usernames, start_date, end_date, media_type=None, race_type='points', steps_per_period=20,
+                      preview=False, filename='race.mp4', progress_callback=None):
+    """Renders the race into filename. progress_callback(rendered_frames, frame_count) is called after every frame.
+
+    values holds the cumulative totals with one row per period (the dates in periods) and one column per user.
+    A preview is a small GIF written with Pillow, filename should end in race_extension(True).
+    """
+    # Runs in a fresh worker process, which starts with matplotlib's default fonts.
+    set_fonts()
+    pivot_df = pd.DataFrame(values, index=pd.DatetimeIndex(periods), columns=usernames)
+
+    # Generate chart title
+    title = f"{'Points' if race_type == 'points' else 'Amount'} Race"
+    if media_type and race_type == 'points':
+        title += f" - {media_type}"
+    elif media_type and race_type == 'amount':
+        title += f" - {MEDIA_TYPES[media_type]['log_name']}"
+    title += f"\n{start_date.split()[0]} to {end_date.split()[0]}"
+
+    # Generate the bar chart race animation
+    with warnings.catch_warnings(), report_frames(progress_callback):
+        warnings.simplefilter("ignore")
+        bcr.bar_chart_race(
+            df=pivot_df,
+            filename=filename,
+            title=title,
+            n_bars=RACE_BAR_COUNT,
+            filter_column_colors=True,
+            period_length=500,
+            steps_per_period=steps_per_period,
+            period_fmt='%b %#d, %Y',
+            **(PREVIEW_OPTIONS if preview else {}))
+
+
+@contextmanager
+def report_frames(progress_callback=None):
+    """Passes progress_callback to the Animation.save call inside bar_chart_race, which offers no option for it."""
+    if progress_callback is None:
+        yield
+        return
+
+    save = Animation.save
+
+    def save_with_progress(self, *args, **kwargs):
+        # Matplotlib passes the index of the frame it is about to write.
+        kwargs.setdefault('progress_callback', lambda frame, frame_count: progress_callback(frame + 1, frame_count))
+        return save(self, *args, **kwargs)
+
+    Animation.save = save_with_progress
+    try:
+        yield
+    finally:
+        Animation.save = save
@@ -1,31 +1,52 @@
 import os
 import discord
-import aiosqlite
 import logging
 import sys
 import traceback
 from discord.ext import commands
 
+from lib.database import Database
+from lib.chart_renderer import ChartRenderer
+from lib.migrations import run_migrations
+from lib.race_jobs import RaceJobQueue
+
 _log = logging.getLogger(__name__)
 
 
 class TMWBot(commands.Bot):
-    def __init__(self, command_prefix, cog_folder="cogs", path_to_db="data/db.sqlite3"):
+    def __init__(self, command_prefix, cog_folder="cogs", path_to_db="data/db.sqlite3", cogs_to_load="*", group_commit=False,
+                 chart_workers=2, race_workers=1, race_timeout=600, race_budget=180):
 
         super().__init__(command_prefix=command_prefix, intents=discord.Intents.all())
         self.cog_folder = cog_folder
         self.path_to_db = path_to_db
+        self.cogs_to_load = cogs_to_load
 
         db_directory = os.path.dirname(self.path_to_db)
         if not os.path.exists(db_directory):
             os.makedirs(db_directory)
 
+        self.db = Database(self.path_to_db, group_commit=group_commit)
+        self.chart_renderer = ChartRenderer(max_workers=chart_workers)
+        self.race_jobs = RaceJobQueue(self.db, max_workers=race_workers, timeout=race_timeout, budget=race_budget)
+
     async def on_ready(self):
         print(f"Logged in as {self.user}")
         await self.create_debug_dm()
 
     async def setup_hook(self):
         self.tree.on_error = self.on_application_command_error
+        await self.db.open()
+        await run_migrations(self.db)
+        self.chart_renderer.start()
+        await self.race_jobs.start()
+        await self.load_cogs(self.cogs_to_load)
+
+    async def close(self):
+        await super().close()
+        await self.chart_renderer.close()
+        await self.race_jobs.close()
+        await self.db.close()
 
     async def load_cogs(self, cogs_to_load):
 
@@ -51,21 +72,25 @@ class TMWBot(commands.Bot):
         await self.debug_dm.send("Bot is ready.")
 
     async def RUN(self, query: str, params: tuple = ()):
-        async with aiosqlite.connect(self.path_to_db) as db:
-            await db.execute(query, params)
-            await db.commit()
+        await self.db.execute(query, params)
+
+    async def RUN_MANY(self, query: str, params_seq):
+        await self.db.executemany(query, params_seq)
 
     async def GET(self, query: str, params: tuple = ()):
-        async with aiosqlite.connect(self.path_to_db) as db:
-            async with db.execute(query, params) as cursor:
-                rows = await cursor.fetchall()
-                return rows
+        return await self.db.fetchall(query, params)
 
     async def GET_ONE(self, query: str, params: tuple = ()):
-        async with aiosqlite.connect(self.path_to_db) as db:
-            async with db.execute(query, params) as cursor:
-                row = await cursor.fetchone()
-                return row
+        return await self.db.fetchone(query, params)
+
+    def GET_CHUNKS(self, query: str, params: tuple = (), chunk_size: int = 1000):
+        return self.db.fetch_chunks(query, params, chunk_size)
+
+    def transaction(self):
+        return self.db.transaction()
+
+    def session(self):
+        return self.db.session()
 
     async def on_application_command_error(self, interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
         if isinstance(error, discord.app_commands.MissingAnyRole):
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+_log = logging.getLogger(__name__)
+
+# Imported by the fork server once, every worker forked from it starts with matplotlib and seaborn loaded.
+PRELOADED_MODULES = ['lib.immersion_charts']
+
+
+class ChartRenderError(Exception):
+    pass
+
+
+class RendererBusyError(ChartRenderError):
+    pass
+
+
+class RenderTimeoutError(ChartRenderError):
+    pass
+
+
+def _init_worker():
+    from lib.immersion_charts import set_plot_styles
+    set_plot_styles()
+
+
+def _warm_up():
+    return None
+
+
+class ChartRenderer:
+    """Renders charts in a bounded pool of worker processes, away from the event loop and its GIL.
+
+    Jobs are module level functions that take plain data and return PNG bytes. At most
+    max_workers + max_queue jobs are accepted at once, further jobs raise RendererBusyError.
+    A job running longer than timeout seconds raises RenderTimeoutError and the pool is replaced,
+    since a running worker can only be stopped by terminating it.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 8, timeout: float = 60.0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._context = multiprocessing.get_context('forkserver')
+        self._context.set_forkserver_preload(PRELOADED_MODULES)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+    def start(self):
+        if self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context,
+                                             initializer=_init_worker)
+        # Start every worker now instead of on the first /log_stats.
+        for _ in range(self.max_workers):
+            self._executor.submit(_warm_up)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def render(self, job: Callable[..., bytes], *args) -> bytes:
+        if self._pending >= self.max_workers + self.max_queue:
+            raise RendererBusyError("Too many charts are being rendered right now, please try again in a moment.")
+        self.start()
+
+        executor = self._executor
+        self._pending += 1
+        try:
+            future = asyncio.get_running_loop().run_in_executor(executor, job, *args)
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            _log.warning("Rendering %s took longer than %s seconds, restarting the render pool.", job.__name__, self.timeout)
+            self._restart(executor)
+            raise RenderTimeoutError("Rendering the chart took too long.")
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise ChartRenderError("The chart renderer crashed, please try again.")
+        finally:
+            self._pending -= 1
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        if self._executor is not executor:
+            return
+        self._executor = None
+        self._terminate(executor)
+        self.start()
+
+    @staticmethod
+    def _terminate(executor: ProcessPoolExecutor):
+        # ProcessPoolExecutor has no public way to stop busy workers, only its private process map has them.
+        # None once the pool is broken, its workers are gone then.
+        if not hasattr(executor, '_processes'):
+            _log.warning("Cannot terminate the workers of the old render pool, busy ones exit when their job finishes.")
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    async def close(self):
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
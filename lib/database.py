@@ -0,0 +1,304 @@
+import asyncio
+import contextlib
+import contextvars
+import logging
+import aiosqlite
+
+from typing import AsyncIterator, Iterable, Optional
+
+_log = logging.getLogger(__name__)
+
+# The Session of the transaction the current task is running, see Database.transaction.
+_current_transaction: contextvars.ContextVar[Optional['Session']] = contextvars.ContextVar('current_transaction', default=None)
+
+
+class TransactionReentryError(RuntimeError):
+    pass
+
+
+class Session:
+    """Runs statements on one connection inside one transaction.
+
+    Mirrors the RUN/GET/GET_ONE interface of TMWBot, so helpers that take the bot
+    can be handed a session instead.
+    """
+
+    def __init__(self, connection: aiosqlite.Connection):
+        self.connection = connection
+
+    async def RUN(self, query: str, params: tuple = ()):
+        await self.connection.execute(query, params)
+
+    async def RUN_MANY(self, query: str, params_seq: Iterable[tuple]):
+        await self.connection.executemany(query, params_seq)
+
+    async def GET(self, query: str, params: tuple = ()) -> list:
+        async with self.connection.execute(query, params) as cursor:
+            return await cursor.fetchall()
+
+    async def GET_ONE(self, query: str, params: tuple = ()):
+        async with self.connection.execute(query, params) as cursor:
+            return await cursor.fetchone()
+
+
+class Database:
+    """Long-lived SQLite connections shared by the whole bot.
+
+    All writes go through one dedicated writer connection, reads are spread over a
+    small pool of read-only connections. The database runs in WAL mode, so readers
+    see the last committed state without ever blocking the writer.
+
+    With group_commit enabled, single-statement writes are queued to a writer task
+    which runs everything arriving within commit_window seconds in one transaction
+    with one commit. Each statement runs in its own savepoint, so a failing statement
+    only fails its own caller.
+    """
+
+    def __init__(self, path_to_db: str, reader_count: int = 4, group_commit: bool = False,
+                 commit_window: float = 0.005, max_batch_size: int = 500):
+        self.path_to_db = path_to_db
+        self.reader_count = reader_count
+        self.group_commit = group_commit
+        self.commit_window = commit_window
+        self.max_batch_size = max_batch_size
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: list[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+        self._transaction: Optional[Session] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def open(self):
+        async with self._open_lock:
+            if self.is_open:
+                return
+
+            # isolation_level=None: every statement autocommits unless a transaction is opened explicitly.
+            writer = await aiosqlite.connect(self.path_to_db, isolation_level=None)
+            await writer.execute("PRAGMA journal_mode = WAL;")
+            await writer.execute("PRAGMA busy_timeout = 5000;")
+
+            self._idle_readers = asyncio.Queue()
+            for _ in range(self.reader_count):
+                reader = await aiosqlite.connect(self.path_to_db, isolation_level=None)
+                await reader.execute("PRAGMA query_only = ON;")
+                await reader.execute("PRAGMA busy_timeout = 5000;")
+                self._readers.append(reader)
+                self._idle_readers.put_nowait(reader)
+
+            self._writer = writer
+            if self.group_commit:
+                self._write_queue = asyncio.Queue()
+                self._writer_task = asyncio.create_task(self._group_commit_writer())
+            _log.info("Opened database %s with %d reader connections (group commit: %s).",
+                      self.path_to_db, self.reader_count, self.group_commit)
+
+    async def close(self):
+        async with self._open_lock:
+            if not self.is_open:
+                return
+            if self._writer_task:
+                await self._write_queue.join()
+                self._writer_task.cancel()
+                self._writer_task = None
+                self._write_queue = None
+            async with self._write_lock:
+                # Refresh planner statistics for tables whose queries would benefit from it.
+                await self._writer.execute("PRAGMA optimize;")
+                for reader in self._readers:
+                    await reader.close()
+                await self._writer.close()
+            self._readers = []
+            self._idle_readers = None
+            self._writer = None
+
+    async def _acquire_reader(self) -> aiosqlite.Connection:
+        if not self.is_open:
+            await self.open()
+        return await self._idle_readers.get()
+
+    def _release_reader(self, reader: aiosqlite.Connection):
+        self._idle_readers.put_nowait(reader)
+
+    def _check_not_in_transaction(self):
+        """Writes outside the Session of a transaction would wait for its write lock forever, so they fail instead."""
+        # Tasks started inside the block inherit the variable, they only fail while the transaction is still open.
+        session = _current_transaction.get()
+        if session is not None and session is self._transaction:
+            raise TransactionReentryError("Writes inside a transaction must go through its session, not through the bot.")
+
+    async def execute(self, query: str, params: tuple = ()):
+        self._check_not_in_transaction()
+        if not self.is_open:
+            await self.open()
+        if self._write_queue is not None:
+            future = asyncio.get_running_loop().create_future()
+            self._write_queue.put_nowait((query, params, future))
+            return await future
+        async with self._write_lock:
+            await self._writer.execute(query, params)
+
+    async def executescript(self, script: str):
+        """Run a multi-statement SQL script on the writer connection.
+
+        The script is responsible for its own transaction control.
+        """
+        self._check_not_in_transaction()
+        if not self.is_open:
+            await self.open()
+        async with self._write_lock:
+            try:
+                await self._writer.executescript(script)
+            except BaseException:
+                if self._writer.in_transaction:
+                    await self._writer.execute("ROLLBACK;")
+                raise
+
+    async def checkpoint(self):
+        """Fold the WAL back into the main database file."""
+        self._check_not_in_transaction()
+        if not self.is_open:
+            await self.open()
+        async with self._write_lock:
+            await self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+
+    async def _group_commit_writer(self):
+        while True:
+            batch = [await self._write_queue.get()]
+            # Give concurrent writers a moment to pile up behind the first statement.
+            await asyncio.sleep(self.commit_window)
+            while len(batch) < self.max_batch_size and not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+
+            try:
+                async with self._write_lock:
+                    await self._commit_batch(batch)
+            except Exception as error:
+                _log.exception("Group commit of %d statements failed.", len(batch))
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+
+    async def _commit_batch(self, batch: list):
+        errors = []
+        await self._writer.execute("BEGIN;")
+        try:
+            for query, params, future in batch:
+                if future.done():
+                    # The caller went away before its statement ran.
+                    errors.append(None)
+                    continue
+                await self._writer.execute("SAVEPOINT queued_write;")
+                try:
+                    await self._writer.execute(query, params)
+                    errors.append(None)
+                except Exception as error:
+                    await self._writer.execute("ROLLBACK TO queued_write;")
+                    errors.append(error)
+                await self._writer.execute("RELEASE queued_write;")
+            await self._writer.execute("COMMIT;")
+        except BaseException:
+            if self._writer.in_transaction:
+                await self._writer.execute("ROLLBACK;")
+            raise
+
+        for (_, _, future), error in zip(batch, errors):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self) -> AsyncIterator[Session]:
+        """Run a batch of reads and writes on the writer connection as one unit of work.
+
+        The transaction is committed when the block exits and rolled back if it raises.
+        Other writes wait until it is done. Writes through the bot inside the block would
+        wait for the block itself, they raise TransactionReentryError instead.
+        """
+        self._check_not_in_transaction()
+        if not self.is_open:
+            await self.open()
+        async with self._write_lock:
+            await self._writer.execute("BEGIN IMMEDIATE;")
+            session = Session(self._writer)
+            self._transaction = session
+            token = _current_transaction.set(session)
+            try:
+                yield session
+            except BaseException:
+                await self._writer.execute("ROLLBACK;")
+                raise
+            finally:
+                _current_transaction.reset(token)
+                self._transaction = None
+            await self._writer.execute("COMMIT;")
+
+    @contextlib.asynccontextmanager
+    async def session(self) -> AsyncIterator[Session]:
+        """Run a batch of reads on one reader connection against a single consistent snapshot."""
+        reader = await self._acquire_reader()
+        try:
+            await reader.execute("BEGIN;")
+            try:
+                yield Session(reader)
+            finally:
+                await reader.execute("ROLLBACK;")
+        finally:
+            self._release_reader(reader)
+
+    async def executemany(self, query: str, params_seq: Iterable[tuple]):
+        self._check_not_in_transaction()
+        if not self.is_open:
+            await self.open()
+        async with self._write_lock:
+            await self._writer.execute("BEGIN;")
+            try:
+                await self._writer.executemany(query, params_seq)
+            except BaseException:
+                await self._writer.execute("ROLLBACK;")
+                raise
+            await self._writer.execute("COMMIT;")
+
+    async def fetchall(self, query: str, params: tuple = ()) -> list:
+        reader = await self._acquire_reader()
+        try:
+            async with reader.execute(query, params) as cursor:
+                return await cursor.fetchall()
+        finally:
+            self._release_reader(reader)
+
+    async def fetch_chunks(self, query: str, params: tuple = (), chunk_size: int = 1000) -> AsyncIterator[list]:
+        """Yield the result rows in lists of up to chunk_size rows, holding one reader for the whole scan.
+
+        Use with contextlib.aclosing if the caller may stop early, so the reader is handed back right away.
+        """
+        reader = await self._acquire_reader()
+        try:
+            async with reader.execute(query, params) as cursor:
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+        finally:
+            self._release_reader(reader)
+
+    async def fetchone(self, query: str, params: tuple = ()):
+        reader = await self._acquire_reader()
+        try:
+            async with reader.execute(query, params) as cursor:
+                return await cursor.fetchone()
+        finally:
+            self._release_reader(reader)
@@ -0,0 +1,151 @@
+"""Data preparation for the /log_stats charts with NumPy.
+
+Daily rollup rows are turned into column arrays once, every chart then bins them by integer
+day, week and media type indices with np.bincount instead of building pandas pivot tables.
+"""
+import numpy as np
+
+from datetime import datetime
+from typing import NamedTuple
+
+# 1970-01-01 was a Thursday, datetime64[D] values count days from it.
+EPOCH_WEEKDAY = 3
+
+
+class LogArrays(NamedTuple):
+    media_types: np.ndarray
+    amounts: np.ndarray
+    points: np.ndarray
+    days: np.ndarray
+
+
+class BarSeries(NamedTuple):
+    media_types: list[str]
+    values: np.ndarray
+    date_labels: list[str]
+    x_lab: str
+
+
+def log_arrays(rows: list) -> LogArrays:
+    """Daily rollup rows (media_type, amount, points, day) as column arrays."""
+    if not rows:
+        return LogArrays(np.array([], dtype=object), np.array([], dtype=np.int64),
+                         np.array([], dtype=np.float64), np.array([], dtype='datetime64[D]'))
+    media_types, amounts, points, days = zip(*rows)
+    return LogArrays(np.array(media_types, dtype=object), np.array(amounts, dtype=np.int64),
+                     np.array(points, dtype=np.float64), np.array(days, dtype='datetime64[D]'))
+
+
+def between(arrays: LogArrays, from_date: datetime, to_date: datetime) -> LogArrays:
+    """Rows whose day lies within from_date and to_date, both inclusive."""
+    mask = (arrays.days >= np.datetime64(from_date.date(), 'D')) & (arrays.days <= np.datetime64(to_date.date(), 'D'))
+    return LogArrays(*(column[mask] for column in arrays))
+
+
+def weekdays(days: np.ndarray) -> np.ndarray:
+    """Monday is 0, like datetime.weekday()."""
+    return (days.astype(np.int64) + EPOCH_WEEKDAY) % 7
+
+
+def breakdown_totals(arrays: LogArrays) -> list[tuple[str, int, float]]:
+    """Total amount and points per media type, sorted by media type."""
+    media_types, media_index = np.unique(arrays.media_types.astype(str), return_inverse=True)
+    amounts = np.bincount(media_index, weights=arrays.amounts, minlength=len(media_types))
+    points = np.bincount(media_index, weights=arrays.points, minlength=len(media_types))
+    return [(media_type, int(amount), float(points_sum)) for media_type, amount, points_sum in zip(media_types, amounts, points)]
+
+
+def heatmap_grids(arrays: LogArrays) -> dict[int, np.ndarray]:
+    """Points per weekday (rows) and week of the year (columns) for every year from the first to the last logged one.
+
+    Cells of days outside the year are NaN, days without logs are 0.
+    """
+    if len(arrays.days) == 0:
+        return {}
+    years = arrays.days.astype('datetime64[Y]')
+    first_year, last_year = int(years.min().astype(np.int64)) + 1970, int(years.max().astype(np.int64)) + 1970
+
+    grids = {}
+    for year in range(first_year, last_year + 1):
+        year_start = np.datetime64(f"{year}-01-01", 'D')
+        days_in_year = int((np.datetime64(f"{year + 1}-01-01", 'D') - year_start).astype(np.int64))
+        year_begins_on = int(weekdays(np.array([year_start]))[0])
+        week_count = (days_in_year - 1 + year_begins_on) // 7 + 1
+
+        # Flat index weekday * week_count + week of every day of the year marks the cells that exist.
+        day_of_year = np.arange(days_in_year)
+        cells = ((day_of_year + year_begins_on) % 7) * week_count + (day_of_year + year_begins_on) // 7
+        grid = np.full(7 * week_count, np.nan)
+        grid[cells] = 0.0
+
+        in_year = (arrays.days >= year_start) & (arrays.days < year_start + days_in_year)
+        logged_days = (arrays.days[in_year] - year_start).astype(np.int64)
+        logged_cells = ((logged_days + year_begins_on) % 7) * week_count + (logged_days + year_begins_on) // 7
+        grid[cells] += np.bincount(logged_cells, weights=arrays.points[in_year], minlength=7 * week_count)[cells]
+        grids[year] = grid.reshape(7, week_count)
+    return grids
+
+
+def bar_series(arrays: LogArrays, from_date: datetime, to_date: datetime, immersion_type: str = None) -> BarSeries:
+    """Values per media type (rows) and period (columns) from the first logged day in the range up to to_date.
+
+    Points are used, or amounts when immersion_type is given. Long ranges are binned into
+    weeks, months or quarters, the same way pandas resample('W'/'ME'/'QE') does.
+    """
+    arrays = between(arrays, from_date, to_date)
+    first_day = arrays.days.min()
+    last_day = np.datetime64(to_date.date(), 'D')
+    day_count = int((last_day - first_day).astype(np.int64)) + 1
+
+    if day_count > 365 * 2:
+        period_ends = quarter_ends
+        x_lab = " (year-quarter)"
+    elif day_count > 30 * 7:
+        period_ends = month_ends
+        x_lab = " (year-month)"
+    elif day_count > 31:
+        period_ends = week_ends
+        x_lab = " (year-week)"
+    else:
+        period_ends = None
+        x_lab = ""
+
+    if period_ends:
+        # Every period touched by the range, including the empty ones.
+        periods = np.unique(period_ends(np.arange(first_day, last_day + 1)))
+        period_index = np.searchsorted(periods, period_ends(arrays.days))
+    else:
+        periods = np.arange(first_day, last_day + 1)
+        period_index = (arrays.days - first_day).astype(np.int64)
+
+    media_types, media_index = np.unique(arrays.media_types.astype(str), return_inverse=True)
+    values = arrays.amounts if immersion_type else arrays.points
+    grid = np.bincount(media_index * len(periods) + period_index, weights=values,
+                       minlength=len(media_types) * len(periods)).reshape(len(media_types), len(periods))
+
+    return BarSeries(list(media_types), grid, period_labels(periods, x_lab), x_lab)
+
+
+def week_ends(days: np.ndarray) -> np.ndarray:
+    """The Sunday ending the week of every day."""
+    return days + (6 - weekdays(days))
+
+
+def month_ends(days: np.ndarray) -> np.ndarray:
+    return (days.astype('datetime64[M]') + 1).astype('datetime64[D]') - 1
+
+
+def quarter_ends(days: np.ndarray) -> np.ndarray:
+    months = days.astype('datetime64[M]').astype(np.int64)
+    return ((months // 3 * 3 + 3).astype('datetime64[M]')).astype('datetime64[D]') - 1
+
+
+def period_labels(periods: np.ndarray, x_lab: str) -> list[str]:
+    dates = periods.astype(datetime)
+    if x_lab == " (year-quarter)":
+        return [f"{date.year}-Q{(date.month - 1) // 3 + 1}" for date in dates]
+    if x_lab == " (year-month)":
+        return [date.strftime("%Y-%m") for date in dates]
+    if x_lab == " (year-week)":
+        return [date.strftime("%Y-%W") for date in dates]
+    return [date.strftime("%Y-%m-%d") for date in dates]
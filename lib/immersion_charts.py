@@ -0,0 +1,173 @@
+"""Chart rendering for /log_stats. Runs inside the worker processes of lib.chart_renderer.
+
+The generate_* functions take plain daily_rollup rows and return encoded image bytes, so they can be sent to and from a worker.
+Figures are created with the object oriented API and never registered with pyplot, so nothing outlives a call.
+"""
+import io
+import numpy as np
+import seaborn as sns
+import matplotlib
+from matplotlib import colormaps
+from matplotlib import patches
+from matplotlib.artist import setp
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import matplotlib.colors as mcolors
+from datetime import datetime
+from PIL import Image, features
+
+from lib.media_types import MEDIA_TYPES
+from lib.immersion_chart_data import log_arrays, bar_series, heatmap_grids
+
+# Resolution and encoding of the rendered charts. standard matches matplotlib's defaults,
+# compact is meant for mobile clients. Lossless WebP beats lossy WebP and PNG on flat chart colours,
+# without WebP support in Pillow it falls back to a 256 colour PNG.
+IMAGE_PROFILES = {
+    'compact': {'dpi': 72, 'format': 'webp' if features.check('webp') else 'png8'},
+    'standard': {'dpi': 100, 'format': 'png'},
+    'high': {'dpi': 150, 'format': 'png'},
+}
+
+DEFAULT_IMAGE_PROFILE = 'standard'
+
+
+def modify_cmap(cmap_name, zero_color="black", nan_color="black", truncate_high=0.7):
+    """
+    Modify a colormap to have specific colors for 0 and NaN values, and truncate the upper range.
+    """
+    base_cmap = colormaps[cmap_name]
+    truncated_cmap = base_cmap(np.linspace(0, truncate_high, base_cmap.N))
+    modified_cmap = mcolors.ListedColormap(truncated_cmap)
+    modified_cmap.colors[0] = mcolors.to_rgba(zero_color)
+
+    # Set NaN color
+    modified_cmap.set_bad(color=nan_color)
+
+    return modified_cmap
+
+
+def set_plot_styles():
+    matplotlib.rcParams.update({
+        'axes.titlesize': 20,
+        'axes.titleweight': 'bold',
+        'axes.labelsize': 14,
+        'axes.labelweight': 'bold',
+        'xtick.labelsize': 12,
+        'ytick.labelsize': 12,
+        'axes.facecolor': '#2c2c2d',
+        'figure.facecolor': '#2c2c2d',
+        'text.color': 'white',
+        'axes.labelcolor': 'white',
+        'xtick.color': 'white',
+        'ytick.color': 'white'
+    })
+
+
+def new_figure(figsize: tuple) -> Figure:
+    """A figure drawn by its own Agg canvas, outside of pyplot's figure manager."""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    fig.patch.set_facecolor('#2c2c2d')
+    return fig
+
+
+def image_extension(profile: str) -> str:
+    return 'webp' if IMAGE_PROFILES[profile]['format'] == 'webp' else 'png'
+
+
+def figure_to_image(fig: Figure, profile: str) -> bytes:
+    settings = IMAGE_PROFILES[profile]
+    buffer = io.BytesIO()
+    try:
+        if settings['format'] == 'webp':
+            fig.savefig(buffer, format='webp', dpi=settings['dpi'], facecolor=fig.get_facecolor(), bbox_inches='tight',
+                        pil_kwargs={'lossless': True, 'method': 6})
+        else:
+            fig.savefig(buffer, format='png', dpi=settings['dpi'], facecolor=fig.get_facecolor(), bbox_inches='tight')
+    finally:
+        # Break the references between the figure, its axes and artists right away.
+        fig.clear()
+
+    if settings['format'] == 'png8':
+        buffer.seek(0)
+        with Image.open(buffer) as image:
+            quantized = image.convert('RGB').quantize(colors=256)
+        buffer = io.BytesIO()
+        quantized.save(buffer, format='png', optimize=True)
+    return buffer.getvalue()
+
+
+# Function to generate the bar chart
+def generate_bar_chart(rows: list, from_date: datetime, to_date: datetime, immersion_type: str = None,
+                       profile: str = DEFAULT_IMAGE_PROFILE) -> bytes:
+    series = bar_series(log_arrays(rows), from_date, to_date, immersion_type)
+
+    fig = new_figure(figsize=(16, 12))
+    ax = fig.subplots()
+    positions = np.arange(len(series.date_labels))
+    bottom = np.zeros(len(positions))
+    for media_type, values in zip(series.media_types, series.values):
+        ax.bar(positions, values, width=0.5, bottom=bottom, label=media_type, color=MEDIA_TYPES[media_type].get('color', 'gray'))
+        bottom += values
+    ax.legend(title='media_type')
+    ax.set_xlim(-0.5, len(positions) - 0.5)
+    ax.set_xticks(positions)
+    ax.set_title('Points Over Time' if not immersion_type else f"{MEDIA_TYPES[immersion_type]['log_name']} Over Time")
+    ax.set_ylabel('Points' if not immersion_type else MEDIA_TYPES[immersion_type]['unit_name'] + 's')
+    ax.set_xlabel('Date' + series.x_lab)
+    ax.set_xticklabels(series.date_labels, rotation=45, ha='right')
+    ax.grid(color='#8b8c8c', axis='y')
+    # remove splines
+    for spline in ax.spines.values():
+        if spline.spine_type != 'bottom':
+            spline.set_visible(False)
+
+    return figure_to_image(fig, profile)
+
+
+# Function to generate the heatmap
+def generate_heatmap(rows: list, from_date: datetime, to_date: datetime, immersion_type, current_date=None,
+                     profile: str = DEFAULT_IMAGE_PROFILE) -> bytes:
+    heatmap_data = heatmap_grids(log_arrays(rows))
+    cmap = modify_cmap('Blues_r', zero_color="#222222", nan_color="#2c2c2d")
+
+    num_years = len(heatmap_data)
+    fig_height = num_years * 3
+    fig = new_figure(figsize=(18, fig_height))
+    axes = fig.subplots(nrows=num_years, ncols=1, squeeze=False)[:, 0]
+
+    current_date = current_date or datetime.now().date()
+    for ax, (year, data) in zip(axes, heatmap_data.items()):
+        sns.heatmap(
+            data,
+            cmap=cmap,
+            linewidths=1.5,
+            linecolor="#2c2c2d",
+            cbar=False,
+            square=True,
+            ax=ax
+        )
+        # ax.set_title(f"Heatmap - {year}")
+        ax.set_title(f"{MEDIA_TYPES[immersion_type]['Achievement_Group']} Heatmap - {year}" if immersion_type else f"Immersion Heatmap - {year}")
+        ax.axis("off")
+        # add a colorbar for the heatmap
+        cbar = fig.colorbar(ax.collections[0], ax=ax, orientation='horizontal', fraction=0.1, pad=0.02, aspect=50)
+        cbar.ax.yaxis.set_tick_params(color='white')
+        cbar.outline.set_edgecolor('#222222')
+        setp(cbar.ax.get_yticklabels(), color='white')
+        # Highlight the current day with a dark border
+        if current_date.year == year:
+            current_week = current_date.isocalendar().week - 1
+            current_day = current_date.weekday()
+            rect = patches.Rectangle(
+                (current_week, current_day),
+                1, 1,
+                linewidth=2,
+                edgecolor='black',
+                facecolor='none'
+            )
+            ax.add_patch(rect)
+
+    fig.tight_layout(pad=2.0)
+
+    return figure_to_image(fig, profile)
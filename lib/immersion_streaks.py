@@ -0,0 +1,103 @@
+from datetime import date, tzinfo
+from typing import Optional, Union
+
+from lib.bot import TMWBot
+from lib.database import Session
+from lib.user_timezones import local_now, user_zone
+
+GET_USER_STREAK_QUERY = """
+    SELECT last_log_day, current_streak, longest_streak
+    FROM user_streaks
+    WHERE user_id = ?;
+"""
+
+GET_USER_STREAK_WITH_TIMEZONE_QUERY = """
+    SELECT s.last_log_day, s.current_streak, s.longest_streak, IFNULL(t.timezone, 'UTC'), IFNULL(t.utc_offset_minutes, 0)
+    FROM user_streaks s
+    LEFT JOIN user_timezones t ON t.user_id = s.user_id
+    WHERE s.user_id = ?;
+"""
+
+# Days are local days of the user. Only applied for days on or after the last logged day, older days need a recompute.
+EXTEND_USER_STREAK_QUERY = """
+    INSERT INTO user_streaks (user_id, last_log_day, current_streak, longest_streak)
+    VALUES (?, ?, 1, 1)
+    ON CONFLICT (user_id) DO UPDATE SET
+        current_streak = CASE
+            WHEN excluded.last_log_day = last_log_day THEN current_streak
+            WHEN excluded.last_log_day = DATE(last_log_day, '+1 day') THEN current_streak + 1
+            ELSE 1 END,
+        longest_streak = MAX(longest_streak, CASE
+            WHEN excluded.last_log_day = last_log_day THEN current_streak
+            WHEN excluded.last_log_day = DATE(last_log_day, '+1 day') THEN current_streak + 1
+            ELSE 1 END),
+        last_log_day = excluded.last_log_day
+    RETURNING last_log_day, current_streak, longest_streak;
+"""
+
+DELETE_USER_STREAK_QUERY = """
+    DELETE FROM user_streaks
+    WHERE user_id = ?;
+"""
+
+RECOMPUTE_USER_STREAK_QUERY = """
+    WITH days AS (
+        SELECT DISTINCT log_day AS day
+        FROM logs
+        WHERE user_id = ?),
+    islands AS (
+        SELECT day, julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island
+        FROM days),
+    runs AS (
+        SELECT MAX(day) AS last_day, COUNT(*) AS length
+        FROM islands
+        GROUP BY island),
+    ranked AS (
+        SELECT last_day, length,
+            ROW_NUMBER() OVER (ORDER BY last_day DESC) AS recency,
+            MAX(length) OVER () AS longest
+        FROM runs)
+    INSERT INTO user_streaks (user_id, last_log_day, current_streak, longest_streak)
+    SELECT ?, last_day, length, longest
+    FROM ranked
+    WHERE recency = 1
+    RETURNING last_log_day, current_streak, longest_streak;
+"""
+
+
+async def record_log_day(db: Session, user_id: int, log_day: date) -> tuple[str, int, int]:
+    """Update the streak of a user after a log on log_day, in their local time, was added.
+
+    Returns the updated (last_log_day, current_streak, longest_streak), see streak_for_today. Runs in a
+    transaction, as the row is read back from the write.
+    """
+    log_day_str = log_day.strftime('%Y-%m-%d')
+    streak = await db.GET_ONE(GET_USER_STREAK_QUERY, (user_id,))
+    if streak and log_day_str < streak[0]:
+        return await recompute_streak(db, user_id)
+    return await db.GET_ONE(EXTEND_USER_STREAK_QUERY, (user_id, log_day_str))
+
+
+async def recompute_streak(db: Session, user_id: int) -> Optional[tuple[str, int, int]]:
+    """Rebuild the streak of a user from their logs, e.g. after a log was removed. None if they have no logs left."""
+    await db.RUN(DELETE_USER_STREAK_QUERY, (user_id,))
+    return await db.GET_ONE(RECOMPUTE_USER_STREAK_QUERY, (user_id, user_id))
+
+
+def streak_for_today(streak: tuple[str, int, int], zone: tzinfo) -> tuple[int, int]:
+    """The current and longest streak of a (last_log_day, current_streak, longest_streak) row.
+
+    The current streak only counts if the user has logged today, in their timezone.
+    """
+    last_log_day, current_streak, longest_streak = streak
+    if last_log_day != local_now(zone).strftime('%Y-%m-%d'):
+        current_streak = 0
+    return current_streak, longest_streak
+
+
+async def get_streak(db: Union[TMWBot, Session], user_id: int) -> tuple[int, int]:
+    """Returns the current and longest streak of a user, see streak_for_today."""
+    streak = await db.GET_ONE(GET_USER_STREAK_WITH_TIMEZONE_QUERY, (user_id,))
+    if not streak:
+        return 0, 0
+    return streak_for_today(streak[:3], user_zone(*streak[3:]))
@@ -0,0 +1,158 @@
+import asyncio
+import discord
+
+from collections import OrderedDict
+from itertools import islice
+from typing import Optional
+
+from sortedcontainers import SortedList
+
+from lib.bot import TMWBot
+
+ALL_TIME = 'ALL'
+
+GET_STANDINGS_QUERY_SELECT = """
+    SELECT user_id, SUM(points), SUM(amount)
+    FROM monthly_standings"""
+
+GET_STANDINGS_QUERY_GROUP = """
+    GROUP BY user_id;"""
+
+CLEAR_MONTHLY_STANDINGS_QUERY = """
+    DELETE FROM monthly_standings;
+"""
+
+REBUILD_MONTHLY_STANDINGS_QUERY = """
+    INSERT INTO monthly_standings (month, media_type, user_id, points, amount, log_count)
+    SELECT log_month, media_type, user_id, SUM(points_received), SUM(amount_logged), COUNT(*)
+    FROM logs
+    GROUP BY log_month, media_type, user_id;
+"""
+
+
+def build_standings_query(month: str, media_type: Optional[str], user_id: Optional[int] = None) -> tuple[str, tuple]:
+    filters = []
+    params = ()
+    if month != ALL_TIME:
+        filters.append("month = ?")
+        params += (month,)
+    if media_type:
+        filters.append("media_type = ?")
+        params += (media_type,)
+    if user_id is not None:
+        filters.append("user_id = ?")
+        params += (user_id,)
+
+    query = GET_STANDINGS_QUERY_SELECT
+    if filters:
+        query += "\n    WHERE " + " AND ".join(filters)
+    return query + GET_STANDINGS_QUERY_GROUP, params
+
+
+class Standings:
+    """Users of one leaderboard, kept ranked by points."""
+
+    def __init__(self, rows: list[tuple[int, float, int]]):
+        self._totals: dict[int, tuple[float, int]] = {}
+        self._ranking = SortedList()
+        for user_id, points, amount in rows:
+            self.set(user_id, points, amount)
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    def set(self, user_id: int, points: Optional[float], amount: Optional[int]):
+        """Replace the totals of a user. Passing None for points removes the user."""
+        previous = self._totals.pop(user_id, None)
+        if previous is not None:
+            self._ranking.remove((-previous[0], user_id))
+        if points is None:
+            return
+        self._totals[user_id] = (points, amount)
+        self._ranking.add((-points, user_id))
+
+    def get(self, user_id: int) -> Optional[tuple[float, int]]:
+        return self._totals.get(user_id)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        totals = self._totals.get(user_id)
+        if totals is None:
+            return None
+        return self._ranking.index((-totals[0], user_id)) + 1
+
+    def top(self, count: int) -> list[tuple[int, float, int]]:
+        return [(user_id, -negative_points, self._totals[user_id][1])
+                for negative_points, user_id in islice(self._ranking, count)]
+
+
+class LeaderboardService:
+    """In-memory leaderboards per (month, media type), loaded from monthly_standings.
+
+    Boards of the current month and the all-time boards are updated in place after every change to the logs.
+    Boards of months that have ended are immutable snapshots, a change to such a month drops them to be
+    loaded again on the next request. Only the max_closed_boards most recently used snapshots are kept.
+    """
+
+    def __init__(self, bot: TMWBot, max_closed_boards: int = 48):
+        self.bot = bot
+        self.max_closed_boards = max_closed_boards
+        self._live_boards: dict[tuple[str, Optional[str]], Standings] = {}
+        self._closed_boards: OrderedDict[tuple[str, Optional[str]], Standings] = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def current_month() -> str:
+        return discord.utils.utcnow().strftime('%Y-%m')
+
+    def _is_closed(self, month: str) -> bool:
+        return month != ALL_TIME and month < self.current_month()
+
+    async def _load(self, month: str, media_type: Optional[str]) -> Standings:
+        query, params = build_standings_query(month, media_type)
+        return Standings(await self.bot.GET(query, params))
+
+    async def get_board(self, month: str, media_type: Optional[str] = None) -> Standings:
+        key = (month, media_type)
+        async with self._lock:
+            if key in self._closed_boards:
+                self._closed_boards.move_to_end(key)
+                return self._closed_boards[key]
+            if key in self._live_boards and not self._is_closed(month):
+                return self._live_boards[key]
+
+            board = await self._load(month, media_type)
+            if self._is_closed(month):
+                # The month ended while its board was live, it is a snapshot from now on.
+                self._live_boards.pop(key, None)
+                self._closed_boards[key] = board
+                while len(self._closed_boards) > self.max_closed_boards:
+                    self._closed_boards.popitem(last=False)
+            else:
+                self._live_boards[key] = board
+            return board
+
+    async def refresh_user(self, user_id: int, month: str, media_type: str):
+        """Bring every loaded board a log of this user, month and media type counts towards up to date.
+
+        Reads the committed totals of the user instead of applying a delta, so calling it twice is harmless.
+        """
+        async with self._lock:
+            for key in [(month, media_type), (month, None), (ALL_TIME, media_type), (ALL_TIME, None)]:
+                if key in self._closed_boards:
+                    del self._closed_boards[key]
+                    continue
+                board = self._live_boards.get(key)
+                if board is None:
+                    continue
+                if self._is_closed(key[0]):
+                    del self._live_boards[key]
+                    continue
+                query, params = build_standings_query(key[0], key[1], user_id)
+                totals = await self.bot.GET_ONE(query, params)
+                board.set(user_id, *(totals[1:] if totals else (None, None)))
+
+    async def invalidate(self):
+        """Drop every loaded board, e.g. after logs were changed in bulk."""
+        async with self._lock:
+            self._live_boards.clear()
+            self._closed_boards.clear()
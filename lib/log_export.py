@@ -0,0 +1,190 @@
+import asyncio
+import contextlib
+import csv
+import gzip
+import io
+import json
+import tempfile
+
+from typing import Callable, Optional
+
+from lib.bot import TMWBot
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Parts stay in memory up to this size and spill to an anonymous temporary file beyond it.
+SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+# Room left in every part for the gzip trailer and the multipart upload overhead.
+PART_SIZE_MARGIN = 64 * 1024
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = ['csv', 'ndjson', 'parquet']
+
+EXPORT_COLUMNS = ['Log ID', 'Media Type', 'Media Name', 'Comment', 'Amount Logged', 'Points Received', 'Log Date']
+
+
+def parquet_available() -> bool:
+    return pyarrow is not None
+
+
+def parquet_column_type(column: str):
+    if column in ('User ID', 'Log ID', 'Amount Logged'):
+        return pyarrow.int64()
+    if column == 'Points Received':
+        return pyarrow.float64()
+    return pyarrow.string()
+
+
+class ExportPart:
+    def __init__(self, filename: str, file):
+        self.filename = filename
+        self.file = file
+
+
+class TextPartWriter:
+    """Writes encoded rows into gzip (or plain) parts no larger than part_size bytes each.
+
+    Every part is a complete file on its own, with the header repeated at its start.
+    """
+
+    def __init__(self, base_name: str, extension: str, part_size: int, encode_rows: Callable[[list], str],
+                 header: str = "", compress: bool = True):
+        self.base_name = base_name
+        self.extension = extension + (".gz" if compress else "")
+        self.part_size = part_size - PART_SIZE_MARGIN
+        self.encode_rows = encode_rows
+        self.header = header.encode('utf-8')
+        self.compress = compress
+        self.parts: list[ExportPart] = []
+        self._raw = None
+        self._out = None
+        self._written = 0
+
+    def _open_part(self):
+        self._raw = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        if self.compress:
+            self._out = gzip.GzipFile(fileobj=self._raw, mode='wb')
+        else:
+            self._out = self._raw
+        self._written = 0
+        if self.header:
+            self._write(self.header)
+
+    def _write(self, data: bytes):
+        self._out.write(data)
+        self._written += len(data)
+
+    def _part_size(self) -> int:
+        # Uncompressed bytes are an upper bound for what the compressed part grows by.
+        if self.compress:
+            self._out.flush()
+        return self._raw.tell()
+
+    def _close_part(self):
+        if self.compress:
+            self._out.close()
+        self._raw.seek(0)
+        self.parts.append(ExportPart(f"{self.base_name}{self.extension}", self._raw))
+        self._raw = None
+        self._out = None
+
+    def write_rows(self, rows: list):
+        data = self.encode_rows(rows).encode('utf-8')
+        if self._raw is None:
+            self._open_part()
+        elif self._written > len(self.header) and self._part_size() + len(data) > self.part_size:
+            self._close_part()
+            self._open_part()
+        self._write(data)
+
+    def finish(self) -> list[ExportPart]:
+        if self._raw is not None:
+            self._close_part()
+        return name_parts(self.parts)
+
+
+class ParquetPartWriter:
+    """Writes rows into Parquet parts no larger than part_size bytes each, one row group per chunk."""
+
+    def __init__(self, base_name: str, part_size: int, columns: list[str]):
+        self.base_name = base_name
+        self.part_size = part_size - PART_SIZE_MARGIN
+        self.columns = columns
+        self.schema = pyarrow.schema([(column, parquet_column_type(column)) for column in columns])
+        self.parts: list[ExportPart] = []
+        self._raw = None
+        self._writer = None
+
+    def _open_part(self):
+        self._raw = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self._writer = pyarrow.parquet.ParquetWriter(self._raw, self.schema, compression='zstd')
+
+    def _close_part(self):
+        self._writer.close()
+        self._raw.seek(0)
+        self.parts.append(ExportPart(f"{self.base_name}.parquet", self._raw))
+        self._raw = None
+        self._writer = None
+
+    def write_rows(self, rows: list):
+        table = pyarrow.Table.from_pylist([dict(zip(self.columns, row)) for row in rows], schema=self.schema)
+        if self._raw is None:
+            self._open_part()
+        elif self._raw.tell() > 0 and self._raw.tell() + table.nbytes > self.part_size:
+            self._close_part()
+            self._open_part()
+        self._writer.write_table(table)
+
+    def finish(self) -> list[ExportPart]:
+        if self._raw is not None:
+            self._close_part()
+        return name_parts(self.parts)
+
+
+def name_parts(parts: list[ExportPart]) -> list[ExportPart]:
+    """Number the parts if there is more than one: logs.part1.csv.gz, logs.part2.csv.gz, ..."""
+    if len(parts) > 1:
+        for number, part in enumerate(parts, start=1):
+            stem, _, extension = part.filename.partition('.')
+            part.filename = f"{stem}.part{number}.{extension}"
+    return parts
+
+
+def csv_encoder(columns: list[str], convert_row: Optional[Callable] = None) -> tuple[str, Callable[[list], str]]:
+    header = io.StringIO()
+    csv.writer(header).writerow(columns)
+
+    def encode_rows(rows: list) -> str:
+        buffer = io.StringIO()
+        if convert_row:
+            rows = [convert_row(row) for row in rows]
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    return header.getvalue(), encode_rows
+
+
+def ndjson_encoder(columns: list[str]) -> Callable[[list], str]:
+    def encode_rows(rows: list) -> str:
+        return "".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows)
+
+    return encode_rows
+
+
+async def stream_export(bot: TMWBot, query: str, params: tuple, writer) -> list[ExportPart]:
+    """Feed the rows of query chunk by chunk to writer, encoding each chunk in a worker thread."""
+    async with contextlib.aclosing(bot.GET_CHUNKS(query, params, EXPORT_CHUNK_SIZE)) as chunks:
+        async for rows in chunks:
+            await asyncio.to_thread(writer.write_rows, rows)
+    return await asyncio.to_thread(writer.finish)
+
+
+def close_parts(parts: list[ExportPart]):
+    for part in parts:
+        part.file.close()
@@ -0,0 +1,127 @@
+import csv
+import gzip
+import io
+import json
+
+from datetime import datetime
+
+from lib.media_types import MEDIA_TYPES
+from lib.log_export import EXPORT_COLUMNS
+
+IMPORT_COLUMNS = EXPORT_COLUMNS
+
+EXPORT_PLACEHOLDERS = {'Media Name': 'N/A', 'Comment': 'No comment'}
+
+MAX_NAME_LENGTH = 150
+MAX_COMMENT_LENGTH = 200
+
+MAX_DECOMPRESSED_SIZE = 100 * 1024 * 1024
+
+IMPORT_EXTENSIONS = ('.csv', '.json', '.ndjson', '.csv.gz', '.json.gz', '.ndjson.gz')
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def read_import_records(data: bytes, filename: str) -> list[dict]:
+    """Decode a CSV, JSON or NDJSON attachment, optionally gzipped, into one dict per row keyed by the export column names."""
+    filename = filename.lower()
+    if filename.endswith('.gz'):
+        filename = filename[:-len('.gz')]
+        try:
+            with gzip.GzipFile(fileobj=io.BytesIO(data)) as gzip_file:
+                data = gzip_file.read(MAX_DECOMPRESSED_SIZE + 1)
+        except (OSError, EOFError):
+            raise ImportFormatError("The file is not a valid gzip file.")
+        if len(data) > MAX_DECOMPRESSED_SIZE:
+            raise ImportFormatError("The decompressed file is too large.")
+
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ImportFormatError("The file must be UTF-8 encoded.")
+
+    if filename.endswith('.ndjson'):
+        try:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        except json.JSONDecodeError as error:
+            raise ImportFormatError(f"Invalid NDJSON: {error}")
+        if not all(isinstance(record, dict) for record in records):
+            raise ImportFormatError("Every NDJSON line must be a log object.")
+        return records
+
+    if filename.endswith('.json'):
+        try:
+            records = json.loads(text)
+        except json.JSONDecodeError as error:
+            raise ImportFormatError(f"Invalid JSON: {error}")
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise ImportFormatError("The JSON file must contain a list of log objects.")
+        return records
+
+    reader = csv.DictReader(io.StringIO(text))
+    missing_columns = [column for column in IMPORT_COLUMNS if column not in (reader.fieldnames or [])
+                       and column not in ('Log ID', 'Points Received')]
+    if missing_columns:
+        raise ImportFormatError(f"Missing columns: {', '.join(missing_columns)}")
+    return list(reader)
+
+
+def parse_log_date(value: str) -> datetime:
+    for date_format in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"invalid date `{value}`")
+
+
+def validate_import_record(record: dict, now: datetime) -> tuple:
+    """Turn one record into the values of a logs row. Points are recomputed, the exported ones are ignored."""
+    media_type = str(record.get('Media Type') or '').strip()
+    if media_type not in MEDIA_TYPES:
+        raise ValueError(f"unknown media type `{media_type}`")
+
+    # Spreadsheets export whole numbers as e.g. `5.0`, /log itself only takes whole amounts.
+    try:
+        amount = float(str(record.get('Amount Logged')).strip())
+    except ValueError:
+        amount = None
+    if amount is None or not amount.is_integer():
+        raise ValueError(f"invalid amount `{record.get('Amount Logged')}`")
+    amount = int(amount)
+    if amount < 0 or amount > MEDIA_TYPES[media_type]['max_logged']:
+        raise ValueError(f"amount must be between 0 and {MEDIA_TYPES[media_type]['max_logged']} for `{media_type}`")
+
+    name = str(record.get('Media Name') or '').strip()
+    if not name or name == EXPORT_PLACEHOLDERS['Media Name']:
+        name = None
+    elif len(name) > MAX_NAME_LENGTH:
+        raise ValueError(f"name longer than {MAX_NAME_LENGTH} characters")
+
+    comment = str(record.get('Comment') or '').strip()
+    if not comment or comment == EXPORT_PLACEHOLDERS['Comment']:
+        comment = None
+    elif len(comment) > MAX_COMMENT_LENGTH:
+        raise ValueError(f"comment longer than {MAX_COMMENT_LENGTH} characters")
+
+    log_date = parse_log_date(str(record.get('Log Date') or '').strip())
+    if log_date > now:
+        raise ValueError("date is in the future")
+
+    points_received = round(amount * MEDIA_TYPES[media_type]['points_multiplier'], 2)
+    return (media_type, name, comment, amount, points_received,
+            log_date.strftime('%Y-%m-%d %H:%M:%S'), MEDIA_TYPES[media_type]['Achievement_Group'])
+
+
+def parse_log_import(data: bytes, filename: str, now: datetime) -> tuple[list[tuple], list[str]]:
+    """Returns the valid logs rows of an import file and an error message per rejected row."""
+    rows = []
+    errors = []
+    for line_number, record in enumerate(read_import_records(data, filename), start=1):
+        try:
+            rows.append(validate_import_record(record, now))
+        except ValueError as error:
+            errors.append(f"Row {line_number}: {error}")
+    return rows, errors
@@ -0,0 +1,67 @@
+import time
+
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Union
+
+from lib.bot import TMWBot
+from lib.database import Session
+from lib.media_types import MEDIA_TYPES
+
+
+class MediaMetadata(NamedTuple):
+    title: str
+    thumbnail_url: Optional[str]
+    source_url: Optional[str]
+    nsfw: bool
+
+
+class MediaMetadataResolver:
+    """Display data for a logged name, read from the cached_*_results tables with one query.
+
+    Rows are kept in a bounded LRU cache for ttl seconds. Anime and Manga share the AniList row,
+    so entries are keyed by (metadata_query, name) and the per media type source URL is built on
+    every lookup. The autocomplete modules dispatch media_metadata_update after they upsert a row,
+    which should be passed on to invalidate.
+    """
+
+    def __init__(self, bot: TMWBot, max_entries: int = 4096, ttl: float = 6 * 60 * 60):
+        self.bot = bot
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._cache: OrderedDict[tuple[str, str], tuple[float, Optional[tuple]]] = OrderedDict()
+
+    async def _get_row(self, metadata_query: str, name: str, db: Union[TMWBot, Session]) -> Optional[tuple]:
+        key = (metadata_query, name)
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            self._cache.move_to_end(key)
+            return cached[1]
+
+        # Names without a cached row are remembered as well, they are mostly free text.
+        row = await db.GET_ONE(metadata_query, (name,))
+        self._cache[key] = (time.monotonic(), tuple(row) if row else None)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return row
+
+    async def resolve(self, media_type: str, name: Optional[str], db: Optional[Union[TMWBot, Session]] = None) -> MediaMetadata:
+        metadata_query = MEDIA_TYPES[media_type]['metadata_query']
+        if not metadata_query or not name:
+            return MediaMetadata(name, None, None, False)
+
+        row = await self._get_row(metadata_query, name, db or self.bot)
+        if not row:
+            return MediaMetadata(name, None, None, False)
+
+        title, thumbnail_url, nsfw, tmdb_media_type = row
+        source_url = MEDIA_TYPES[media_type]['source_url']
+        if '{tmdb_media_type}' in source_url:
+            source_url = source_url.format(tmdb_media_type=tmdb_media_type) if tmdb_media_type else None
+        return MediaMetadata(title or name, thumbnail_url, source_url + name if source_url else None, bool(nsfw))
+
+    def invalidate(self, metadata_query: str, name: str):
+        self._cache.pop((metadata_query, name), None)
+
+    def clear(self):
+        self._cache.clear()
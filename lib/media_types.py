@@ -2,9 +2,9 @@ import discord
 import yaml
 import os
 
-from lib.vndb_autocomplete import vn_name_autocomplete, CACHED_VNDB_THUMBNAIL_QUERY, CACHED_VNDB_TITLE_QUERY
-from lib.anilist_autocomplete import anime_manga_name_autocomplete, CACHED_ANILIST_THUMBNAIL_QUERY, CACHED_ANILIST_TITLE_QUERY
-from lib.tmdb_autocomplete import listening_autocomplete, CACHED_TMDB_THUMBNAIL_QUERY, CACHED_TMDB_TITLE_QUERY
+from lib.vndb_autocomplete import vn_name_autocomplete, CACHED_VNDB_METADATA_QUERY
+from lib.anilist_autocomplete import anime_manga_name_autocomplete, CACHED_ANILIST_METADATA_QUERY
+from lib.tmdb_autocomplete import listening_autocomplete, CACHED_TMDB_METADATA_QUERY
 
 IMMERSION_LOG_SETTINGS = os.getenv("IMMERSION_LOG_SETTINGS") or "config/immersion_log_settings.yml"
 with open(IMMERSION_LOG_SETTINGS, "r", encoding="utf-8") as f:
@@ -17,8 +17,7 @@ MEDIA_TYPES = {
         "max_logged": 2000000,
         "autocomplete": vn_name_autocomplete,
         "points_multiplier": immersion_log_settings['points_multipliers']["Visual_Novel"],
-        "thumbnail_query": CACHED_VNDB_THUMBNAIL_QUERY,
-        "title_query": CACHED_VNDB_TITLE_QUERY,
+        "metadata_query": CACHED_VNDB_METADATA_QUERY,
         "unit_name": "character",
         "source_url": "https://vndb.org/",
         "Achievement_Group": "Visual Novel",
@@ -30,8 +29,7 @@ MEDIA_TYPES = {
         "max_logged": 1000,
         "autocomplete": anime_manga_name_autocomplete,
         "points_multiplier": immersion_log_settings['points_multipliers']["Manga"],
-        "thumbnail_query": CACHED_ANILIST_THUMBNAIL_QUERY,
-        "title_query": CACHED_ANILIST_TITLE_QUERY,
+        "metadata_query": CACHED_ANILIST_METADATA_QUERY,
         "unit_name": "page",
         "source_url": "https://anilist.co/manga/",
         "Achievement_Group": "Manga",
@@ -43,8 +41,7 @@ MEDIA_TYPES = {
         "max_logged": 100,
         "autocomplete": anime_manga_name_autocomplete,
         "points_multiplier": immersion_log_settings['points_multipliers']["Anime"],
-        "thumbnail_query": CACHED_ANILIST_THUMBNAIL_QUERY,
-        "title_query": CACHED_ANILIST_TITLE_QUERY,
+        "metadata_query": CACHED_ANILIST_METADATA_QUERY,
         "unit_name": "episode",
         "source_url": "https://anilist.co/anime/",
         "Achievement_Group": "Anime",
@@ -56,8 +53,7 @@ MEDIA_TYPES = {
         "max_logged": 500,
         "autocomplete": None,
         "points_multiplier": immersion_log_settings['points_multipliers']["Book"],
-        "thumbnail_query": None,
-        "title_query": None,
+        "metadata_query": None,
         "unit_name": "page",
         "source_url": None,
         "Achievement_Group": "Reading",
@@ -69,8 +65,7 @@ MEDIA_TYPES = {
         "max_logged": 1440,
         "autocomplete": None,
         "points_multiplier": immersion_log_settings['points_multipliers']["Reading_Time"],
-        "thumbnail_query": None,
-        "title_query": None,
+        "metadata_query": None,
         "unit_name": "minute",
         "source_url": None,
         "Achievement_Group": "Reading",
@@ -82,8 +77,7 @@ MEDIA_TYPES = {
         "max_logged": 1440,
         "autocomplete": listening_autocomplete,
         "points_multiplier": immersion_log_settings['points_multipliers']["Listening_Time"],
-        "thumbnail_query": CACHED_TMDB_THUMBNAIL_QUERY,
-        "title_query": CACHED_TMDB_TITLE_QUERY,
+        "metadata_query": CACHED_TMDB_METADATA_QUERY,
         "unit_name": "minute",
         "source_url": "https://www.themoviedb.org/{tmdb_media_type}/",
         "Achievement_Group": "Listening",
@@ -95,8 +89,7 @@ MEDIA_TYPES = {
         "max_logged": 2000000,
         "autocomplete": None,
         "points_multiplier": immersion_log_settings['points_multipliers']["Reading"],
-        "thumbnail_query": None,
-        "title_query": None,
+        "metadata_query": None,
         "unit_name": "character",
         "source_url": None,
         "Achievement_Group": "Reading",
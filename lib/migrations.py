@@ -0,0 +1,58 @@
+import logging
+import os
+import re
+
+from lib.database import Database
+
+_log = logging.getLogger(__name__)
+
+MIGRATIONS_FOLDER = os.getenv("MIGRATIONS_FOLDER") or "migrations"
+
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+CREATE_SCHEMA_VERSION_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);"""
+
+GET_APPLIED_VERSIONS_QUERY = """
+SELECT version FROM schema_version;"""
+
+RECORD_VERSION_QUERY = """
+INSERT INTO schema_version (version, name) VALUES ({version}, '{name}');"""
+
+
+def discover_migrations(folder: str = MIGRATIONS_FOLDER) -> list[tuple[int, str, str]]:
+    """Return (version, name, path) for every migration file, ordered by version."""
+    migrations = []
+    for file_name in os.listdir(folder):
+        match = MIGRATION_FILE_PATTERN.match(file_name)
+        if not match:
+            continue
+        migrations.append((int(match.group(1)), match.group(2), os.path.join(folder, file_name)))
+    migrations.sort()
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {folder}.")
+    return migrations
+
+
+async def run_migrations(db: Database, folder: str = MIGRATIONS_FOLDER):
+    """Apply every migration in folder that has not been recorded in schema_version yet.
+
+    Each migration runs in its own transaction together with its schema_version row,
+    so a failing migration leaves the database at the previous version.
+    """
+    await db.execute(CREATE_SCHEMA_VERSION_TABLE_QUERY)
+    applied = {version for version, in await db.fetchall(GET_APPLIED_VERSIONS_QUERY)}
+
+    for version, name, path in discover_migrations(folder):
+        if version in applied:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            script = f.read()
+        _log.info("Applying migration %04d_%s.", version, name)
+        await db.executescript(
+            "BEGIN;\n" + script + "\n" + RECORD_VERSION_QUERY.format(version=version, name=name) + "\nCOMMIT;")
@@ -0,0 +1,103 @@
+import glob
+import hashlib
+import os
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Hashable, Optional, Union
+
+from lib.bot import TMWBot
+from lib.database import Session
+
+GET_RACE_DATA_VERSION_QUERY = """
+    SELECT IFNULL(SUM(version), 0)
+    FROM daily_rollup_versions
+    WHERE day BETWEEN ? AND ?;
+"""
+
+# Marks videos that are still being rendered, see lib.race_jobs.partial_filename.
+PARTIAL_MARKER = '.partial.'
+
+# A day is over in every timezone (UTC-12 to UTC+14) once this much time has passed since its start in UTC.
+DAY_CLOSED_AFTER = timedelta(days=1, hours=12)
+
+
+async def get_race_data_version(db: Union[TMWBot, Session], from_date: str, to_date: str) -> int:
+    """Changes whenever a daily_rollup row of a day within from_date and to_date changes."""
+    version = await db.GET_ONE(GET_RACE_DATA_VERSION_QUERY, (from_date, to_date))
+    return version[0]
+
+
+def is_closed_period(to_date: datetime, now: datetime) -> bool:
+    """Whether the last day of the period is over for everyone, naive UTC datetimes."""
+    return to_date + DAY_CLOSED_AFTER <= now
+
+
+class RaceVideoCache:
+    """Rendered race videos on disk, one file per key and data version.
+
+    Videos of closed periods are kept until a newer version of the same key replaces them, all
+    others are evicted least recently used first once they exceed max_bytes in total. Files survive
+    restarts, only unfinished renders (see partial_filename) are removed on start.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.open_dir = os.path.join(directory, 'open')
+        self.closed_dir = os.path.join(directory, 'closed')
+        self._open_files: OrderedDict[str, int] = OrderedDict()
+        self._open_bytes = 0
+
+        for cache_dir in (self.open_dir, self.closed_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+            for partial in glob.glob(os.path.join(cache_dir, f"*{PARTIAL_MARKER}*")):
+                self._remove(partial)
+
+        open_files = [(entry.stat().st_mtime, entry.path, entry.stat().st_size)
+                      for entry in os.scandir(self.open_dir) if entry.is_file()]
+        for _, path, size in sorted(open_files):
+            self._open_files[path] = size
+            self._open_bytes += size
+
+    def path_for(self, key: Hashable, version: int, closed: bool, extension: str = 'mp4') -> str:
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.closed_dir if closed else self.open_dir, f"{digest}-{version}.{extension}")
+
+    def get(self, path: str) -> Optional[str]:
+        if not os.path.exists(path):
+            self._forget(path)
+            return None
+        if path in self._open_files:
+            self._open_files.move_to_end(path)
+            os.utime(path)
+        return path
+
+    def add(self, path: str):
+        """Registers a finished video and removes older versions of its key."""
+        digest = os.path.basename(path).rsplit('-', 1)[0]
+        for old_path in glob.glob(os.path.join(os.path.dirname(path), f"{digest}-*")):
+            # Renders of other versions that are still running are left alone.
+            if old_path != path and PARTIAL_MARKER not in os.path.basename(old_path):
+                self._forget(old_path)
+                self._remove(old_path)
+
+        if os.path.dirname(path) != self.open_dir or path in self._open_files:
+            return
+        self._open_files[path] = os.path.getsize(path)
+        self._open_bytes += self._open_files[path]
+        while self._open_bytes > self.max_bytes and len(self._open_files) > 1:
+            old_path, old_size = self._open_files.popitem(last=False)
+            self._open_bytes -= old_size
+            self._remove(old_path)
+
+    def _forget(self, path: str):
+        size = self._open_files.pop(path, None)
+        if size is not None:
+            self._open_bytes -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
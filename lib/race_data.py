@@ -0,0 +1,81 @@
+"""Data preparation for /log_race.
+
+The cumulative standings are summed, bucketed and trimmed in SQL (see GET_RACE_STANDINGS_QUERY in
+cogs.immersion_bar_races), this only shapes the rows into the matrix bar_chart_race animates.
+"""
+import math
+import numpy as np
+
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+# Bars shown by the race. Users that never rank this high in any period are left out.
+RACE_BAR_COUNT = 15
+
+# A race shows about this many periods, half a second each, longer ranges get longer periods.
+TARGET_PERIODS = 32
+PREVIEW_TARGET_PERIODS = 16
+
+# Interpolated frames between two periods, as many as fit into the render budget.
+MIN_STEPS_PER_PERIOD = 4
+MAX_STEPS_PER_PERIOD = 20
+PREVIEW_STEPS_PER_PERIOD = 3
+
+# Render cost of bar_chart_race, measured at its default 144 dpi (72 dpi is barely cheaper, drawing dominates):
+# every frame has a fixed cost, plus some for every drawn bar and for every column it ranks.
+RENDER_STARTUP_SECONDS = 3.0
+FRAME_SECONDS = 0.07
+BAR_FRAME_SECONDS = 0.005
+COLUMN_FRAME_SECONDS = 0.001
+
+
+class RaceStandings(NamedTuple):
+    user_ids: list[int]
+    periods: np.ndarray
+    values: np.ndarray
+
+
+class RacePlan(NamedTuple):
+    steps_per_period: int
+    estimated_seconds: float
+
+
+def race_step_days(start_date: datetime, end_date: datetime, preview: bool = False) -> int:
+    """Days per period, chosen so every race has about the same number of periods."""
+    # The origin day before start_date is part of the first period.
+    days = (end_date - start_date).days + 2
+    return max(1, math.ceil(days / (PREVIEW_TARGET_PERIODS if preview else TARGET_PERIODS)))
+
+
+def estimate_render_seconds(periods: int, columns: int, steps_per_period: int) -> float:
+    frames = (periods - 1) * steps_per_period + 1
+    frame_seconds = FRAME_SECONDS + BAR_FRAME_SECONDS * min(columns, RACE_BAR_COUNT) + COLUMN_FRAME_SECONDS * columns
+    return RENDER_STARTUP_SECONDS + frames * frame_seconds
+
+
+def plan_race(standings: RaceStandings, budget_seconds: float, preview: bool = False) -> RacePlan:
+    """The smoothest animation estimated to render within budget_seconds, previews always use few frames."""
+    periods, columns = standings.values.shape
+    if preview:
+        steps = PREVIEW_STEPS_PER_PERIOD
+    else:
+        steps = next((steps for steps in range(MAX_STEPS_PER_PERIOD, MIN_STEPS_PER_PERIOD - 1, -1)
+                      if estimate_render_seconds(periods, columns, steps) <= budget_seconds), MIN_STEPS_PER_PERIOD)
+    return RacePlan(steps, estimate_render_seconds(periods, columns, steps))
+
+
+def race_origin(start_date: datetime) -> datetime:
+    """The first period starts the day before the race, where every user is still at zero."""
+    return start_date - timedelta(days=1)
+
+
+def race_standings(rows: list, origin: datetime, step_days: int) -> RaceStandings:
+    """Rows (user_id, bucket, cumulative) with every bucket of every user, ordered by user and bucket.
+
+    Returns the cumulative values with one row per period and one column per user.
+    """
+    user_ids, _, cumulative = zip(*rows)
+    user_ids = list(dict.fromkeys(user_ids))
+    values = np.array(cumulative, dtype=np.float64).reshape(len(user_ids), -1).T
+    periods = np.datetime64(origin.date(), 'D') + np.arange(values.shape[0]) * step_days
+    return RaceStandings(user_ids, periods, values)
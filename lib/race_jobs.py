@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from lib.database import Database
+
+_log = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+TIMED_OUT = 'timed_out'
+
+CREATE_RACE_JOB_QUERY = """
+    INSERT INTO race_jobs (user_id, guild_id, channel_id, from_date, to_date, media_type, race_type, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, 'queued')
+    RETURNING job_id;
+"""
+
+START_RACE_JOB_QUERY = """
+    UPDATE race_jobs
+    SET status = 'running', started_at = CURRENT_TIMESTAMP
+    WHERE job_id = ?;
+"""
+
+FINISH_RACE_JOB_QUERY = """
+    UPDATE race_jobs
+    SET status = ?, error = ?, cancelled_by = ?, finished_at = CURRENT_TIMESTAMP
+    WHERE job_id = ?;
+"""
+
+FAIL_INTERRUPTED_RACE_JOBS_QUERY = """
+    UPDATE race_jobs
+    SET status = 'failed', error = 'Interrupted by a restart of the bot.', finished_at = CURRENT_TIMESTAMP
+    WHERE status IN ('queued', 'running');
+"""
+
+# How often a running job is checked for progress, cancellation and its deadline.
+POLL_INTERVAL = 0.5
+
+
+def partial_filename(filename: str) -> str:
+    """Where a video is written while it renders, ffmpeg picks the format from the extension so it is kept."""
+    root, extension = os.path.splitext(filename)
+    return f"{root}.partial{extension}"
+
+
+class RaceJobError(Exception):
+    pass
+
+
+class RaceQueueFullError(RaceJobError):
+    pass
+
+
+class RaceJobCancelledError(RaceJobError):
+    pass
+
+
+class RaceJobTimeoutError(RaceJobError):
+    pass
+
+
+@dataclass(eq=False)
+class RaceJob:
+    user_id: int
+    guild_id: int
+    channel_id: int
+    from_date: str
+    to_date: str
+    media_type: Optional[str]
+    race_type: str
+    filename: str
+    job_id: Optional[int] = None
+    status: str = QUEUED
+    frame: int = 0
+    frame_count: int = 0
+    estimated_seconds: float = 0.0
+    cancelled_by: Optional[int] = None
+    result: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future(), repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.result.done()
+
+
+def _run_job(job: Callable, args: tuple, filename: str, connection):
+    """Entry point of a race worker process, reports progress and the outcome through connection."""
+    last_reported = -1
+
+    def progress_callback(frame: int, frame_count: int):
+        nonlocal last_reported
+        percent = frame * 100 // max(frame_count, 1)
+        if percent != last_reported:
+            last_reported = percent
+            connection.send(('progress', frame, frame_count))
+
+    try:
+        job(*args, filename=filename, progress_callback=progress_callback)
+        connection.send(('done',))
+    except Exception as error:
+        connection.send(('error', f"{type(error).__name__}: {error}"))
+    finally:
+        connection.close()
+
+
+class RaceJobQueue:
+    """Runs /log_race renders one process per job, at most max_workers at a time, in submission order.
+
+    Every job is recorded in the race_jobs table. Jobs report their frame progress while they run,
+    can be cancelled while queued or running, and are terminated after timeout seconds of rendering.
+    Races are planned to render within budget seconds (see lib.race_data.plan_race), the timeout is the backstop.
+    The video is written to the partial_filename of race.filename and moved into place once complete.
+    The outcome is delivered through race.result: the filename or a RaceJobError.
+    """
+
+    def __init__(self, db: Database, max_workers: int = 1, max_queue: int = 10, timeout: float = 600.0, budget: float = 180.0):
+        self.db = db
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.budget = budget
+        self._context = multiprocessing.get_context('forkserver')
+        self._slots = asyncio.Semaphore(max_workers)
+        self._queued: list[RaceJob] = []
+        self._running: dict[int, RaceJob] = {}
+        self._processes: dict[int, multiprocessing.Process] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self):
+        await self.db.execute(FAIL_INTERRUPTED_RACE_JOBS_QUERY)
+
+    @property
+    def jobs(self) -> list[RaceJob]:
+        """Running jobs first, then queued ones in the order they will start."""
+        return list(self._running.values()) + self._queued
+
+    def get(self, job_id: int) -> Optional[RaceJob]:
+        return next((job for job in self.jobs if job.job_id == job_id), None)
+
+    def active_job_of(self, user_id: int) -> Optional[RaceJob]:
+        return next((job for job in self.jobs if job.user_id == user_id), None)
+
+    def job_for(self, filename: str) -> Optional[RaceJob]:
+        """The queued or running job that renders filename, requests for the same video can wait for it."""
+        return next((job for job in self.jobs if job.filename == filename and job.cancelled_by is None), None)
+
+    def position(self, job: RaceJob) -> int:
+        """1 for the next job to start, 0 once the job is no longer queued."""
+        return self._queued.index(job) + 1 if job in self._queued else 0
+
+    def estimated_wait(self, job: RaceJob) -> float:
+        """Seconds until a queued job starts, from the estimated render times of the jobs ahead of it."""
+        remaining = sum(running.estimated_seconds * (1 - running.frame / max(running.frame_count, 1))
+                        for running in self._running.values())
+        ahead = self._queued[:self.position(job) - 1] if job in self._queued else []
+        return (remaining + sum(queued.estimated_seconds for queued in ahead)) / self.max_workers
+
+    async def submit(self, race: RaceJob, job: Callable, *args) -> RaceJob:
+        """Queues job(*args, filename=..., progress_callback=...), a module level function that renders the race into filename."""
+        if len(self._queued) >= self.max_queue:
+            raise RaceQueueFullError("Too many races are waiting to be rendered, please try again later.")
+
+        async with self.db.transaction() as tx:
+            row = await tx.GET_ONE(CREATE_RACE_JOB_QUERY, (race.user_id, race.guild_id, race.channel_id, race.from_date,
+                                                          race.to_date, race.media_type, race.race_type))
+        race.job_id = row[0]
+        self._queued.append(race)
+
+        task = asyncio.create_task(self._run(race, job, args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return race
+
+    async def cancel(self, race: RaceJob, cancelled_by: int) -> bool:
+        if race.finished or race.cancelled_by is not None:
+            return False
+        race.cancelled_by = cancelled_by
+        if race in self._queued:
+            self._queued.remove(race)
+            await self._finish(race, CANCELLED, RaceJobCancelledError("The race was cancelled."))
+        else:
+            # The running job notices on its next poll and terminates its process.
+            process = self._processes.get(race.job_id)
+            if process is not None:
+                process.terminate()
+        return True
+
+    async def _run(self, race: RaceJob, job: Callable, args: tuple):
+        async with self._slots:
+            if race.finished:
+                return
+            self._queued.remove(race)
+            self._running[race.job_id] = race
+            try:
+                await self._render(race, job, args)
+            except Exception as error:
+                _log.exception("Race job %s failed.", race.job_id)
+                await self._finish(race, FAILED, RaceJobError(f"Rendering the race failed: {error}"))
+            finally:
+                self._running.pop(race.job_id, None)
+
+    async def _render(self, race: RaceJob, job: Callable, args: tuple):
+        race.status = RUNNING
+        await self.db.execute(START_RACE_JOB_QUERY, (race.job_id,))
+
+        filename = partial_filename(race.filename)
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=_run_job, args=(job, args, filename, sender), daemon=True)
+        try:
+            await asyncio.to_thread(process.start)
+            sender.close()
+            self._processes[race.job_id] = process
+            outcome = await self._watch(race, process, receiver)
+            await asyncio.to_thread(process.join)
+
+            if outcome == DONE:
+                await asyncio.to_thread(os.replace, filename, race.filename)
+                await self._finish(race, DONE)
+            elif outcome == CANCELLED:
+                await self._finish(race, CANCELLED, RaceJobCancelledError("The race was cancelled."))
+            elif outcome == TIMED_OUT:
+                _log.warning("Race job %s took longer than %s seconds and was terminated.", race.job_id, self.timeout)
+                await self._finish(race, TIMED_OUT, RaceJobTimeoutError("Rendering the race took too long."))
+            else:
+                await self._finish(race, FAILED, RaceJobError(f"Rendering the race failed: {outcome}"))
+        finally:
+            self._processes.pop(race.job_id, None)
+            receiver.close()
+            if process.is_alive():
+                process.terminate()
+            self._remove(filename)
+
+    async def _watch(self, race: RaceJob, process: multiprocessing.Process, receiver) -> str:
+        """Follows the worker until it reports back, dies, is cancelled or runs out of time. Returns the outcome."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if race.cancelled_by is not None:
+                process.terminate()
+                return CANCELLED
+            if time.monotonic() > deadline:
+                process.terminate()
+                return TIMED_OUT
+
+            try:
+                while receiver.poll():
+                    message = receiver.recv()
+                    if message[0] == 'progress':
+                        race.frame, race.frame_count = message[1], message[2]
+                    elif message[0] == 'done':
+                        return DONE
+                    else:
+                        return message[1]
+            except EOFError:
+                # The worker closed its end without a result, it crashed or was killed.
+                await asyncio.to_thread(process.join)
+                if race.cancelled_by is not None:
+                    return CANCELLED
+                return f"the worker exited with code {process.exitcode}"
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def _finish(self, race: RaceJob, status: str, error: Optional[RaceJobError] = None):
+        race.status = status
+        await self.db.execute(FINISH_RACE_JOB_QUERY, (status, str(error) if error else None, race.cancelled_by, race.job_id))
+        if race.finished:
+            return
+        if error:
+            race.result.set_exception(error)
+        else:
+            race.result.set_result(race.filename)
+
+    @staticmethod
+    def _remove(filename: str):
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            pass
+
+    async def close(self):
+        for process in list(self._processes.values()):
+            process.terminate()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+
+from lib.bot import TMWBot
+from lib.media_types import MEDIA_TYPES
+
+# idx_logs_user_date is (user_id, log_date) plus the implicit rowid, so both queries walk it backwards
+# and the (log_date, log_id) keyset continues exactly where the previous page stopped.
+GET_RECENT_USER_LOGS_QUERY = """
+    SELECT log_id, media_type, media_name, comment, amount_logged, log_date
+    FROM logs
+    WHERE user_id = ?
+    ORDER BY log_date DESC, log_id DESC
+    LIMIT ?;
+"""
+
+SEARCH_USER_LOGS_QUERY = """
+    SELECT log_id, media_type, media_name, amount_logged, log_date
+    FROM logs
+    WHERE user_id = ? AND (log_date, log_id) < (?, ?)
+    AND (media_name LIKE ? ESCAPE '\\' OR comment LIKE ? ESCAPE '\\' OR media_type LIKE ? ESCAPE '\\' OR log_date LIKE ? ESCAPE '\\')
+    ORDER BY log_date DESC, log_id DESC
+    LIMIT ?;
+"""
+
+
+def format_log_label(media_type: str, media_name: str, amount_logged: int, log_date: str) -> str:
+    unit_name = MEDIA_TYPES[media_type]['unit_name']
+    return f"{media_type}: {media_name or 'N/A'} ({amount_logged} {unit_name}) on {log_date[:10]}"[:100]
+
+
+def search_fields(media_type: str, media_name: str, comment: str, log_date: str) -> tuple[str, ...]:
+    """The lowercased fields SEARCH_USER_LOGS_QUERY matches, so the window matches the same logs."""
+    return tuple(field.lower() for field in (media_name or '', comment or '', media_type, log_date))
+
+
+def escape_like(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class RecentLogs:
+    """The most recent logs of each user, for fast /log_undo autocomplete.
+
+    Keeps a window of the window_size newest logs for up to max_users users. Callers invalidate
+    a user's window whenever one of their logs is added or removed. Searches are answered
+    from the window first and only go to the database for older logs.
+    """
+
+    def __init__(self, bot: TMWBot, window_size: int = 100, max_users: int = 1000):
+        self.bot = bot
+        self.window_size = window_size
+        self.max_users = max_users
+        self._windows: OrderedDict[int, list[tuple[int, str, str, tuple[str, ...]]]] = OrderedDict()
+        self._invalidations = 0
+
+    async def get_window(self, user_id: int) -> list[tuple[int, str, str, tuple[str, ...]]]:
+        """Returns (log_id, log_date, label, search_fields) of the newest logs of a user, newest first."""
+        if user_id in self._windows:
+            self._windows.move_to_end(user_id)
+            return self._windows[user_id]
+        invalidations = self._invalidations
+
+        rows = await self.bot.GET(GET_RECENT_USER_LOGS_QUERY, (user_id, self.window_size))
+        window = [(log_id, log_date, format_log_label(media_type, media_name, amount_logged, log_date),
+                   search_fields(media_type, media_name, comment, log_date))
+                  for log_id, media_type, media_name, comment, amount_logged, log_date in rows]
+
+        if invalidations != self._invalidations:
+            # A log changed while the window was loading, it may already be stale.
+            return window
+        self._windows[user_id] = window
+        while len(self._windows) > self.max_users:
+            self._windows.popitem(last=False)
+        return window
+
+    def invalidate(self, user_id: int):
+        self._invalidations += 1
+        self._windows.pop(user_id, None)
+
+    async def search(self, user_id: int, text: str, limit: int = 10) -> list[tuple[int, str]]:
+        """Returns (log_id, label) of up to limit logs of a user whose name, comment, media type or date contains text, newest first."""
+        window = await self.get_window(user_id)
+        text = text.lower()
+        matches = [(log_id, label) for log_id, _, label, fields in window if any(text in field for field in fields)][:limit]
+
+        if len(matches) >= limit or len(window) < self.window_size:
+            return matches
+
+        oldest_id, oldest_date, _, _ = window[-1]
+        pattern = f"%{escape_like(text)}%"
+        older_rows = await self.bot.GET(SEARCH_USER_LOGS_QUERY, (user_id, oldest_date, oldest_id,
+                                                                 pattern, pattern, pattern, pattern, limit - len(matches)))
+        matches += [(log_id, format_log_label(media_type, media_name, amount_logged, log_date))
+                    for log_id, media_type, media_name, amount_logged, log_date in older_rows]
+        return matches
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import os
+import shutil
+
+from collections import OrderedDict
+from typing import Hashable, Optional, Union
+
+from lib.bot import TMWBot
+from lib.database import Session
+
+GET_USER_LOG_VERSION_QUERY = """
+    SELECT version
+    FROM user_log_versions
+    WHERE user_id = ?;
+"""
+
+
+async def get_user_log_version(db: Union[TMWBot, Session], user_id: int) -> int:
+    """Changes whenever a log of the user is added, removed or edited, or their timezone changes."""
+    version = await db.GET_ONE(GET_USER_LOG_VERSION_QUERY, (user_id,))
+    return version[0] if version else 0
+
+
+class RenderCache:
+    """Rendered images by key, evicted least recently used first once they exceed max_bytes in total.
+
+    With a spill_dir, images evicted from memory are written there and kept up to max_spill_bytes,
+    a disk hit moves the image back into memory. The directory is owned by the cache and emptied on start.
+    Keys should contain a data version (see get_user_log_version), stale entries are never looked up again
+    and simply age out.
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: Optional[str] = None, max_spill_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes if spill_dir else 0
+        self._memory: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: OrderedDict[Hashable, tuple[str, int]] = OrderedDict()
+        self._disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        if self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._memory) + len(self._disk)
+
+    async def get(self, key: Hashable) -> Optional[bytes]:
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return data
+
+        spilled = self._disk.pop(key, None)
+        if spilled is None:
+            self.misses += 1
+            return None
+        path, size = spilled
+        self._disk_bytes -= size
+        try:
+            data = await asyncio.to_thread(self._read_and_remove, path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        await self.put(key, data)
+        return data
+
+    async def put(self, key: Hashable, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+
+        evicted = []
+        while self._memory_bytes > self.max_bytes:
+            evicted_key, evicted_data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted_data)
+            evicted.append((evicted_key, evicted_data))
+        if evicted and self.max_spill_bytes:
+            await self._spill(evicted)
+
+    async def _spill(self, evicted: list[tuple[Hashable, bytes]]):
+        # The index is updated here on the event loop, only the file operations run in a thread.
+        writes = []
+        removals = []
+        for key, data in evicted:
+            if len(data) > self.max_spill_bytes or key in self._disk:
+                continue
+            path = os.path.join(self.spill_dir, hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + '.img')
+            self._disk[key] = (path, len(data))
+            self._disk_bytes += len(data)
+            writes.append((path, data))
+        while self._disk_bytes > self.max_spill_bytes:
+            _, (old_path, old_size) = self._disk.popitem(last=False)
+            self._disk_bytes -= old_size
+            removals.append(old_path)
+        await asyncio.to_thread(self._write_files, writes, removals)
+
+    @staticmethod
+    def _write_files(writes: list[tuple[str, bytes]], removals: list[str]):
+        for path in removals:
+            RenderCache._remove(path)
+        removed = set(removals)
+        for path, data in writes:
+            if path not in removed:
+                with open(path, 'wb') as file:
+                    file.write(data)
+
+    @staticmethod
+    def _read_and_remove(path: str) -> bytes:
+        with open(path, 'rb') as file:
+            data = file.read()
+        RenderCache._remove(path)
+        return data
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for path, _ in self._disk.values():
+            self._remove(path)
+        self._memory.clear()
+        self._disk.clear()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
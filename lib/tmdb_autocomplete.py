@@ -6,56 +6,6 @@ from discord.ext import tasks
 
 from lib.bot import TMWBot
 
-CACHED_TMDB_RESULTS_CREATE_TABLE_QUERY = """
-CREATE TABLE IF NOT EXISTS cached_tmdb_results (
-    primary_key INTEGER PRIMARY KEY AUTOINCREMENT,
-    tmdb_id INTEGER UNIQUE,
-    title TEXT,
-    original_title TEXT,
-    poster_path TEXT,
-    media_type TEXT NOT NULL,
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-);
-"""
-
-CREATE_TMDB_FTS5_TABLE_QUERY = """
-CREATE VIRTUAL TABLE IF NOT EXISTS tmdb_fts USING fts5(
-    tmdb_id UNINDEXED,
-    title,
-    original_title,
-    poster_path UNINDEXED,
-    media_type UNINDEXED,
-    content='cached_tmdb_results',
-    tokenize = 'porter'
-);
-"""
-
-CREATE_TMDB_TRIGGER_INSERT = """
-CREATE TRIGGER IF NOT EXISTS tmdb_fts_insert AFTER INSERT ON cached_tmdb_results
-BEGIN
-  INSERT INTO tmdb_fts(rowid, tmdb_id, title, original_title, media_type)
-  VALUES (new.rowid, new.tmdb_id, new.title, new.original_title, new.media_type);
-END;
-"""
-
-CREATE_TMDB_TRIGGER_UPDATE = """
-CREATE TRIGGER IF NOT EXISTS tmdb_fts_update AFTER UPDATE ON cached_tmdb_results
-BEGIN
-  UPDATE tmdb_fts SET 
-    title = new.title,
-    original_title = new.original_title,
-    media_type = new.media_type
-  WHERE rowid = old.rowid;
-END;
-"""
-
-CREATE_TMDB_TRIGGER_DELETE = """
-CREATE TRIGGER IF NOT EXISTS tmdb_fts_delete AFTER DELETE ON cached_tmdb_results
-BEGIN
-  DELETE FROM tmdb_fts WHERE rowid = old.rowid;
-END;
-"""
-
 CACHED_TMDB_RESULTS_INSERT_QUERY = """
 INSERT INTO cached_tmdb_results (tmdb_id, title, original_title, poster_path, media_type)
 VALUES (?, ?, ?, ?, ?)
@@ -74,18 +24,9 @@ WHERE (title LIKE '%' || ? || '%' OR original_title LIKE '%' || ? || '%')
 LIMIT 10;
 """
 
-CACHED_TMDB_THUMBNAIL_QUERY = """
-SELECT poster_path FROM cached_tmdb_results
-WHERE tmdb_id = ?;
-"""
-
-CACHED_TMDB_TITLE_QUERY = """
-SELECT title FROM cached_tmdb_results
-WHERE tmdb_id = ?;
-"""
-
-CACHED_TMDB_GET_MEDIA_TYPE_QUERY = """
-SELECT media_type FROM cached_tmdb_results
+CACHED_TMDB_METADATA_QUERY = """
+SELECT title, poster_path, 0 AS nsfw, media_type AS tmdb_media_type
+FROM cached_tmdb_results
 WHERE tmdb_id = ?;
 """
 
@@ -120,6 +61,7 @@ async def query_tmdb(interaction: discord.Interaction, current_input: str, bot:
                         choices.append(discord.app_commands.Choice(name=choice_name, value=str(media_id)))
 
                     await bot.RUN(CACHED_TMDB_RESULTS_INSERT_QUERY, (media_id, title, original_title, poster_path, media_type))
+                    bot.dispatch("media_metadata_update", CACHED_TMDB_METADATA_QUERY, str(media_id))
 
                 return choices[:10]
             elif response.status == 429:
@@ -0,0 +1,85 @@
+import re
+import discord
+
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from lib.bot import TMWBot
+from lib.database import Session
+
+GET_USER_TIMEZONE_QUERY = """
+    SELECT timezone, utc_offset_minutes
+    FROM user_timezones
+    WHERE user_id = ?;
+"""
+
+SET_USER_TIMEZONE_QUERY = """
+    INSERT INTO user_timezones (user_id, timezone, utc_offset_minutes)
+    VALUES (?, ?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET
+        timezone = excluded.timezone,
+        utc_offset_minutes = excluded.utc_offset_minutes;
+"""
+
+UTC_OFFSET_PATTERN = re.compile(r'^(?:UTC|GMT)?\s*([+-])(\d{1,2})(?::?(\d{2}))?$', re.IGNORECASE)
+
+MAX_UTC_OFFSET_MINUTES = 14 * 60
+
+
+def parse_timezone(text: str) -> tuple[str, int]:
+    """Returns the display name and the current UTC offset in minutes of a zone name (Asia/Tokyo) or an offset (UTC+9, -05:00)."""
+    text = text.strip()
+    if text.upper() in ('UTC', 'GMT'):
+        return 'UTC', 0
+
+    match = UTC_OFFSET_PATTERN.match(text)
+    if match:
+        sign, hours, minutes = match.groups()
+        offset_minutes = int(hours) * 60 + int(minutes or 0)
+        if offset_minutes > MAX_UTC_OFFSET_MINUTES or int(minutes or 0) >= 60:
+            raise ValueError(f"`{text}` is not a valid UTC offset.")
+        offset_minutes = -offset_minutes if sign == '-' else offset_minutes
+        return f"UTC{sign}{int(hours):02d}:{int(minutes or 0):02d}", offset_minutes
+
+    try:
+        zone = ZoneInfo(text)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"`{text}` is not a known timezone. Use a name like `Asia/Tokyo` or an offset like `UTC-5`.")
+    return text, utc_offset_at(zone, discord.utils.utcnow().replace(tzinfo=None))
+
+
+def user_zone(timezone_name: str, utc_offset_minutes: int) -> tzinfo:
+    """The zone of a user_timezones row. Zone names follow daylight saving time, offsets (UTC+09:00) are fixed."""
+    try:
+        return ZoneInfo(timezone_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone(timedelta(minutes=utc_offset_minutes))
+
+
+async def get_timezone(db: Union[TMWBot, Session], user_id: int) -> tzinfo:
+    """Timezone of a user, UTC if they never set one."""
+    user_timezone = await db.GET_ONE(GET_USER_TIMEZONE_QUERY, (user_id,))
+    return user_zone(*user_timezone) if user_timezone else timezone.utc
+
+
+def utc_offset_at(zone: tzinfo, utc_date: datetime) -> int:
+    """UTC offset of the zone in minutes at a naive UTC datetime, stored with every log to bucket it into its local day."""
+    return int(to_aware(utc_date).astimezone(zone).utcoffset().total_seconds() // 60)
+
+
+def to_aware(utc_date: datetime) -> datetime:
+    return utc_date.replace(tzinfo=timezone.utc)
+
+
+def local_now(zone: tzinfo) -> datetime:
+    """The current local time of the zone, as a naive datetime like the stored log dates."""
+    return discord.utils.utcnow().astimezone(zone).replace(tzinfo=None)
+
+
+def to_local(utc_date: datetime, zone: tzinfo) -> datetime:
+    return to_aware(utc_date).astimezone(zone).replace(tzinfo=None)
+
+
+def to_utc(local_date: datetime, zone: tzinfo) -> datetime:
+    return local_date.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
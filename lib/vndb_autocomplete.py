@@ -5,51 +5,6 @@ from discord.ext import tasks
 
 from lib.bot import TMWBot
 
-CACHED_VNDB_RESULTS_CREATE_TABLE_QUERY = """
-CREATE TABLE IF NOT EXISTS cached_vndb_results (
-    primary_key INTEGER PRIMARY KEY AUTOINCREMENT,
-    vndb_id TEXT UNIQUE,
-    title TEXT,
-    cover_image_url TEXT,
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-    cover_image_nsfw INTEGER DEFAULT 0
-);
-"""
-
-CREATE_VNDB_FTS5_TABLE_QUERY = """
-CREATE VIRTUAL TABLE IF NOT EXISTS vndb_fts USING fts5(
-    vndb_id UNINDEXED,
-    title,
-    cover_image_url UNINDEXED,
-    content='cached_vndb_results',
-    tokenize = 'porter'
-);
-"""
-
-CREATE_VNDB_TRIGGER_INSERT = """
-CREATE TRIGGER IF NOT EXISTS vndb_fts_insert AFTER INSERT ON cached_vndb_results
-BEGIN
-  INSERT INTO vndb_fts(rowid, vndb_id, title)
-  VALUES (new.rowid, new.vndb_id, new.title);
-END;
-"""
-
-CREATE_VNDB_TRIGGER_UPDATE = """
-CREATE TRIGGER IF NOT EXISTS vndb_fts_update AFTER UPDATE ON cached_vndb_results
-BEGIN
-  UPDATE vndb_fts SET 
-    title = new.title
-  WHERE rowid = old.rowid;
-END;
-"""
-
-CREATE_VNDB_TRIGGER_DELETE = """
-CREATE TRIGGER IF NOT EXISTS vndb_fts_delete AFTER DELETE ON cached_vndb_results
-BEGIN
-  DELETE FROM vndb_fts WHERE rowid = old.rowid;
-END;
-"""
-
 CACHED_VNDB_RESULTS_INSERT_QUERY = """
 INSERT INTO cached_vndb_results (vndb_id, title, cover_image_url, cover_image_nsfw) 
 VALUES (?, ?, ?, ?)
@@ -71,13 +26,9 @@ SELECT vndb_id, title, cover_image_url FROM cached_vndb_results
 WHERE vndb_id = ?;
 """
 
-CACHED_VNDB_THUMBNAIL_QUERY = """
-SELECT cover_image_url FROM cached_vndb_results
-WHERE vndb_id = ? AND cover_image_nsfw = 0;
-"""
-
-CACHED_VNDB_TITLE_QUERY = """
-SELECT title FROM cached_vndb_results
+CACHED_VNDB_METADATA_QUERY = """
+SELECT title, cover_image_url, cover_image_nsfw AS nsfw, NULL AS tmdb_media_type
+FROM cached_vndb_results
 WHERE vndb_id = ?;
 """
 
@@ -122,6 +73,7 @@ async def query_vndb(interaction: discord.Interaction, current_input: str, bot:
                         choices.append(discord.app_commands.Choice(name=choice_name, value=str(vndb_id)))
 
                     await bot.RUN(CACHED_VNDB_RESULTS_INSERT_QUERY, (vndb_id, title, cover_image_url, cover_image_nsfw))
+                    bot.dispatch("media_metadata_update", CACHED_VNDB_METADATA_QUERY, str(vndb_id))
 
                 return choices[:10]
             elif response.status == 429:
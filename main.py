@@ -12,13 +12,20 @@ load_dotenv()
 COMMAND_PREFIX = os.getenv("COMMAND_PREFIX")
 TOKEN = os.getenv("TOKEN")
 PATH_TO_DB = os.getenv("PATH_TO_DB")
+DB_GROUP_COMMIT = os.getenv("DB_GROUP_COMMIT", "false").lower() == "true"
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "2"))
+RACE_RENDER_WORKERS = int(os.getenv("RACE_RENDER_WORKERS", "1"))
+RACE_RENDER_TIMEOUT = int(os.getenv("RACE_RENDER_TIMEOUT", "600"))
+RACE_RENDER_BUDGET = int(os.getenv("RACE_RENDER_BUDGET", "180"))
 COG_FOLDER = "cogs"
-my_bot = TMWBot(command_prefix=COMMAND_PREFIX, cog_folder=COG_FOLDER, path_to_db=PATH_TO_DB)
+my_bot = TMWBot(command_prefix=COMMAND_PREFIX, cog_folder=COG_FOLDER, path_to_db=PATH_TO_DB, group_commit=DB_GROUP_COMMIT,
+                chart_workers=CHART_RENDER_WORKERS, race_workers=RACE_RENDER_WORKERS, race_timeout=RACE_RENDER_TIMEOUT,
+                race_budget=RACE_RENDER_BUDGET)
 
 
 async def main(cogs_to_load):
     discord.utils.setup_logging()
-    await my_bot.load_cogs(cogs_to_load)
+    my_bot.cogs_to_load = cogs_to_load
     await my_bot.start(TOKEN)
 
 if __name__ == "__main__":
@@ -0,0 +1,270 @@
+-- Baseline schema: every table that was created by the cogs before migrations existed.
+
+-- immersion_log
+CREATE TABLE IF NOT EXISTS logs (
+    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    media_type TEXT NOT NULL,
+    media_name TEXT,
+    comment TEXT,
+    amount_logged INTEGER NOT NULL,
+    points_received REAL NOT NULL,
+    log_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    achievement_group TEXT);
+
+-- immersion_goals
+CREATE TABLE IF NOT EXISTS user_goals (
+    goal_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    media_type TEXT NOT NULL,
+    goal_type TEXT NOT NULL CHECK(goal_type IN ('points', 'amount')),
+    goal_value INTEGER NOT NULL,
+    end_date TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+
+-- anilist_autocomplete
+CREATE TABLE IF NOT EXISTS cached_anilist_results (
+    primary_key INTEGER PRIMARY KEY AUTOINCREMENT,
+    anilist_id INTEGER UNIQUE,
+    title_english TEXT,
+    title_native TEXT,
+    cover_image_url TEXT,
+    media_type TEXT NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS anilist_fts USING fts5(
+    anilist_id UNINDEXED,
+    title_english,
+    title_native,
+    cover_image_url UNINDEXED,
+    media_type UNINDEXED,
+    content='cached_anilist_results',
+    tokenize = 'porter'
+);
+
+CREATE TRIGGER IF NOT EXISTS anilist_fts_insert AFTER INSERT ON cached_anilist_results
+BEGIN
+  INSERT INTO anilist_fts(rowid, anilist_id, title_english, title_native, media_type)
+  VALUES (new.rowid, new.anilist_id, new.title_english, new.title_native, new.media_type);
+END;
+
+CREATE TRIGGER IF NOT EXISTS anilist_fts_update AFTER UPDATE ON cached_anilist_results
+BEGIN
+  UPDATE anilist_fts SET
+    title_english = new.title_english,
+    title_native = new.title_native,
+    media_type = new.media_type
+  WHERE rowid = old.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS anilist_fts_delete AFTER DELETE ON cached_anilist_results
+BEGIN
+  DELETE FROM anilist_fts WHERE rowid = old.rowid;
+END;
+
+-- vndb_autocomplete
+CREATE TABLE IF NOT EXISTS cached_vndb_results (
+    primary_key INTEGER PRIMARY KEY AUTOINCREMENT,
+    vndb_id TEXT UNIQUE,
+    title TEXT,
+    cover_image_url TEXT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    cover_image_nsfw INTEGER DEFAULT 0
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS vndb_fts USING fts5(
+    vndb_id UNINDEXED,
+    title,
+    cover_image_url UNINDEXED,
+    content='cached_vndb_results',
+    tokenize = 'porter'
+);
+
+CREATE TRIGGER IF NOT EXISTS vndb_fts_insert AFTER INSERT ON cached_vndb_results
+BEGIN
+  INSERT INTO vndb_fts(rowid, vndb_id, title)
+  VALUES (new.rowid, new.vndb_id, new.title);
+END;
+
+CREATE TRIGGER IF NOT EXISTS vndb_fts_update AFTER UPDATE ON cached_vndb_results
+BEGIN
+  UPDATE vndb_fts SET
+    title = new.title
+  WHERE rowid = old.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS vndb_fts_delete AFTER DELETE ON cached_vndb_results
+BEGIN
+  DELETE FROM vndb_fts WHERE rowid = old.rowid;
+END;
+
+-- tmdb_autocomplete
+CREATE TABLE IF NOT EXISTS cached_tmdb_results (
+    primary_key INTEGER PRIMARY KEY AUTOINCREMENT,
+    tmdb_id INTEGER UNIQUE,
+    title TEXT,
+    original_title TEXT,
+    poster_path TEXT,
+    media_type TEXT NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tmdb_fts USING fts5(
+    tmdb_id UNINDEXED,
+    title,
+    original_title,
+    poster_path UNINDEXED,
+    media_type UNINDEXED,
+    content='cached_tmdb_results',
+    tokenize = 'porter'
+);
+
+CREATE TRIGGER IF NOT EXISTS tmdb_fts_insert AFTER INSERT ON cached_tmdb_results
+BEGIN
+  INSERT INTO tmdb_fts(rowid, tmdb_id, title, original_title, media_type)
+  VALUES (new.rowid, new.tmdb_id, new.title, new.original_title, new.media_type);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tmdb_fts_update AFTER UPDATE ON cached_tmdb_results
+BEGIN
+  UPDATE tmdb_fts SET
+    title = new.title,
+    original_title = new.original_title,
+    media_type = new.media_type
+  WHERE rowid = old.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tmdb_fts_delete AFTER DELETE ON cached_tmdb_results
+BEGIN
+  DELETE FROM tmdb_fts WHERE rowid = old.rowid;
+END;
+
+-- username_fetcher
+CREATE TABLE IF NOT EXISTS users (
+    discord_user_id INTEGER PRIMARY KEY,
+    user_name TEXT
+);
+
+-- gatekeeper
+CREATE TABLE IF NOT EXISTS quiz_attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    quiz_name TEXT NOT NULL,
+    created_at TIMESTAMP);
+
+CREATE TABLE IF NOT EXISTS passed_quizzes (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    quiz_name TEXT NOT NULL,
+    PRIMARY KEY (guild_id, user_id, quiz_name));
+
+CREATE TABLE IF NOT EXISTS user_threads (
+    user_id INTEGER NOT NULL,
+    thread_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id)
+);
+
+-- auto_receive
+CREATE TABLE IF NOT EXISTS auto_receive_roles (
+    guild_id INTEGER NOT NULL,
+    role_id_to_have INTEGER NOT NULL,
+    role_name_to_have TEXT,
+    role_id_to_get INTEGER NOT NULL,
+    role_name_to_get TEXT,
+    PRIMARY KEY (guild_id, role_id_to_have, role_id_to_get));
+
+CREATE TABLE IF NOT EXISTS auto_receive_roles_banned (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    user_name TEXT,
+    role_id INTEGER NOT NULL,
+    role_name TEXT,
+    PRIMARY KEY (guild_id, user_id, role_id));
+
+-- bookmark
+CREATE TABLE IF NOT EXISTS user_bookmarks (
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    message_link TEXT NOT NULL,
+    dm_message_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, message_id));
+
+CREATE TABLE IF NOT EXISTS bookmarked_messages (
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    message_author_id INTEGER NOT NULL,
+    message_link TEXT NOT NULL,
+    bookmark_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, message_id));
+
+-- custom_role
+CREATE TABLE IF NOT EXISTS custom_roles (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    role_name TEXT,
+    PRIMARY KEY (guild_id, user_id));
+
+CREATE TABLE IF NOT EXISTS custom_role_settings (
+    guild_id INTEGER NOT NULL,
+    allowed_roles TEXT,
+    reference_role_id INTEGER,
+    reference_role_name TEXT,
+    PRIMARY KEY (guild_id));
+
+-- daily_question
+CREATE TABLE IF NOT EXISTS daily_questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- event_roles
+CREATE TABLE IF NOT EXISTS event_roles (
+    guild_id INTEGER NOT NULL,
+    event_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, event_id)
+);
+
+-- kneels
+CREATE TABLE IF NOT EXISTS kneels (
+    guild_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    discord_user_id INTEGER NOT NULL,
+    kneel_score INTEGER NOT NULL,
+    user_name TEXT,
+    PRIMARY KEY (guild_id, message_id));
+
+-- rank_saver
+CREATE TABLE IF NOT EXISTS user_ranks (
+    guild_id INTEGER NOT NULL,
+    discord_user_id INTEGER NOT NULL,
+    role_ids TEXT NOT NULL,
+    PRIMARY KEY (guild_id, discord_user_id)
+);
+
+-- selfmute
+CREATE TABLE IF NOT EXISTS active_mutes (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    mute_role_id INTEGER NOT NULL,
+    roles_to_restore TEXT NOT NULL,
+    end_time INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id));
+
+-- sticky_messages
+CREATE TABLE IF NOT EXISTS sticky_messages (
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    original_message_id INTEGER NOT NULL,
+    stickied_message_id INTEGER,
+    PRIMARY KEY (guild_id, channel_id));
@@ -0,0 +1,15 @@
+-- Composite indexes for the queries that used to scan whole tables.
+
+-- Per-user log history, streaks and monthly points.
+CREATE INDEX IF NOT EXISTS idx_logs_user_date ON logs (user_id, log_date);
+
+-- Leaderboards filtered by date range and media type.
+CREATE INDEX IF NOT EXISTS idx_logs_date_media_type ON logs (log_date, media_type);
+
+-- Goal progress sums one user's logs of one media type over a date range.
+CREATE INDEX IF NOT EXISTS idx_logs_user_media_type_date ON logs (user_id, media_type, log_date);
+
+CREATE INDEX IF NOT EXISTS idx_user_goals_user_media_type ON user_goals (user_id, media_type);
+
+-- Quiz cooldown lookups.
+CREATE INDEX IF NOT EXISTS idx_quiz_attempts_lookup ON quiz_attempts (guild_id, user_id, quiz_name, created_at);
@@ -0,0 +1,15 @@
+-- Month bucket of every log, so month filters compare a column instead of calling strftime on every row.
+-- VIRTUAL columns are computed on read and need no backfill; the indexes below store the computed values.
+ALTER TABLE logs ADD COLUMN log_month TEXT GENERATED ALWAYS AS (strftime('%Y-%m', log_date)) VIRTUAL;
+
+-- Monthly leaderboards, optionally filtered by media type. Covers the summed columns.
+CREATE INDEX IF NOT EXISTS idx_logs_month_media_type ON logs (log_month, media_type, user_id, points_received, amount_logged);
+
+-- A single user's points for one month.
+CREATE INDEX IF NOT EXISTS idx_logs_user_month ON logs (user_id, log_month, media_type, points_received, amount_logged);
+
+-- All-time leaderboards filtered by media type.
+CREATE INDEX IF NOT EXISTS idx_logs_media_type_user ON logs (media_type, user_id, points_received, amount_logged);
+
+-- Collect statistics so the planner can tell the new indexes apart.
+ANALYZE;
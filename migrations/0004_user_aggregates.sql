@@ -0,0 +1,57 @@
+-- Running totals per user, achievement group and month, kept exact by triggers on logs.
+CREATE TABLE IF NOT EXISTS user_aggregates (
+    user_id INTEGER NOT NULL,
+    achievement_group TEXT NOT NULL,
+    month TEXT NOT NULL,
+    points REAL NOT NULL DEFAULT 0,
+    amount INTEGER NOT NULL DEFAULT 0,
+    log_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, achievement_group, month)
+) WITHOUT ROWID;
+
+-- Logs from before achievement groups existed have none, they are counted under ''.
+INSERT INTO user_aggregates (user_id, achievement_group, month, points, amount, log_count)
+SELECT user_id, IFNULL(achievement_group, ''), log_month, SUM(points_received), SUM(amount_logged), COUNT(*)
+FROM logs
+GROUP BY user_id, IFNULL(achievement_group, ''), log_month;
+
+CREATE TRIGGER IF NOT EXISTS user_aggregates_log_insert AFTER INSERT ON logs
+BEGIN
+    INSERT INTO user_aggregates (user_id, achievement_group, month, points, amount, log_count)
+    VALUES (new.user_id, IFNULL(new.achievement_group, ''), new.log_month, new.points_received, new.amount_logged, 1)
+    ON CONFLICT (user_id, achievement_group, month) DO UPDATE SET
+        points = points + excluded.points,
+        amount = amount + excluded.amount,
+        log_count = log_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_aggregates_log_delete AFTER DELETE ON logs
+BEGIN
+    UPDATE user_aggregates SET
+        points = points - old.points_received,
+        amount = amount - old.amount_logged,
+        log_count = log_count - 1
+    WHERE user_id = old.user_id AND achievement_group = IFNULL(old.achievement_group, '') AND month = old.log_month;
+    DELETE FROM user_aggregates
+    WHERE user_id = old.user_id AND achievement_group = IFNULL(old.achievement_group, '') AND month = old.log_month
+    AND log_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_aggregates_log_update
+AFTER UPDATE OF user_id, achievement_group, log_date, points_received, amount_logged ON logs
+BEGIN
+    UPDATE user_aggregates SET
+        points = points - old.points_received,
+        amount = amount - old.amount_logged,
+        log_count = log_count - 1
+    WHERE user_id = old.user_id AND achievement_group = IFNULL(old.achievement_group, '') AND month = old.log_month;
+    DELETE FROM user_aggregates
+    WHERE user_id = old.user_id AND achievement_group = IFNULL(old.achievement_group, '') AND month = old.log_month
+    AND log_count <= 0;
+    INSERT INTO user_aggregates (user_id, achievement_group, month, points, amount, log_count)
+    VALUES (new.user_id, IFNULL(new.achievement_group, ''), new.log_month, new.points_received, new.amount_logged, 1)
+    ON CONFLICT (user_id, achievement_group, month) DO UPDATE SET
+        points = points + excluded.points,
+        amount = amount + excluded.amount,
+        log_count = log_count + 1;
+END;
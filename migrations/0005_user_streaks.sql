@@ -0,0 +1,27 @@
+-- Logging streak per user, so the current and longest streak can be read without scanning the user's logs.
+CREATE TABLE IF NOT EXISTS user_streaks (
+    user_id INTEGER PRIMARY KEY,
+    last_log_day TEXT NOT NULL,
+    current_streak INTEGER NOT NULL,
+    longest_streak INTEGER NOT NULL);
+
+-- Consecutive days share the same julianday(day) - row number, which groups every streak into one run.
+WITH days AS (
+    SELECT DISTINCT user_id, DATE(log_date) AS day
+    FROM logs),
+islands AS (
+    SELECT user_id, day, julianday(day) - ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day) AS island
+    FROM days),
+runs AS (
+    SELECT user_id, MAX(day) AS last_day, COUNT(*) AS length
+    FROM islands
+    GROUP BY user_id, island),
+ranked AS (
+    SELECT user_id, last_day, length,
+        ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY last_day DESC) AS recency,
+        MAX(length) OVER (PARTITION BY user_id) AS longest
+    FROM runs)
+INSERT INTO user_streaks (user_id, last_log_day, current_streak, longest_streak)
+SELECT user_id, last_day, length, longest
+FROM ranked
+WHERE recency = 1;
@@ -0,0 +1,58 @@
+-- Points and amount per month, media type and user, the source of the leaderboards. Kept exact by triggers on logs.
+CREATE TABLE IF NOT EXISTS monthly_standings (
+    month TEXT NOT NULL,
+    media_type TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    points REAL NOT NULL DEFAULT 0,
+    amount INTEGER NOT NULL DEFAULT 0,
+    log_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, media_type, user_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_monthly_standings_user ON monthly_standings (user_id, media_type);
+
+INSERT INTO monthly_standings (month, media_type, user_id, points, amount, log_count)
+SELECT log_month, media_type, user_id, SUM(points_received), SUM(amount_logged), COUNT(*)
+FROM logs
+GROUP BY log_month, media_type, user_id;
+
+CREATE TRIGGER IF NOT EXISTS monthly_standings_log_insert AFTER INSERT ON logs
+BEGIN
+    INSERT INTO monthly_standings (month, media_type, user_id, points, amount, log_count)
+    VALUES (new.log_month, new.media_type, new.user_id, new.points_received, new.amount_logged, 1)
+    ON CONFLICT (month, media_type, user_id) DO UPDATE SET
+        points = points + excluded.points,
+        amount = amount + excluded.amount,
+        log_count = log_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS monthly_standings_log_delete AFTER DELETE ON logs
+BEGIN
+    UPDATE monthly_standings SET
+        points = points - old.points_received,
+        amount = amount - old.amount_logged,
+        log_count = log_count - 1
+    WHERE month = old.log_month AND media_type = old.media_type AND user_id = old.user_id;
+    DELETE FROM monthly_standings
+    WHERE month = old.log_month AND media_type = old.media_type AND user_id = old.user_id
+    AND log_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS monthly_standings_log_update
+AFTER UPDATE OF user_id, media_type, log_date, points_received, amount_logged ON logs
+BEGIN
+    UPDATE monthly_standings SET
+        points = points - old.points_received,
+        amount = amount - old.amount_logged,
+        log_count = log_count - 1
+    WHERE month = old.log_month AND media_type = old.media_type AND user_id = old.user_id;
+    DELETE FROM monthly_standings
+    WHERE month = old.log_month AND media_type = old.media_type AND user_id = old.user_id
+    AND log_count <= 0;
+    INSERT INTO monthly_standings (month, media_type, user_id, points, amount, log_count)
+    VALUES (new.log_month, new.media_type, new.user_id, new.points_received, new.amount_logged, 1)
+    ON CONFLICT (month, media_type, user_id) DO UPDATE SET
+        points = points + excluded.points,
+        amount = amount + excluded.amount,
+        log_count = log_count + 1;
+END;
@@ -0,0 +1,59 @@
+-- Amount and points per user, day and media type, the source of /log_stats and /log_race. Kept exact by triggers on logs.
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    user_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    media_type TEXT NOT NULL,
+    amount INTEGER NOT NULL DEFAULT 0,
+    points REAL NOT NULL DEFAULT 0,
+    log_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day, media_type)
+) WITHOUT ROWID;
+
+-- Server wide ranges (races) read the rows of every user for a span of days.
+CREATE INDEX IF NOT EXISTS idx_daily_rollup_day_media_type ON daily_rollup (day, media_type, user_id, amount, points);
+
+INSERT INTO daily_rollup (user_id, day, media_type, amount, points, log_count)
+SELECT user_id, date(log_date), media_type, SUM(amount_logged), SUM(points_received), COUNT(*)
+FROM logs
+GROUP BY user_id, date(log_date), media_type;
+
+CREATE TRIGGER IF NOT EXISTS daily_rollup_log_insert AFTER INSERT ON logs
+BEGIN
+    INSERT INTO daily_rollup (user_id, day, media_type, amount, points, log_count)
+    VALUES (new.user_id, date(new.log_date), new.media_type, new.amount_logged, new.points_received, 1)
+    ON CONFLICT (user_id, day, media_type) DO UPDATE SET
+        amount = amount + excluded.amount,
+        points = points + excluded.points,
+        log_count = log_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_rollup_log_delete AFTER DELETE ON logs
+BEGIN
+    UPDATE daily_rollup SET
+        amount = amount - old.amount_logged,
+        points = points - old.points_received,
+        log_count = log_count - 1
+    WHERE user_id = old.user_id AND day = date(old.log_date) AND media_type = old.media_type;
+    DELETE FROM daily_rollup
+    WHERE user_id = old.user_id AND day = date(old.log_date) AND media_type = old.media_type
+    AND log_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_rollup_log_update
+AFTER UPDATE OF user_id, media_type, log_date, points_received, amount_logged ON logs
+BEGIN
+    UPDATE daily_rollup SET
+        amount = amount - old.amount_logged,
+        points = points - old.points_received,
+        log_count = log_count - 1
+    WHERE user_id = old.user_id AND day = date(old.log_date) AND media_type = old.media_type;
+    DELETE FROM daily_rollup
+    WHERE user_id = old.user_id AND day = date(old.log_date) AND media_type = old.media_type
+    AND log_count <= 0;
+    INSERT INTO daily_rollup (user_id, day, media_type, amount, points, log_count)
+    VALUES (new.user_id, date(new.log_date), new.media_type, new.amount_logged, new.points_received, 1)
+    ON CONFLICT (user_id, day, media_type) DO UPDATE SET
+        amount = amount + excluded.amount,
+        points = points + excluded.points,
+        log_count = log_count + 1;
+END;
@@ -0,0 +1,52 @@
+-- Timezone of a user as a fixed UTC offset, taken from the zone when it was set.
+-- Day boundaries of the daily rollup, streaks and stats are shifted by it.
+CREATE TABLE IF NOT EXISTS user_timezones (
+    user_id INTEGER PRIMARY KEY,
+    timezone TEXT NOT NULL,
+    utc_offset_minutes INTEGER NOT NULL DEFAULT 0);
+
+-- The rollup buckets logs by the local day of their user from now on.
+DROP TRIGGER IF EXISTS daily_rollup_log_insert;
+DROP TRIGGER IF EXISTS daily_rollup_log_delete;
+DROP TRIGGER IF EXISTS daily_rollup_log_update;
+
+CREATE TRIGGER daily_rollup_log_insert AFTER INSERT ON logs
+BEGIN
+    INSERT INTO daily_rollup (user_id, day, media_type, amount, points, log_count)
+    VALUES (new.user_id, date(new.log_date, IFNULL((SELECT utc_offset_minutes FROM user_timezones WHERE user_id = new.user_id), 0) || ' minutes'), new.media_type, new.amount_logged, new.points_received, 1)
+    ON CONFLICT (user_id, day, media_type) DO UPDATE SET
+        amount = amount + excluded.amount,
+        points = points + excluded.points,
+        log_count = log_count + 1;
+END;
+
+CREATE TRIGGER daily_rollup_log_delete AFTER DELETE ON logs
+BEGIN
+    UPDATE daily_rollup SET
+        amount = amount - old.amount_logged,
+        points = points - old.points_received,
+        log_count = log_count - 1
+    WHERE user_id = old.user_id AND day = date(old.log_date, IFNULL((SELECT utc_offset_minutes FROM user_timezones WHERE user_id = old.user_id), 0) || ' minutes') AND media_type = old.media_type;
+    DELETE FROM daily_rollup
+    WHERE user_id = old.user_id AND day = date(old.log_date, IFNULL((SELECT utc_offset_minutes FROM user_timezones WHERE user_id = old.user_id), 0) || ' minutes') AND media_type = old.media_type
+    AND log_count <= 0;
+END;
+
+CREATE TRIGGER daily_rollup_log_update
+AFTER UPDATE OF user_id, media_type, log_date, points_received, amount_logged ON logs
+BEGIN
+    UPDATE daily_rollup SET
+        amount = amount - old.amount_logged,
+        points = points - old.points_received,
+        log_count = log_count - 1
+    WHERE user_id = old.user_id AND day = date(old.log_date, IFNULL((SELECT utc_offset_minutes FROM user_timezones WHERE user_id = old.user_id), 0) || ' minutes') AND media_type = old.media_type;
+    DELETE FROM daily_rollup
+    WHERE user_id = old.user_id AND day = date(old.log_date, IFNULL((SELECT utc_offset_minutes FROM user_timezones WHERE user_id = old.user_id), 0) || ' minutes') AND media_type = old.media_type
+    AND log_count <= 0;
+    INSERT INTO daily_rollup (user_id, day, media_type, amount, points, log_count)
+    VALUES (new.user_id, date(new.log_date, IFNULL((SELECT utc_offset_minutes FROM user_timezones WHERE user_id = new.user_id), 0) || ' minutes'), new.media_type, new.amount_logged, new.points_received, 1)
+    ON CONFLICT (user_id, day, media_type) DO UPDATE SET
+        amount = amount + excluded.amount,
+        points = points + excluded.points,
+        log_count = log_count + 1;
+END;
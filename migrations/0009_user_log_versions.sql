@@ -0,0 +1,38 @@
+-- Version of the data behind a user's stats, bumped on every change to their logs or timezone.
+-- Caches of anything derived from a user's logs are keyed by it.
+CREATE TABLE IF NOT EXISTS user_log_versions (
+    user_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0);
+
+CREATE TRIGGER IF NOT EXISTS user_log_versions_log_insert AFTER INSERT ON logs
+BEGIN
+    INSERT INTO user_log_versions (user_id, version) VALUES (new.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_log_versions_log_delete AFTER DELETE ON logs
+BEGIN
+    INSERT INTO user_log_versions (user_id, version) VALUES (old.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_log_versions_log_update AFTER UPDATE ON logs
+BEGIN
+    INSERT INTO user_log_versions (user_id, version) VALUES (old.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+    INSERT INTO user_log_versions (user_id, version) VALUES (new.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+END;
+
+-- A new timezone moves the user's logs to other local days.
+CREATE TRIGGER IF NOT EXISTS user_log_versions_timezone_insert AFTER INSERT ON user_timezones
+BEGIN
+    INSERT INTO user_log_versions (user_id, version) VALUES (new.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_log_versions_timezone_update AFTER UPDATE ON user_timezones
+BEGIN
+    INSERT INTO user_log_versions (user_id, version) VALUES (new.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+END;
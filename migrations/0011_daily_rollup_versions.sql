@@ -0,0 +1,30 @@
+-- Version of every day of daily_rollup, bumped whenever a row of that day changes.
+-- Caches of anything derived from server wide ranges (race videos) are keyed by the sum over their days.
+CREATE TABLE IF NOT EXISTS daily_rollup_versions (
+    day TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO daily_rollup_versions (day, version)
+SELECT DISTINCT day, 1
+FROM daily_rollup;
+
+CREATE TRIGGER IF NOT EXISTS daily_rollup_versions_insert AFTER INSERT ON daily_rollup
+BEGIN
+    INSERT INTO daily_rollup_versions (day, version) VALUES (new.day, 1)
+    ON CONFLICT (day) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_rollup_versions_delete AFTER DELETE ON daily_rollup
+BEGIN
+    INSERT INTO daily_rollup_versions (day, version) VALUES (old.day, 1)
+    ON CONFLICT (day) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_rollup_versions_update AFTER UPDATE ON daily_rollup
+BEGIN
+    INSERT INTO daily_rollup_versions (day, version) VALUES (old.day, 1)
+    ON CONFLICT (day) DO UPDATE SET version = version + 1;
+    INSERT INTO daily_rollup_versions (day, version) VALUES (new.day, 1)
+    ON CONFLICT (day) DO UPDATE SET version = version + 1;
+END;
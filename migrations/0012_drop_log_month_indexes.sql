@@ -0,0 +1,6 @@
+-- The month and media type leaderboards and monthly point totals are read from monthly_standings and
+-- user_aggregates now, no query reads these covering indexes anymore. Their only readers left are the full
+-- rebuilds of those tables, which scan every log anyway. Dropping them saves their upkeep on every log write.
+DROP INDEX IF EXISTS idx_logs_month_media_type;
+DROP INDEX IF EXISTS idx_logs_user_month;
+DROP INDEX IF EXISTS idx_logs_media_type_user;
@@ -0,0 +1,58 @@
+-- UTC offset of the user's timezone at the time of each log, set when the log is written.
+-- Zones with daylight saving time then put every log on the day it was local to, and a later change of
+-- timezone no longer moves the days of older logs.
+ALTER TABLE logs ADD COLUMN utc_offset_minutes INTEGER NOT NULL DEFAULT 0;
+
+-- Existing logs keep the days the rollup already has them on: the offset their user has set right now.
+UPDATE logs
+SET utc_offset_minutes = (SELECT utc_offset_minutes FROM user_timezones WHERE user_id = logs.user_id)
+WHERE user_id IN (SELECT user_id FROM user_timezones);
+
+-- VIRTUAL like log_month, computed on read and needing no backfill.
+ALTER TABLE logs ADD COLUMN log_day TEXT GENERATED ALWAYS AS (date(log_date, utc_offset_minutes || ' minutes')) VIRTUAL;
+
+-- The rollup buckets logs by their own local day instead of the current timezone of their user.
+DROP TRIGGER IF EXISTS daily_rollup_log_insert;
+DROP TRIGGER IF EXISTS daily_rollup_log_delete;
+DROP TRIGGER IF EXISTS daily_rollup_log_update;
+
+CREATE TRIGGER daily_rollup_log_insert AFTER INSERT ON logs
+BEGIN
+    INSERT INTO daily_rollup (user_id, day, media_type, amount, points, log_count)
+    VALUES (new.user_id, new.log_day, new.media_type, new.amount_logged, new.points_received, 1)
+    ON CONFLICT (user_id, day, media_type) DO UPDATE SET
+        amount = amount + excluded.amount,
+        points = points + excluded.points,
+        log_count = log_count + 1;
+END;
+
+CREATE TRIGGER daily_rollup_log_delete AFTER DELETE ON logs
+BEGIN
+    UPDATE daily_rollup SET
+        amount = amount - old.amount_logged,
+        points = points - old.points_received,
+        log_count = log_count - 1
+    WHERE user_id = old.user_id AND day = old.log_day AND media_type = old.media_type;
+    DELETE FROM daily_rollup
+    WHERE user_id = old.user_id AND day = old.log_day AND media_type = old.media_type
+    AND log_count <= 0;
+END;
+
+CREATE TRIGGER daily_rollup_log_update
+AFTER UPDATE OF user_id, media_type, log_date, utc_offset_minutes, points_received, amount_logged ON logs
+BEGIN
+    UPDATE daily_rollup SET
+        amount = amount - old.amount_logged,
+        points = points - old.points_received,
+        log_count = log_count - 1
+    WHERE user_id = old.user_id AND day = old.log_day AND media_type = old.media_type;
+    DELETE FROM daily_rollup
+    WHERE user_id = old.user_id AND day = old.log_day AND media_type = old.media_type
+    AND log_count <= 0;
+    INSERT INTO daily_rollup (user_id, day, media_type, amount, points, log_count)
+    VALUES (new.user_id, new.log_day, new.media_type, new.amount_logged, new.points_received, 1)
+    ON CONFLICT (user_id, day, media_type) DO UPDATE SET
+        amount = amount + excluded.amount,
+        points = points + excluded.points,
+        log_count = log_count + 1;
+END;
@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+
+def pytest_configure(config):
+    # lib reads the files in config/ relative to the working directory, the bot always runs from the repository root.
+    os.chdir(config.rootpath)
+
+
+def pytest_addoption(parser):
+    parser.addoption('--run-slow', action='store_true', help="Also run the tests marked slow.")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-slow'):
+        return
+    skip_slow = pytest.mark.skip(reason="slow, use --run-slow to run it")
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip_slow)
@@ -0,0 +1,117 @@
+"""The NumPy chart data of lib.immersion_chart_data against the pandas pivots it replaced."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from datetime import datetime, timedelta
+
+from lib.immersion_chart_data import bar_series, heatmap_grids, log_arrays
+
+MEDIA_TYPES = ['Anime', 'Book', 'Listening', 'Manga', 'Reading', 'VN']
+
+
+def logs_frame(rows: list) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=['media_type', 'amount_logged', 'points_received', 'log_date'])
+    df['log_date'] = pd.to_datetime(df['log_date'])
+    return df.set_index('log_date')
+
+
+def pandas_bar_data(df: pd.DataFrame, from_date: datetime, to_date: datetime, immersion_type: str = None) -> tuple:
+    bar_df = df[from_date:to_date]
+    values = 'amount_logged' if immersion_type else 'points_received'
+    bar_df = bar_df.pivot_table(index=bar_df.index.date, columns='media_type', values=values, aggfunc='sum', fill_value=0)
+    bar_df.index = pd.DatetimeIndex(bar_df.index)
+    bar_df = bar_df.reindex(pd.date_range(bar_df.index.date.min(), to_date, freq='D'), fill_value=0)
+
+    if len(bar_df) > 365 * 2:
+        df_plot = bar_df.resample('QE').sum()
+        return df_plot, " (year-quarter)", list(df_plot.index.map(lambda date: f"{date.year}-Q{(date.month - 1) // 3 + 1}"))
+    if len(bar_df) > 30 * 7:
+        df_plot = bar_df.resample('ME').sum()
+        return df_plot, " (year-month)", list(df_plot.index.strftime("%Y-%m"))
+    if len(bar_df) > 31:
+        df_plot = bar_df.resample('W').sum()
+        return df_plot, " (year-week)", list(df_plot.index.strftime("%Y-%W"))
+    return bar_df, "", list(bar_df.index.strftime("%Y-%m-%d"))
+
+
+def pandas_heatmap_data(df: pd.DataFrame) -> dict:
+    df = df[["points_received"]].resample("D").sum()
+    full_date_range = pd.date_range(start=datetime(df.index.year.min(), 1, 1), end=datetime(df.index.year.max(), 12, 31))
+    df = df.reindex(full_date_range, fill_value=0)
+    df["day"] = df.index.weekday
+    df["year"] = df.index.year
+
+    heatmap_data = {}
+    for year, group in df.groupby("year"):
+        group = group.copy()
+        year_begins_on = group.index.date.min().weekday()
+        group["week"] = (group.index.dayofyear + year_begins_on - 1) // 7
+        heatmap_data[year] = group.pivot_table(index="day", columns="week", values="points_received", aggfunc="sum", fill_value=np.nan)
+    return heatmap_data
+
+
+def random_rows(rng: random.Random, start: datetime, end: datetime, media_types: list) -> list:
+    """Daily rollup rows ordered by day, some days without logs and some with several media types."""
+    rows = []
+    for offset in range((end - start).days + 1):
+        day = (start + timedelta(days=offset)).strftime('%Y-%m-%d')
+        if rng.random() < 0.4:
+            continue
+        for media_type in sorted(rng.sample(media_types, rng.randint(1, len(media_types)))):
+            rows.append((media_type, rng.randint(1, 500), round(rng.uniform(0.1, 300), 3), day))
+    return rows
+
+
+# 2012, 2020 and 2024 are leap years. 2012 and 2023 start on a Sunday, so their last days fall in week 53 and 52,
+# the only weeks that need a 54th and 53rd column.
+@pytest.mark.parametrize('seed, start, end', [
+    (1, datetime(2011, 12, 20), datetime(2013, 1, 10)),
+    (2, datetime(2019, 3, 10), datetime(2021, 2, 1)),
+    (3, datetime(2022, 11, 20), datetime(2025, 1, 5)),
+    (4, datetime(2012, 12, 25), datetime(2012, 12, 31)),
+])
+def test_heatmap_grids_match_pandas(seed, start, end):
+    rows = random_rows(random.Random(seed), start, end, MEDIA_TYPES)
+    expected = pandas_heatmap_data(logs_frame(rows))
+    grids = heatmap_grids(log_arrays(rows))
+
+    assert list(grids) == list(expected)
+    for year, grid in grids.items():
+        assert list(expected[year].index) == list(range(7))
+        assert list(expected[year].columns) == list(range(grid.shape[1]))
+        np.testing.assert_allclose(grid, expected[year].to_numpy(dtype=np.float64), equal_nan=True)
+
+
+def test_heatmap_week_53():
+    grids = heatmap_grids(log_arrays([('Anime', 1, 5.0, '2012-12-31'), ('Anime', 1, 3.0, '2013-01-01')]))
+    assert grids[2012].shape == (7, 54)
+    # December 31st 2012 was a Monday.
+    assert grids[2012][0, 53] == 5.0
+    assert grids[2013][1, 0] == 3.0
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_bar_series_match_pandas(seed):
+    rng = random.Random(seed)
+    start = datetime(2019, 1, 1) + timedelta(days=rng.randint(0, 365 * 4))
+    # Day, week, month and quarter bins, including the ranges right at the thresholds.
+    days = rng.choice([rng.randint(0, 30), 31, 32, rng.randint(33, 209), 210, 211,
+                       rng.randint(212, 729), 730, 731, rng.randint(732, 365 * 5)])
+    end = start + timedelta(days=days)
+    media_types = rng.sample(MEDIA_TYPES, rng.randint(1, len(MEDIA_TYPES)))
+    rows = random_rows(rng, start - timedelta(days=40), end + timedelta(days=40), media_types)
+    # The first logged day starts the series, make sure there is one at the start of the range.
+    rows.insert(0, (media_types[0], 1, 1.0, start.strftime('%Y-%m-%d')))
+    rows.sort(key=lambda row: row[3])
+    immersion_type = rng.choice([None, media_types[0]])
+
+    expected, x_lab, date_labels = pandas_bar_data(logs_frame(rows), start, end, immersion_type)
+    series = bar_series(log_arrays(rows), start, end, immersion_type)
+
+    assert series.x_lab == x_lab
+    assert series.date_labels == date_labels
+    assert series.media_types == list(expected.columns)
+    np.testing.assert_allclose(series.values, expected.to_numpy(dtype=np.float64).T)
@@ -0,0 +1,47 @@
+"""Rendering the /log_stats charts over and over must not leak figures, see lib.immersion_charts.new_figure."""
+import random
+import resource
+
+import pytest
+
+from datetime import datetime, timedelta
+
+from lib.immersion_charts import generate_bar_chart, generate_heatmap, set_plot_styles
+from lib.media_types import MEDIA_TYPES
+
+RENDERS = 500
+WARM_UP_RENDERS = 20
+# Peak RSS may grow this much over the renders after the warm up, a leaked figure per render is far more.
+MAX_RSS_GROWTH_KB = 40 * 1024
+
+
+def daily_rows(days: int = 400) -> list:
+    rng = random.Random(0)
+    start = datetime(2023, 1, 1)
+    media_types = list(MEDIA_TYPES)[:4]
+    return [(rng.choice(media_types), rng.randint(1, 100), rng.random() * 50, (start + timedelta(days=day)).strftime('%Y-%m-%d'))
+            for day in range(days) for _ in range(rng.randint(0, 3))]
+
+
+def peak_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def render(index: int, rows: list):
+    if index % 2:
+        generate_heatmap(rows, datetime(2023, 1, 1), datetime(2024, 2, 4), None, current_date=datetime(2024, 2, 4).date())
+    else:
+        generate_bar_chart(rows, datetime(2023, 11, 1), datetime(2024, 2, 4))
+
+
+@pytest.mark.slow
+def test_repeated_renders_keep_memory_bounded():
+    set_plot_styles()
+    rows = daily_rows()
+    for index in range(WARM_UP_RENDERS):
+        render(index, rows)
+
+    rss_before = peak_rss_kb()
+    for index in range(RENDERS):
+        render(index, rows)
+    assert peak_rss_kb() - rss_before < MAX_RSS_GROWTH_KB
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from lib.database import Database, TransactionReentryError
+
+
+def run_with_database(tmp_path, test, group_commit=False):
+    async def main():
+        db = Database(str(tmp_path / 'test.sqlite3'), reader_count=1, group_commit=group_commit)
+        await db.open()
+        try:
+            await db.execute("CREATE TABLE items (name TEXT);")
+            await test(db)
+        finally:
+            await db.close()
+    asyncio.run(asyncio.wait_for(main(), timeout=10))
+
+
+@pytest.mark.parametrize('group_commit', [False, True])
+def test_writes_through_the_database_inside_a_transaction_raise(tmp_path, group_commit):
+    async def test(db):
+        with pytest.raises(TransactionReentryError):
+            async with db.transaction() as tx:
+                await tx.RUN("INSERT INTO items VALUES ('a');")
+                await db.execute("INSERT INTO items VALUES ('b');")
+        # The transaction was rolled back and the write lock released.
+        await db.execute("INSERT INTO items VALUES ('c');")
+        assert await db.fetchall("SELECT name FROM items;") == [('c',)]
+    run_with_database(tmp_path, test, group_commit)
+
+
+def test_nested_transactions_raise(tmp_path):
+    async def test(db):
+        async with db.transaction():
+            with pytest.raises(TransactionReentryError):
+                async with db.transaction():
+                    pass
+            with pytest.raises(TransactionReentryError):
+                await db.executemany("INSERT INTO items VALUES (?);", [('a',)])
+    run_with_database(tmp_path, test)
+
+
+def test_tasks_started_in_a_transaction_can_write_after_it(tmp_path):
+    async def test(db):
+        committed = asyncio.Event()
+
+        async def write_later():
+            await committed.wait()
+            await db.execute("INSERT INTO items VALUES ('later');")
+
+        async with db.transaction() as tx:
+            task = asyncio.create_task(write_later())
+            await tx.RUN("INSERT INTO items VALUES ('inside');")
+        committed.set()
+        await task
+        assert await db.fetchall("SELECT name FROM items ORDER BY rowid;") == [('inside',), ('later',)]
+    run_with_database(tmp_path, test)